@@ -0,0 +1 @@
+# PA Co-Pilot benchmarks
@@ -0,0 +1,200 @@
+"""Compare the section-indexed extractor against the original regex extractor.
+
+Run with `python -m benchmarks.extraction [--iterations N] [--json]`.
+"""
+import argparse
+import json
+import re
+import time
+
+from src.data.seed_data import CASES
+from src.services.case_extractor import extract_case_data_sections
+
+
+# The extractor as it was before case_extractor replaced it: one re.search over
+# the whole document per field. Kept only as the baseline for this benchmark.
+def _legacy_patient_info(pa_text: str) -> dict:
+    patient_info = {"name": "N/A", "dob": "N/A", "member_id": "N/A"}
+    
+    name_match = re.search(r'Patient:\s*([^\n\(]+)', pa_text)
+    if name_match:
+        patient_info["name"] = name_match.group(1).strip()
+    
+    dob_match = re.search(r'DOB:\s*(\d{1,2}/\d{1,2}/\d{4})', pa_text)
+    if dob_match:
+        patient_info["dob"] = dob_match.group(1)
+    
+    member_match = re.search(r'Member ID:\s*([^\n]+)', pa_text)
+    if member_match:
+        patient_info["member_id"] = member_match.group(1).strip()
+    
+    return patient_info
+
+
+def extract_case_data_legacy(pa_text: str) -> dict:
+    patient_info = _legacy_patient_info(pa_text)
+    
+    diagnosis = {"primary": "N/A", "icd10": "", "histology": ""}
+    diag_match = re.search(r'Diagnosis:\s*([^\n]+)', pa_text)
+    if diag_match:
+        diagnosis["primary"] = diag_match.group(1).strip()
+    icd_match = re.search(r'ICD-10:\s*([^\n]+)', pa_text)
+    if icd_match:
+        diagnosis["icd10"] = icd_match.group(1).strip()
+    hist_match = re.search(r'Histology:\s*([^\n]+)', pa_text)
+    if hist_match:
+        diagnosis["histology"] = hist_match.group(1).strip()
+    
+    disease_stage = {"stage": "N/A", "tnm": "", "metastatic_sites": []}
+    stage_match = re.search(r'Stage[:\s]+(IV|III|II|I)[\s\(]*([^\n\)]*)', pa_text, re.IGNORECASE)
+    if stage_match:
+        disease_stage["stage"] = f"Stage {stage_match.group(1).upper()}"
+        if stage_match.group(2):
+            disease_stage["tnm"] = stage_match.group(2).strip()
+    
+    met_match = re.search(r'[Mm]etastatic sites?:\s*([^\n]+)', pa_text)
+    if met_match:
+        disease_stage["metastatic_sites"] = [s.strip() for s in met_match.group(1).split(',')]
+    
+    pd_l1 = {"status": "not tested", "value": "", "test_date": ""}
+    pdl1_match = re.search(r'PD-L1[^:]*:\s*(\d+)%', pa_text)
+    if pdl1_match:
+        value = int(pdl1_match.group(1))
+        pd_l1["status"] = "positive" if value > 0 else "negative"
+        pd_l1["value"] = f"{value}%"
+    elif "pending" in pa_text.lower() and "pd-l1" in pa_text.lower():
+        pd_l1["status"] = "pending"
+    
+    egfr = {"status": "not tested", "mutation": ""}
+    if re.search(r'EGFR[:\s]+Wild type', pa_text, re.IGNORECASE):
+        egfr["status"] = "wild type"
+    elif re.search(r'EGFR[:\s]+(Exon \d+ [^\n,]+)', pa_text, re.IGNORECASE):
+        egfr["status"] = "mutated"
+        egfr_mut = re.search(r'EGFR[:\s]+(Exon \d+ [^\n,]+)', pa_text, re.IGNORECASE)
+        if egfr_mut:
+            egfr["mutation"] = egfr_mut.group(1).strip()
+    elif "egfr" in pa_text.lower() and "pending" in pa_text.lower():
+        egfr["status"] = "pending"
+    
+    alk = {"status": "not tested"}
+    if re.search(r'ALK[:\s]+Negative', pa_text, re.IGNORECASE):
+        alk["status"] = "negative"
+    elif re.search(r'ALK[:\s]+Positive', pa_text, re.IGNORECASE):
+        alk["status"] = "positive"
+    
+    performance_status = {"ecog": "", "description": ""}
+    ecog_match = re.search(r'ECOG[:\s]+(\d)', pa_text)
+    if ecog_match:
+        performance_status["ecog"] = ecog_match.group(1)
+    perf_desc = re.search(r'ECOG[:\s]+\d+\s*[-–]\s*([^\n]+)', pa_text)
+    if perf_desc:
+        performance_status["description"] = perf_desc.group(1).strip()
+    
+    prior_therapy = {"has_prior_systemic": False, "treatments": [], "immunotherapy_history": "none"}
+    if re.search(r'No prior systemic', pa_text, re.IGNORECASE):
+        prior_therapy["has_prior_systemic"] = False
+        prior_therapy["treatments"] = ["No prior systemic therapy"]
+    elif re.search(r'Prior [Tt]reatments?:', pa_text):
+        prior_match = re.search(r'Prior [Tt]reatments?:\s*([^\n]+)', pa_text)
+        if prior_match and "no prior" not in prior_match.group(1).lower():
+            prior_therapy["has_prior_systemic"] = True
+            prior_therapy["treatments"] = [prior_match.group(1).strip()]
+    
+    comorbidities = []
+    comor_match = re.search(r'COMORBIDITIES:\s*([\s\S]*?)(?=RATIONALE|REQUESTING|$)', pa_text)
+    if comor_match:
+        comor_text = comor_match.group(1)
+        comor_lines = [line.strip().strip('-').strip() for line in comor_text.split('\n') if line.strip() and line.strip() != '-']
+        comorbidities = [c for c in comor_lines if c and len(c) > 2]
+    
+    provider = {"name": "", "npi": "", "facility": ""}
+    prov_match = re.search(r'Requesting Provider:\s*([^\n]+)', pa_text)
+    if prov_match:
+        provider["name"] = prov_match.group(1).strip()
+    npi_match = re.search(r'NPI:\s*(\d+)', pa_text)
+    if npi_match:
+        provider["npi"] = npi_match.group(1)
+    
+    drug = {"name": "", "dose": "", "duration": ""}
+    drug_match = re.search(r'MEDICATION REQUESTED:\s*([^\n]+)', pa_text)
+    if drug_match:
+        drug["name"] = drug_match.group(1).strip()
+    req_match = re.search(r'REQUESTING:\s*([^\n]+)', pa_text)
+    if req_match:
+        drug["duration"] = req_match.group(1).strip()
+    
+    return {
+        "patient_info": patient_info,
+        "diagnosis": diagnosis,
+        "disease_stage": disease_stage,
+        "biomarkers": {
+            "pd_l1": pd_l1,
+            "egfr": egfr,
+            "alk": alk,
+            "other_markers": []
+        },
+        "labs": {
+            "wbc": "",
+            "hemoglobin": "",
+            "platelets": "",
+            "creatinine": "",
+            "alt": "",
+            "ast": "",
+            "other": []
+        },
+        "performance_status": performance_status,
+        "prior_therapy": prior_therapy,
+        "comorbidities": comorbidities,
+        "requesting_provider": provider,
+        "drug_requested": drug,
+        "_demo_mode": True
+    }
+
+
+def _time_per_call(extract, pa_text: str, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        extract(pa_text)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def run_benchmark(iterations: int = 2000) -> dict:
+    cases = []
+    for case in CASES:
+        pa_text = case['raw_text']
+        if extract_case_data_legacy(pa_text) != extract_case_data_sections(pa_text):
+            raise AssertionError(f"Extractors disagree on {case['id']}")
+        legacy_us = _time_per_call(extract_case_data_legacy, pa_text, iterations)
+        sections_us = _time_per_call(extract_case_data_sections, pa_text, iterations)
+        cases.append({
+            'case_id': case['id'],
+            'chars': len(pa_text),
+            'legacy_us': round(legacy_us, 1),
+            'sections_us': round(sections_us, 1),
+            'speedup': round(legacy_us / sections_us, 2)
+        })
+    legacy_total = sum(c['legacy_us'] for c in cases)
+    sections_total = sum(c['sections_us'] for c in cases)
+    return {
+        'iterations': iterations,
+        'cases': cases,
+        'legacy_us_total': round(legacy_total, 1),
+        'sections_us_total': round(sections_total, 1),
+        'speedup': round(legacy_total / sections_total, 2) if sections_total else 0
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.iterations)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'case':<14}{'chars':>7}{'legacy us':>12}{'sections us':>14}{'speedup':>10}")
+        for c in report['cases']:
+            print(f"{c['case_id']:<14}{c['chars']:>7}{c['legacy_us']:>12}{c['sections_us']:>14}{c['speedup']:>9}x")
+        print(f"Identical output on {len(report['cases'])} seeded cases; overall speedup {report['speedup']}x")
@@ -0,0 +1,224 @@
+"""A local stand-in for the OpenAI chat completions API.
+
+Answers each prompt the pipeline sends with canned JSON after a configurable
+delay, so the pipeline can be timed end to end without network calls. A share
+of requests can be failed with a chosen status and Retry-After header to
+exercise the client's retries.
+Run on its own with `python -m benchmarks.openai_stub [--port N] [--latency S] [--error-rate R]`.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from src.services.case_extractor import extract_case_data_sections
+from src.services.openai_client import LETTER_MARKERS
+from src.services.policy_engine import get_triage_summary
+
+STREAM_CHUNK_CHARS = 20
+
+CANNED_RATIONALE = {
+    "rationale": "The submitted documentation was reviewed against each coverage criterion in the policy."
+}
+
+
+def _section(prompt: str, heading: str, next_heading: Optional[str] = None) -> str:
+    text = prompt.split(heading, 1)[1]
+    if next_heading:
+        text = text.split(next_heading, 1)[0]
+    return text.strip()
+
+
+def _canned_extraction(prompt: str) -> dict:
+    data = extract_case_data_sections(_section(prompt, "PA REQUEST TEXT:"))
+    data.pop('_demo_mode', None)
+    return data
+
+
+def _canned_recommendation(prompt: str) -> dict:
+    # Follow the prompt's own decision logic so downstream stages see a
+    # realistic mix of approve, deny and pend.
+    criteria = json.loads(_section(prompt, "CRITERIA EVALUATION:", "EXTRACTED CASE DATA:"))
+    summary = get_triage_summary(criteria)
+    if summary['has_unmet_required']:
+        decision = 'deny'
+    elif summary['has_unknown_required']:
+        decision = 'pend'
+    else:
+        decision = 'approve'
+    return {
+        "recommendation": decision,
+        "confidence": "high",
+        "complexity": "low" if decision == 'approve' else "high",
+        "primary_reasons": [f"{c['description']}: {c['status']}" for c in criteria],
+        "information_gaps": [c['description'] for c in criteria if c['status'] == 'unknown'],
+        "clinical_rationale": f"Stub recommendation: {summary['required_met']} of {summary['required_criteria']} required criteria met.",
+        "guideline_alignment": "",
+        "risk_considerations": [],
+        "alternative_options": []
+    }
+
+
+CANNED_LETTERS = (
+    f"{LETTER_MARKERS['provider']}\nDear Provider,\n\nThis letter confirms our determination.\n\n"
+    f"{LETTER_MARKERS['member']}\nDear Member,\n\nWe have reviewed your request.\n"
+)
+
+
+def classify_prompt(prompt: str, stream: bool) -> str:
+    if stream:
+        return 'letters_stream'
+    if "PA REQUEST TEXT:" in prompt:
+        return 'extraction'
+    if "Decision Logic:" in prompt:
+        return 'recommendation'
+    if '"rationale"' in prompt:
+        return 'letter_rationale'
+    return 'unknown'
+
+
+def _usage(prompt: str, completion: str) -> dict:
+    # Roughly four characters per token, which is close enough to keep the
+    # usage accounting exercised.
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(completion) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0}
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: "StubOpenAIServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        prompt = body['messages'][-1]['content']
+        stream = bool(body.get('stream'))
+        kind = classify_prompt(prompt, stream)
+        time.sleep(self.server.latency)
+        if self.server.should_fail():
+            self.server.record_call('failed')
+            self._send_error()
+            return
+        self.server.record_call(kind)
+
+        if kind == 'letters_stream':
+            self._send_stream(body, prompt, CANNED_LETTERS)
+            return
+        if kind == 'extraction':
+            answer = _canned_extraction(prompt)
+        elif kind == 'recommendation':
+            answer = _canned_recommendation(prompt)
+        elif kind == 'letter_rationale':
+            answer = CANNED_RATIONALE
+        else:
+            answer = {}
+        content = json.dumps(answer)
+        self._send_json({
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', 'stub'),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": _usage(prompt, content)
+        })
+
+    def _send_error(self):
+        data = json.dumps({"error": {"message": "Stub injected failure", "type": "stub_error"}}).encode()
+        self.send_response(self.server.error_status)
+        if self.server.retry_after is not None:
+            self.send_header('Retry-After', f"{self.server.retry_after:g}")
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, body: dict, prompt: str, text: str):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get('model', 'stub')}
+        for start in range(0, len(text), STREAM_CHUNK_CHARS):
+            delta = {"index": 0, "delta": {"content": text[start:start + STREAM_CHUNK_CHARS]}, "finish_reason": None}
+            self.wfile.write(f"data: {json.dumps({**chunk, 'choices': [delta]})}\n\n".encode())
+        if (body.get('stream_options') or {}).get('include_usage'):
+            self.wfile.write(f"data: {json.dumps({**chunk, 'choices': [], 'usage': _usage(prompt, text)})}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class StubOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.05, error_rate: float = 0.0,
+                 error_status: int = 429, retry_after: Optional[float] = None, seed: int = 0):
+        super().__init__(('127.0.0.1', port), _StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self.calls = Counter()
+        self._calls_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+    def should_fail(self) -> bool:
+        with self._calls_lock:
+            return self._rng.random() < self.error_rate
+
+    def record_call(self, kind: str):
+        with self._calls_lock:
+            self.calls[kind] += 1
+
+    def start(self) -> "StubOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StubOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds to wait before each response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests to fail")
+    parser.add_argument('--error-status', type=int, default=429)
+    parser.add_argument('--retry-after', type=float, help="Retry-After seconds to send with failures")
+    args = parser.parse_args()
+
+    server = StubOpenAIServer(args.port, args.latency, args.error_rate, args.error_status, args.retry_after)
+    print(f"Stub OpenAI API on {server.base_url} (set OPENAI_BASE_URL to this and OPENAI_API_KEY to any value)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
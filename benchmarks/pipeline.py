@@ -0,0 +1,252 @@
+"""Time each stage of the case pipeline against a local OpenAI stub.
+
+Runs run_case_pipeline over the seeded cases in a throwaway database and
+reports per-stage latency. Write the report with --output and pass an earlier
+report to --compare to see how a change moved each stage.
+
+Run with `python -m benchmarks.pipeline [--rounds N] [--latency S] [--output FILE] [--compare FILE]`.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+STAGES = (
+    'get_case', 'get_policy', 'extract_case_data', 'evaluate_criteria',
+    'generate_recommendation', 'draft_letters', 'update_case', 'audit_writes'
+)
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def record(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds * 1000)
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed_async(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - started)
+            return timed_async
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        return timed
+
+    def summary(self) -> Dict[str, dict]:
+        return {stage: _latency_summary(samples) for stage, samples in self.samples.items()}
+
+
+def _latency_summary(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'total_ms': round(sum(ordered), 3),
+        'mean_ms': round(sum(ordered) / len(ordered), 3),
+        'p50_ms': round(ordered[len(ordered) // 2], 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max_ms': round(ordered[-1], 3)
+    }
+
+
+def _instrument(timer: StageTimer) -> Callable[[], None]:
+    """Wrap the functions the pipeline calls for each stage; returns an undo callback."""
+    from src.models import database
+    from src.services import pipeline
+
+    patches = [
+        (pipeline, 'get_case', 'get_case'),
+        (pipeline, 'get_policy', 'get_policy'),
+        (pipeline, 'extract_case_data_async', 'extract_case_data'),
+        (pipeline, 'evaluate_criteria', 'evaluate_criteria'),
+        (pipeline, 'generate_recommendation_async', 'generate_recommendation'),
+        (pipeline, 'generate_recommendation_demo', 'generate_recommendation'),
+        (pipeline, 'draft_letters_async', 'draft_letters'),
+        (database, '_execute_case_update', 'update_case'),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, stage in patches:
+        setattr(module, name, timer.wrap(stage, getattr(module, name)))
+
+    # The unit of work writes the case update and the audit entries in one
+    # transaction; whatever the commit spends beyond the update is the audit
+    # insert plus the transaction commit itself.
+    original_commit = database.CaseUnitOfWork.commit
+
+    def timed_commit(uow):
+        if not uow.audit_entries:
+            return original_commit(uow)
+        updates_before = sum(timer.samples['update_case'])
+        started = time.perf_counter()
+        try:
+            return original_commit(uow)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            update_ms = sum(timer.samples['update_case']) - updates_before
+            timer.samples['audit_writes'].append(elapsed_ms - update_ms)
+
+    database.CaseUnitOfWork.commit = timed_commit
+
+    def undo():
+        for module, name, original in originals:
+            setattr(module, name, original)
+        database.CaseUnitOfWork.commit = original_commit
+    return undo
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _run_rounds(case_ids: List[str], rounds: int, timer: StageTimer) -> Dict[str, int]:
+    from src.services.pipeline import run_case_pipeline, CaseProcessingError
+
+    outcomes: Dict[str, int] = defaultdict(int)
+    for _ in range(rounds):
+        for case_id in case_ids:
+            started = time.perf_counter()
+            try:
+                result = await run_case_pipeline(case_id)
+                outcomes[result['recommendation']] += 1
+            except CaseProcessingError:
+                outcomes['failed'] += 1
+            timer.samples['case_total'].append((time.perf_counter() - started) * 1000)
+    return dict(outcomes)
+
+
+def run_benchmark(rounds: int = 5, latency: float = 0.05, extraction_mode: str = 'llm', rule_based: bool = True,
+                  error_rate: float = 0.0, retry_after: Optional[float] = None) -> dict:
+    # Configuration is read when the services are first imported, so the
+    # environment has to be in place before anything under src/ is loaded.
+    os.environ['OPENAI_API_KEY'] = 'benchmark'
+    os.environ['PA_LLM_CACHE_ENABLED'] = '0'
+    os.environ['PA_EXTRACTION_MODE'] = extraction_mode
+    if not rule_based:
+        os.environ['PA_RULE_BASED_RECOMMENDATIONS'] = ''
+
+    from benchmarks.openai_stub import StubOpenAIServer
+    from src.data.seed_data import CASES, seed_database
+    from src.models import database
+    from src.services.llm_usage import get_usage_stats
+
+    timer = StageTimer()
+    with StubOpenAIServer(latency=latency, error_rate=error_rate, retry_after=retry_after) as stub, tempfile.TemporaryDirectory() as workdir:
+        os.environ['OPENAI_BASE_URL'] = stub.base_url
+        database.DATABASE_PATH = os.path.join(workdir, 'pa_copilot.db')
+        seed_database()
+
+        undo = _instrument(timer)
+        started = time.perf_counter()
+        try:
+            outcomes = asyncio.run(_run_rounds([case['id'] for case in CASES], rounds, timer))
+        finally:
+            undo()
+        elapsed = time.perf_counter() - started
+        usage = get_usage_stats()
+        database.close_db_connections()
+
+    summary = timer.summary()
+    return {
+        'benchmark': 'pipeline',
+        'commit': _git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'rounds': rounds,
+            'cases': len(CASES),
+            'stub_latency_s': latency,
+            'extraction_mode': extraction_mode,
+            'rule_based_recommendations': rule_based,
+            'stub_error_rate': error_rate,
+            'stub_retry_after_s': retry_after
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'outcomes': outcomes,
+        'case_total': summary.pop('case_total'),
+        'stages': {stage: summary[stage] for stage in STAGES if stage in summary},
+        'stub_calls': dict(stub.calls),
+        'llm_usage': usage
+    }
+
+
+def compare_reports(baseline: dict, report: dict) -> List[dict]:
+    rows = []
+    for stage in (*STAGES, 'case_total'):
+        before = baseline['case_total'] if stage == 'case_total' else baseline['stages'].get(stage)
+        after = report['case_total'] if stage == 'case_total' else report['stages'].get(stage)
+        if not before or not after:
+            continue
+        rows.append({
+            'stage': stage,
+            'before_mean_ms': before['mean_ms'],
+            'after_mean_ms': after['mean_ms'],
+            'change_pct': round((after['mean_ms'] - before['mean_ms']) / before['mean_ms'] * 100, 1) if before['mean_ms'] else None
+        })
+    return rows
+
+
+def _print_report(report: dict):
+    config = report['config']
+    print(f"commit {report['commit']}: {config['rounds']} rounds x {config['cases']} cases, "
+          f"stub latency {config['stub_latency_s']}s, extraction mode {config['extraction_mode']}")
+    print(f"{'stage':<26}{'count':>7}{'mean ms':>11}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for stage, stats in (*report['stages'].items(), ('case_total', report['case_total'])):
+        print(f"{stage:<26}{stats['count']:>7}{stats['mean_ms']:>11}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['max_ms']:>10}")
+    print(f"Outcomes {report['outcomes']}; stub calls {report['stub_calls']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5, help="times to run every seeded case")
+    parser.add_argument('--latency', type=float, default=0.05, help="stub response delay in seconds")
+    parser.add_argument('--extraction-mode', default='llm', choices=('llm', 'hybrid', 'regex'))
+    parser.add_argument('--no-rules', action='store_true', help="send every recommendation to the stub")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of stub responses that are 429s")
+    parser.add_argument('--retry-after', type=float, help="Retry-After seconds the stub sends with its 429s")
+    parser.add_argument('--output', help="write the report as JSON to this file")
+    parser.add_argument('--compare', help="earlier JSON report to compare against")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.rounds, args.latency, args.extraction_mode, not args.no_rules, args.error_rate, args.retry_after
+    )
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report['compared_to'] = {'commit': baseline.get('commit'), 'stages': compare_reports(baseline, report)}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+        for row in report.get('compared_to', {}).get('stages', []):
+            change = f"{row['change_pct']:+}%" if row['change_pct'] is not None else "n/a"
+            print(f"  {row['stage']:<24}{row['before_mean_ms']:>10} -> {row['after_mean_ms']:<10} ({change})")
@@ -1,5 +1,5 @@
 import axios from 'axios'
-import type { Case, Metrics, DemoModeStatus } from '@/types'
+import type { Case, CasePage, CaseListParams, Metrics, DemoModeStatus, Job, JobEvent, LetterStreamEvent } from '@/types'
 
 const api = axios.create({
   baseURL: '/api',
@@ -9,8 +9,10 @@ const api = axios.create({
 })
 
 export const casesApi = {
-  getAll: async (): Promise<Case[]> => {
-    const response = await api.get('/cases')
+  list: async (params: CaseListParams = {}): Promise<CasePage> => {
+    const response = await api.get('/cases', {
+      params: { ...params, fields: params.fields?.join(',') },
+    })
     return response.data
   },
 
@@ -19,7 +21,7 @@ export const casesApi = {
     return response.data
   },
 
-  process: async (id: string): Promise<{ status: string; message: string }> => {
+  process: async (id: string): Promise<{ status: string; job_id: string; message: string }> => {
     const response = await api.post(`/cases/${id}/process`)
     return response.data
   },
@@ -38,6 +40,75 @@ export const casesApi = {
   },
 }
 
+export const jobsApi = {
+  get: async (id: string): Promise<Job> => {
+    const response = await api.get(`/jobs/${id}`)
+    return response.data
+  },
+
+  watch: (id: string, onEvent: (event: JobEvent) => void): Promise<Job> => {
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`/api/jobs/${id}/events`)
+      let finished = false
+      const finish = async () => {
+        if (finished) return
+        finished = true
+        source.close()
+        try {
+          resolve(await jobsApi.get(id))
+        } catch (e) {
+          reject(e)
+        }
+      }
+      source.addEventListener('error', () => finish())
+      const stages = [
+        'job_queued', 'processing_started', 'case_extracted', 'extraction_error',
+        'criteria_evaluated', 'recommendation_generated', 'letters_drafted',
+        'processing_completed', 'job_completed', 'job_failed'
+      ]
+      for (const stage of stages) {
+        source.addEventListener(stage, (message) => {
+          const event: JobEvent = JSON.parse((message as MessageEvent).data)
+          onEvent(event)
+          if (stage === 'job_completed' || stage === 'job_failed') {
+            finish()
+          }
+        })
+      }
+    })
+  },
+}
+
+export const lettersApi = {
+  stream: (caseId: string, onEvent: (event: LetterStreamEvent) => void): Promise<LetterStreamEvent> => {
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`/api/cases/${caseId}/letters/stream`)
+      let finished = false
+      const finish = (event: LetterStreamEvent | null) => {
+        if (finished) return
+        finished = true
+        source.close()
+        if (event) {
+          resolve(event)
+        } else {
+          reject(new Error('Letter stream closed unexpectedly'))
+        }
+      }
+      source.addEventListener('error', () => finish(null))
+      const stages = ['letters_started', 'letter_token', 'letters_completed', 'letters_failed']
+      for (const stage of stages) {
+        source.addEventListener(stage, (message) => {
+          const event: LetterStreamEvent = JSON.parse((message as MessageEvent).data)
+          onEvent(event)
+          if (stage === 'letters_completed' || stage === 'letters_failed') {
+            finish(event)
+          }
+        })
+      }
+    })
+  },
+}
+
 export const metricsApi = {
   get: async (): Promise<Metrics> => {
     const response = await api.get('/metrics')
@@ -1,21 +1,49 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
-import type { Case } from '@/types'
-import { casesApi } from '@/services/api'
+import type { Case, LetterStreamEvent } from '@/types'
+import { casesApi, jobsApi, lettersApi } from '@/services/api'
+
+const CASE_LIST_FIELDS: (keyof Case)[] = [
+  'id', 'title', 'drug_name', 'indication', 'status', 'complexity', 'ai_recommendation', 'final_decision',
+]
+const CASE_PAGE_SIZE = 50
 
 export const useCasesStore = defineStore('cases', () => {
   const cases = ref<Case[]>([])
+  const nextCursor = ref<string | null>(null)
   const currentCase = ref<Case | null>(null)
   const loading = ref(false)
   const error = ref<string | null>(null)
   const processing = ref(false)
   const processingStep = ref('')
+  const streamingLetters = ref(false)
 
   async function fetchCases() {
     loading.value = true
     error.value = null
     try {
-      cases.value = await casesApi.getAll()
+      const page = await casesApi.list({ limit: CASE_PAGE_SIZE, fields: CASE_LIST_FIELDS })
+      cases.value = page.cases
+      nextCursor.value = page.next_cursor
+    } catch (e) {
+      error.value = e instanceof Error ? e.message : 'Failed to fetch cases'
+    } finally {
+      loading.value = false
+    }
+  }
+
+  async function fetchMoreCases() {
+    if (!nextCursor.value) return
+    loading.value = true
+    error.value = null
+    try {
+      const page = await casesApi.list({
+        limit: CASE_PAGE_SIZE,
+        cursor: nextCursor.value,
+        fields: CASE_LIST_FIELDS,
+      })
+      cases.value = [...cases.value, ...page.cases]
+      nextCursor.value = page.next_cursor
     } catch (e) {
       error.value = e instanceof Error ? e.message : 'Failed to fetch cases'
     } finally {
@@ -39,32 +67,31 @@ export const useCasesStore = defineStore('cases', () => {
     processing.value = true
     error.value = null
     
-    const steps = [
-      'Extracting clinical data from PA request...',
-      'Analyzing biomarkers and disease stage...',
-      'Evaluating policy criteria...',
-      'Generating AI recommendation...',
-      'Drafting provider and member letters...',
-      'Finalizing case summary...'
-    ]
-    
-    let stepIndex = 0
-    processingStep.value = steps[stepIndex]
-    
-    const stepInterval = setInterval(() => {
-      if (stepIndex < steps.length - 1) {
-        stepIndex++
-        processingStep.value = steps[stepIndex]
-      }
-    }, 2000)
+    const stageLabels: Record<string, string> = {
+      job_queued: 'Waiting for an available worker...',
+      processing_started: 'Extracting clinical data from PA request...',
+      case_extracted: 'Evaluating policy criteria...',
+      criteria_evaluated: 'Generating AI recommendation...',
+      recommendation_generated: 'Drafting provider and member letters...',
+      letters_drafted: 'Finalizing case summary...',
+      processing_completed: 'Processing complete!',
+    }
+
+    processingStep.value = stageLabels.job_queued
 
     try {
-      await casesApi.process(id)
-      clearInterval(stepInterval)
+      const { job_id } = await casesApi.process(id)
+      const job = await jobsApi.watch(job_id, (event) => {
+        if (stageLabels[event.stage]) {
+          processingStep.value = stageLabels[event.stage]
+        }
+      })
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Failed to process case')
+      }
       processingStep.value = 'Processing complete!'
       await fetchCase(id)
     } catch (e) {
-      clearInterval(stepInterval)
       error.value = e instanceof Error ? e.message : 'Failed to process case'
     } finally {
       processing.value = false
@@ -72,6 +99,23 @@ export const useCasesStore = defineStore('cases', () => {
     }
   }
 
+  async function streamLetters(id: string, onEvent: (event: LetterStreamEvent) => void) {
+    streamingLetters.value = true
+    error.value = null
+    try {
+      const result = await lettersApi.stream(id, onEvent)
+      if (result.stage === 'letters_failed') {
+        throw new Error(result.details || 'Failed to draft letters')
+      }
+      return result
+    } catch (e) {
+      error.value = e instanceof Error ? e.message : 'Failed to draft letters'
+      return null
+    } finally {
+      streamingLetters.value = false
+    }
+  }
+
   async function submitDecision(
     id: string,
     data: {
@@ -97,14 +141,18 @@ export const useCasesStore = defineStore('cases', () => {
 
   return {
     cases,
+    nextCursor,
     currentCase,
     loading,
     error,
     processing,
     processingStep,
+    streamingLetters,
     fetchCases,
+    fetchMoreCases,
     fetchCase,
     processCase,
+    streamLetters,
     submitDecision,
   }
 })
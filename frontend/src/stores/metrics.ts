@@ -14,8 +14,12 @@ export const useMetricsStore = defineStore('metrics', () => {
     error.value = null
     try {
       metrics.value = await metricsApi.get()
-      const allCases = await casesApi.getAll()
-      decidedCases.value = allCases.filter(c => c.final_decision)
+      const page = await casesApi.list({
+        status: 'decided',
+        limit: 10,
+        fields: ['id', 'title', 'ai_recommendation', 'final_decision', 'complexity', 'decided_at'],
+      })
+      decidedCases.value = page.cases
     } catch (e) {
       error.value = e instanceof Error ? e.message : 'Failed to fetch metrics'
     } finally {
@@ -95,7 +95,7 @@ export interface Case {
   title: string
   raw_text: string
   policy_id: string
-  status: 'pending' | 'processed' | 'decided'
+  status: 'pending' | 'processing' | 'processed' | 'decided'
   extracted_data: ExtractedData | null
   criteria_evaluation: CriterionEvaluation[] | null
   ai_recommendation: AIRecommendation | null
@@ -115,9 +115,24 @@ export interface Case {
   policy_guidelines?: Guideline[]
 }
 
+export interface CaseListParams {
+  limit?: number
+  cursor?: string
+  status?: Case['status']
+  policy_id?: string
+  complexity?: 'low' | 'high'
+  fields?: (keyof Case)[]
+}
+
+export interface CasePage {
+  cases: Case[]
+  next_cursor: string | null
+}
+
 export interface Metrics {
   total_cases: number
   pending_cases: number
+  processing_cases: number
   processed_cases: number
   decided_cases: number
   avg_turnaround_minutes: number
@@ -128,3 +143,33 @@ export interface Metrics {
 export interface DemoModeStatus {
   demo_mode: boolean
 }
+
+export interface JobEvent {
+  stage: string
+  details: string
+  timestamp: string
+}
+
+export interface LetterStreamEvent {
+  stage: 'letters_started' | 'letter_token' | 'letters_completed' | 'letters_failed'
+  details?: string
+  letter?: 'provider' | 'member'
+  text?: string
+  ttft_ms?: number
+  fallback?: boolean
+  total_ms?: number
+  provider_letter?: string
+  member_letter?: string
+}
+
+export interface Job {
+  id: string
+  case_id: string
+  status: 'queued' | 'running' | 'completed' | 'failed'
+  stage: string | null
+  events: JobEvent[]
+  error: string | null
+  created_at: string
+  started_at: string | null
+  finished_at: string | null
+}
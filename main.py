@@ -1,19 +1,36 @@
 import os
+import json
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Optional, List, Dict, Any
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from pydantic import BaseModel, Field
 
 from src.models.database import (
-    init_db, get_all_cases, get_case, update_case, 
-    add_audit_log, get_metrics, get_policy
+    list_cases, get_case, get_metrics, rebuild_case_stats, get_policy, get_all_policies, close_db_connections,
+    case_unit_of_work, update_policy_model_routes, release_stale_claims
 )
 from src.data.seed_data import seed_database
-from src.services.openai_client import extract_case_data, generate_recommendation, draft_letters, is_demo_mode
-from src.services.policy_engine import evaluate_criteria, calculate_complexity, get_triage_summary
+from src.services.openai_client import is_demo_mode
+from src.services.llm_client import close_openai_clients
+from src.services.pipeline import run_pending_batch, CaseProcessingError
+from src.services.llm_cache import get_cache_stats, clear_cache
+from src.services.llm_usage import get_usage_stats
+from src.services.llm_scheduler import get_scheduler_stats
+from src.services.circuit_breaker import get_breaker_stats
+from src.services.model_router import normalize_routes, routes_for_policy
+from src.services.criteria_compiler import get_compiled_policy, describe_compiled_policy
+from src.services.bulk_reevaluation import reevaluate_policy_cases
+from src.services.letter_stream import stream_case_letters, get_letter_stream_stats
+from src.services.telemetry import observe_request, render_prometheus, PROMETHEUS_CONTENT_TYPE
+from src.services.job_queue import (
+    enqueue_case_job, get_job, stream_job_events, start_job_workers, stop_job_workers, JobQueueFull
+)
 
 app = FastAPI(title="PA Co-Pilot API", description="AI-Powered Prior Authorization Co-Pilot API")
 
@@ -25,20 +42,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not the raw path, so case ids don't each
+        # become a separate series. Streaming responses are timed to their headers.
+        route = request.scope.get('route')
+        observe_request(
+            request.method,
+            route.path if route is not None else 'unmatched',
+            status,
+            time.perf_counter() - started
+        )
+
+BATCH_MAX_CONCURRENCY = int(os.environ.get("PA_BATCH_MAX_CONCURRENCY", "16"))
+
 class DecisionRequest(BaseModel):
     final_decision: str
     decision_notes: str = ""
     provider_letter: str = ""
     member_letter: str = ""
 
+class BatchProcessRequest(BaseModel):
+    policy_id: Optional[str] = None
+    concurrency: int = Field(default=4, ge=1, le=BATCH_MAX_CONCURRENCY)
+    limit: Optional[int] = Field(default=None, ge=1)
+
+class PolicyReevaluationRequest(BaseModel):
+    criteria: Optional[List[Dict[str, Any]]] = None
+    limit: int = 500
+
+class ModelRoutesRequest(BaseModel):
+    model_routes: Optional[Dict[str, Any]] = None
+
 @app.on_event("startup")
 async def startup_event():
     seed_database()
+    release_stale_claims()
+    for policy in get_all_policies():
+        get_compiled_policy(policy)
+    await start_job_workers()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_job_workers()
+    await close_openai_clients()
+    close_db_connections()
 
 @app.get("/api/cases")
-async def get_cases():
-    cases = get_all_cases()
-    return cases
+async def get_cases(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    policy_id: Optional[str] = None,
+    complexity: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    try:
+        return list_cases(limit, cursor, status, policy_id, complexity, field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/cases/{case_id}")
 async def get_case_detail(case_id: str):
@@ -47,7 +117,11 @@ async def get_case_detail(case_id: str):
         raise HTTPException(status_code=404, detail="Case not found")
     return case
 
-@app.post("/api/cases/{case_id}/process")
+@app.post("/api/cases/process-pending")
+async def process_pending_cases(request: BatchProcessRequest):
+    return await run_pending_batch(request.policy_id, request.concurrency, request.limit)
+
+@app.post("/api/cases/{case_id}/process", status_code=202)
 async def process_case(case_id: str):
     case = get_case(case_id)
     if not case:
@@ -57,49 +131,58 @@ async def process_case(case_id: str):
     if not policy:
         raise HTTPException(status_code=404, detail="Policy not found")
     
-    add_audit_log(case_id, "processing_started", "AI processing initiated")
-    
-    extracted_data = extract_case_data(case['raw_text'])
-    
-    if 'error' in extracted_data:
-        add_audit_log(case_id, "extraction_error", extracted_data.get('error'))
-        raise HTTPException(status_code=500, detail=f"Extraction error: {extracted_data.get('error')}")
-    
-    add_audit_log(case_id, "case_extracted", "Clinical data extracted successfully")
+    try:
+        job = enqueue_case_job(case_id)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except CaseProcessingError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     
-    criteria_evaluation = evaluate_criteria(extracted_data, policy)
-    complexity = calculate_complexity(criteria_evaluation)
-    triage_summary = get_triage_summary(criteria_evaluation)
+    return {"status": "queued", "job_id": job['id'], "message": "Case processing queued"}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_progress(job_id: str):
+    if not get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    add_audit_log(case_id, "criteria_evaluated", f"Complexity: {complexity}")
+    async def event_stream():
+        async for event in stream_job_events(job_id):
+            yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
     
-    recommendation = generate_recommendation(
-        extracted_data,
-        policy,
-        criteria_evaluation,
-        policy.get('guidelines', [])
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
+
+@app.get("/api/cases/{case_id}/letters/stream")
+async def stream_letters(case_id: str):
+    case = get_case(case_id)
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    if not case.get('extracted_data') or not case.get('ai_recommendation'):
+        raise HTTPException(status_code=409, detail="Case must be processed before letters can be drafted")
     
-    add_audit_log(case_id, "recommendation_generated", f"AI suggests: {recommendation.get('recommendation', 'unknown')}")
-    
-    letters = draft_letters(extracted_data, policy, recommendation)
-    
-    add_audit_log(case_id, "letters_drafted", "Provider and member letters generated")
-    
-    update_case(case_id, {
-        'extracted_data': extracted_data,
-        'criteria_evaluation': criteria_evaluation,
-        'ai_recommendation': recommendation,
-        'provider_letter': letters.get('provider_letter', ''),
-        'member_letter': letters.get('member_letter', ''),
-        'complexity': complexity,
-        'status': 'processed',
-        'processed_at': datetime.now().isoformat()
-    })
+    policy = get_policy(case['policy_id'])
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
     
-    add_audit_log(case_id, "processing_completed", "Case ready for Medical Director review")
+    async def event_stream():
+        async for event in stream_case_letters(case, policy):
+            yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
     
-    return {"status": "success", "message": "Case processed successfully"}
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/api/cases/{case_id}/decide")
 async def submit_decision(case_id: str, request: DecisionRequest):
@@ -111,25 +194,89 @@ async def submit_decision(case_id: str, request: DecisionRequest):
     now = datetime.now()
     turnaround_minutes = int((now - created_at.replace(tzinfo=None)).total_seconds() / 60)
     
-    update_case(case_id, {
-        'final_decision': request.final_decision,
-        'final_decision_notes': request.decision_notes,
-        'provider_letter': request.provider_letter,
-        'member_letter': request.member_letter,
-        'status': 'decided',
-        'decided_at': now.isoformat(),
-        'turnaround_minutes': turnaround_minutes
-    })
-    
-    add_audit_log(case_id, "decision_finalized", f"Medical Director decision: {request.final_decision}")
+    with case_unit_of_work(case_id) as uow:
+        uow.update_case({
+            'final_decision': request.final_decision,
+            'final_decision_notes': request.decision_notes,
+            'provider_letter': request.provider_letter,
+            'member_letter': request.member_letter,
+            'status': 'decided',
+            'decided_at': now.isoformat(),
+            'turnaround_minutes': turnaround_minutes
+        })
+        uow.add_audit_log("decision_finalized", f"Medical Director decision: {request.final_decision}")
     
     return {"status": "success", "message": "Decision recorded successfully"}
 
 @app.get("/api/metrics")
 async def get_metrics_data():
     metrics = get_metrics()
+    metrics['letter_streaming'] = get_letter_stream_stats()
+    metrics['circuit_breakers'] = get_breaker_stats()
     return metrics
 
+@app.get("/api/policies/{policy_id}/criteria")
+async def get_policy_criteria(policy_id: str):
+    policy = get_policy(policy_id)
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    return describe_compiled_policy(get_compiled_policy(policy))
+
+@app.post("/api/policies/{policy_id}/reevaluate")
+async def reevaluate_policy(policy_id: str, request: PolicyReevaluationRequest):
+    policy = get_policy(policy_id)
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    if request.criteria is not None:
+        policy = {**policy, 'criteria': request.criteria}
+    return await run_in_threadpool(reevaluate_policy_cases, policy, request.limit)
+
+@app.get("/api/policies/{policy_id}/model-routes")
+async def get_policy_model_routes(policy_id: str):
+    policy = get_policy(policy_id)
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    return {
+        'policy_id': policy_id,
+        'overrides': policy.get('model_routes'),
+        'routes': routes_for_policy(policy)
+    }
+
+@app.put("/api/policies/{policy_id}/model-routes")
+async def set_policy_model_routes(policy_id: str, request: ModelRoutesRequest):
+    if not get_policy(policy_id):
+        raise HTTPException(status_code=404, detail="Policy not found")
+    try:
+        model_routes = normalize_routes(request.model_routes or {})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    update_policy_model_routes(policy_id, model_routes)
+    return await get_policy_model_routes(policy_id)
+
+@app.get("/api/llm-cache")
+async def get_llm_cache_stats():
+    return get_cache_stats()
+
+@app.delete("/api/llm-cache")
+async def clear_llm_cache():
+    clear_cache()
+    return {"status": "success", "message": "LLM response cache cleared"}
+
+@app.get("/api/llm-usage")
+async def get_llm_usage():
+    usage = get_usage_stats()
+    usage['scheduler'] = get_scheduler_stats()
+    return usage
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.post("/api/metrics/rebuild")
+async def rebuild_metrics():
+    rebuild_case_stats()
+    return await get_metrics_data()
+
 @app.get("/api/status")
 async def get_status():
     return {"demo_mode": is_demo_mode()}
@@ -0,0 +1,198 @@
+"""Generate a large synthetic dataset from the seed policies and cases.
+
+Each synthetic policy is a seed policy with its PD-L1 threshold, ECOG limit or
+optional criteria varied; each synthetic case is a seed case written for one of
+those policies with its stage, biomarkers, ECOG score and patient details
+mutated. Everything is written with one executemany per table in a single
+transaction, streaming cases from a generator.
+
+Run with `python -m src.data.synthetic_data [--cases N] [--policies N] [--seed N] [--database PATH]`.
+The dataset goes to its own database file (pa_copilot_synthetic.db by default),
+never the tracked demo database.
+"""
+import argparse
+import copy
+import os
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+from src.data.seed_data import POLICIES, CASES
+from src.models import database
+from src.models.database import init_db, bulk_load, get_metrics
+from src.services.case_extractor import extract_case_data_sections
+from src.services.openai_client import generate_recommendation_demo
+from src.services.policy_engine import (
+    evaluate_criteria, calculate_complexity, get_triage_summary, rule_based_outcome
+)
+
+SYNTHETIC_DATABASE_PATH = "pa_copilot_synthetic.db"
+
+FIRST_NAMES = (
+    "James", "Mary", "Robert", "Patricia", "Michael", "Linda", "William", "Elizabeth", "David", "Susan",
+    "Carlos", "Ana", "Wei", "Mei", "Ahmed", "Fatima", "Raj", "Priya", "Kwame", "Amara"
+)
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Martinez", "Lopez",
+    "Chen", "Wang", "Khan", "Ali", "Patel", "Shah", "Mensah", "Okafor", "Nguyen", "Kim"
+)
+
+# (value, weight) choices for each mutated field.
+STAGES = (("IV", 80), ("III", 15), ("II", 5))
+ECOG_SCORES = (("0", 30), ("1", 40), ("2", 20), ("3", 10))
+EGFR_RESULTS = (
+    ("Wild type (No mutations detected)", 70), ("Exon 19 deletion DETECTED", 12),
+    ("Exon 21 L858R mutation DETECTED", 8), ("Not tested", 10)
+)
+ALK_RESULTS = (("Negative (No rearrangement)", 85), ("Positive (EML4-ALK fusion)", 5), ("Not tested", 10))
+BRAF_RESULTS = (("Negative (Wild type)", 55), ("Positive (V600E mutation detected)", 45))
+PD_L1_THRESHOLDS = (1, 10, 50)
+ECOG_LIMITS = (1, 2)
+
+# Share of generated cases in each status; processed and decided cases carry
+# extracted data and criteria evaluations so bulk re-evaluation has work to do.
+STATUS_SHARES = (("pending", 50), ("processed", 30), ("decided", 20))
+CREATED_WITHIN_DAYS = 365
+
+PATIENT_LINE = re.compile(r'Patient: [^\n]+')
+MEMBER_ID_LINE = re.compile(r'Member ID: [^\n]+')
+STAGE_LINE = re.compile(r'(Disease Stage: Stage )(IV|III|II|I)\b')
+PD_L1_TPS = re.compile(r'(PD-L1 TPS: )\d+%[^\n]*')
+ECOG_SCORE = re.compile(r'(ECOG )\d')
+EGFR_LINE = re.compile(r'(- EGFR: )[^\n]+')
+ALK_LINE = re.compile(r'(- ALK: )[^\n]+')
+BRAF_LINE = re.compile(r'(- BRAF V600E: )[^\n]+')
+PD_L1_CRITERION_THRESHOLD = re.compile(r'>= \d+%')
+ECOG_CRITERION_RANGE = re.compile(r'ECOG Performance Status 0-\d')
+
+
+def _pick(rng: random.Random, choices) -> str:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def generate_policies(count: int, rng: random.Random) -> List[Dict]:
+    policies = []
+    for index in range(count):
+        template = POLICIES[index % len(POLICIES)]
+        policy = copy.deepcopy(template)
+        policy['id'] = f"POL-SYN-{index + 1:04d}"
+        policy['template_id'] = template['id']
+        policy['drug_name'] = f"{template['drug_name']} - Plan {index + 1:04d}"
+        threshold = rng.choice(PD_L1_THRESHOLDS)
+        ecog_limit = rng.choice(ECOG_LIMITS)
+        for criterion in policy['criteria']:
+            criterion['description'] = PD_L1_CRITERION_THRESHOLD.sub(f">= {threshold}%", criterion['description'])
+            criterion['description'] = ECOG_CRITERION_RANGE.sub(f"ECOG Performance Status 0-{ecog_limit}", criterion['description'])
+            if criterion['type'] == 'prior_therapy':
+                criterion['required'] = rng.random() < 0.3
+        policies.append(policy)
+    return policies
+
+
+def mutate_case_text(raw_text: str, rng: random.Random) -> str:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    dob = f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(1935, 1990)}"
+    text = PATIENT_LINE.sub(f"Patient: {name} (DOB: {dob})", raw_text, count=1)
+    text = MEMBER_ID_LINE.sub(f"Member ID: MEM-{rng.randint(0, 999999999):09d}", text, count=1)
+    text = STAGE_LINE.sub(lambda m: m.group(1) + _pick(rng, STAGES), text, count=1)
+    tps = rng.choice((0, 1, 5, 15, 30, 45, 50, 60, 75, 90))
+    text = PD_L1_TPS.sub(lambda m: f"{m.group(1)}{tps}% ({'High' if tps >= 50 else 'Low'} Expression)", text, count=1)
+    text = ECOG_SCORE.sub(lambda m: m.group(1) + _pick(rng, ECOG_SCORES), text, count=1)
+    text = EGFR_LINE.sub(lambda m: m.group(1) + _pick(rng, EGFR_RESULTS), text, count=1)
+    text = ALK_LINE.sub(lambda m: m.group(1) + _pick(rng, ALK_RESULTS), text, count=1)
+    text = BRAF_LINE.sub(lambda m: m.group(1) + _pick(rng, BRAF_RESULTS), text, count=1)
+    return text
+
+
+def _processed_fields(raw_text: str, policy: Dict, processed_at: datetime) -> Dict:
+    extracted_data = extract_case_data_sections(raw_text)
+    extracted_data.pop('_demo_mode', None)
+    criteria_evaluation = evaluate_criteria(extracted_data, policy)
+    recommendation = generate_recommendation_demo(extracted_data, policy, criteria_evaluation)
+    recommendation.pop('_demo_mode', None)
+    return {
+        'extracted_data': extracted_data,
+        'criteria_evaluation': criteria_evaluation,
+        'ai_recommendation': recommendation,
+        'complexity': calculate_complexity(criteria_evaluation),
+        'recommendation_path': 'rules' if rule_based_outcome(get_triage_summary(criteria_evaluation)) else 'llm',
+        'processed_at': processed_at.isoformat()
+    }
+
+
+def generate_cases(count: int, policies: List[Dict], rng: random.Random, now: datetime = None) -> Iterator[Dict]:
+    """Yield synthetic cases spread across `policies`, each based on a seed case for the policy's drug."""
+    # Stored timestamps are naive UTC, like CURRENT_TIMESTAMP.
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    templates = {
+        policy['template_id']: [case for case in CASES if case['policy_id'] == policy['template_id']]
+        for policy in policies
+    }
+    for index in range(count):
+        policy = policies[index % len(policies)]
+        template = rng.choice(templates[policy['template_id']])
+        raw_text = mutate_case_text(template['raw_text'], rng)
+        created_at = now - timedelta(seconds=rng.randint(0, CREATED_WITHIN_DAYS * 24 * 3600))
+        case = {
+            'id': f"SYN-{index + 1:07d}",
+            'title': f"{template['title']} (synthetic)",
+            'raw_text': raw_text,
+            'policy_id': policy['id'],
+            'status': _pick(rng, STATUS_SHARES),
+            'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if case['status'] != 'pending':
+            case.update(_processed_fields(raw_text, policy, created_at + timedelta(minutes=rng.randint(1, 30))))
+        if case['status'] == 'decided':
+            turnaround = rng.randint(5, 60 * 48)
+            recommended = case['ai_recommendation']['recommendation']
+            case.update({
+                'final_decision': recommended if rng.random() < 0.9 else rng.choice(('approve', 'deny', 'pend')),
+                'decided_at': (created_at + timedelta(minutes=turnaround)).isoformat(),
+                'turnaround_minutes': turnaround
+            })
+        yield case
+
+
+def use_database(path: str):
+    """Point the database module at `path`; refuses the demo database checked into the repo."""
+    if os.path.abspath(path) == os.path.abspath(database.DEMO_DATABASE_PATH):
+        raise ValueError(f"Refusing to load synthetic data into {database.DEMO_DATABASE_PATH}; pass another --database")
+    database.DATABASE_PATH = path
+
+
+def load_synthetic_dataset(case_count: int = 100_000, policy_count: int = 50, seed: int = 42) -> Dict:
+    rng = random.Random(seed)
+    init_db()
+    policies = generate_policies(policy_count, rng)
+    started = time.perf_counter()
+    loaded = bulk_load(
+        [{k: v for k, v in policy.items() if k != 'template_id'} for policy in policies],
+        generate_cases(case_count, policies, rng)
+    )
+    return {
+        'policies': len(policies),
+        'cases': loaded,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=100_000)
+    parser.add_argument('--policies', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42, help="same seed, same dataset")
+    parser.add_argument('--database', default=SYNTHETIC_DATABASE_PATH, help="SQLite file to load into")
+    args = parser.parse_args()
+
+    try:
+        use_database(args.database)
+    except ValueError as e:
+        parser.error(str(e))
+
+    result = load_synthetic_dataset(args.cases, args.policies, args.seed)
+    print(f"Loaded {result['cases']} cases across {result['policies']} policies into {args.database} in {result['seconds']}s")
+    print(get_metrics())
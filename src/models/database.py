@@ -1,72 +1,134 @@
+import os
+import base64
 import sqlite3
 import json
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple
 from contextlib import contextmanager
 
-DATABASE_PATH = "pa_copilot.db"
+from src.models.migrations import run_migrations, CASE_STATS_REBUILD
+from src.services.telemetry import timed_db_call
+
+DEMO_DATABASE_PATH = "pa_copilot.db"
+DATABASE_PATH = os.environ.get("PA_DATABASE_PATH", DEMO_DATABASE_PATH)
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("PA_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("PA_SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.environ.get("PA_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# A 'processing' case whose claim is older than this is assumed abandoned.
+CASE_CLAIM_TIMEOUT_SECONDS = int(os.environ.get("PA_CASE_CLAIM_TIMEOUT_SECONDS", "900"))
+
+_local = threading.local()
+_open_connections: "weakref.WeakSet" = weakref.WeakSet()
+_open_connections_lock = threading.Lock()
+_pool_generation = 0
+_policy_change_listeners: List[Callable[[Optional[str]], None]] = []
+_policy_cache: Dict[str, Optional[Dict]] = {}
+_policy_cache_version: Optional[int] = None
+_policy_cache_lock = threading.Lock()
+
+class _PooledConnection(sqlite3.Connection):
+    pass
+
+def _connect() -> sqlite3.Connection:
+    # Each connection is only ever used by the thread that opened it; the
+    # same-thread check is disabled so close_db_connections() can close them.
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        factory=_PooledConnection
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # INSERT OR REPLACE only fires the case_stats delete trigger with this on.
+    conn.execute("PRAGMA recursive_triggers=ON")
+    with _open_connections_lock:
+        _open_connections.add(conn)
+    return conn
+
+def _thread_connection() -> sqlite3.Connection:
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != DATABASE_PATH or _local.generation != _pool_generation:
+        if conn is not None and _local.generation == _pool_generation:
+            conn.close()
+        conn = _connect()
+        _local.conn = conn
+        _local.path = DATABASE_PATH
+        _local.generation = _pool_generation
+        _local.depth = 0
+    return conn
 
 @contextmanager
 def get_db():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = _thread_connection()
+    _local.depth += 1
     try:
         yield conn
     finally:
+        _local.depth -= 1
+        if _local.depth == 0 and conn.in_transaction:
+            conn.rollback()
+
+def close_db_connections():
+    global _pool_generation
+    with _open_connections_lock:
+        _pool_generation += 1
+        connections = list(_open_connections)
+        _open_connections.clear()
+    for conn in connections:
         conn.close()
 
+def on_policy_change(listener: Callable[[Optional[str]], None]):
+    _policy_change_listeners.append(listener)
+
+@timed_db_call
 def init_db():
     with get_db() as conn:
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS policies (
-                id TEXT PRIMARY KEY,
-                drug_name TEXT NOT NULL,
-                indication TEXT NOT NULL,
-                description TEXT,
-                criteria TEXT NOT NULL,
-                guidelines TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cases (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                raw_text TEXT NOT NULL,
-                policy_id TEXT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                extracted_data TEXT,
-                criteria_evaluation TEXT,
-                ai_recommendation TEXT,
-                provider_letter TEXT,
-                member_letter TEXT,
-                final_decision TEXT,
-                final_decision_notes TEXT,
-                complexity TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                processed_at TIMESTAMP,
-                decided_at TIMESTAMP,
-                turnaround_minutes INTEGER,
-                FOREIGN KEY (policy_id) REFERENCES policies(id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                case_id TEXT NOT NULL,
-                action TEXT NOT NULL,
-                details TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (case_id) REFERENCES cases(id)
-            )
-        ''')
-        
-        conn.commit()
+        run_migrations(conn)
+
+def _decode_policy(row: sqlite3.Row) -> Dict:
+    policy = dict(row)
+    policy['criteria'] = json.loads(policy['criteria'])
+    policy['guidelines'] = json.loads(policy['guidelines'])
+    policy['model_routes'] = json.loads(policy['model_routes']) if policy.get('model_routes') else None
+    return policy
+
+def _notify_policy_change(policy_id: Optional[str]):
+    for listener in _policy_change_listeners:
+        listener(policy_id)
+
+def _sync_policy_cache(conn: sqlite3.Connection):
+    global _policy_cache_version
+    # data_version only moves when another connection commits, so the
+    # policies_version row is re-read only after a foreign write.
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if getattr(_local, 'data_version', None) != data_version:
+        row = conn.execute("SELECT value FROM schema_meta WHERE key = 'policies_version'").fetchone()
+        _local.policies_version = row[0] if row else 0
+        _local.data_version = data_version
+    if _local.policies_version != _policy_cache_version:
+        with _policy_cache_lock:
+            _policy_cache.clear()
+            _policy_cache_version = _local.policies_version
+        _notify_policy_change(None)
 
+def invalidate_policy_cache(policy_id: Optional[str] = None):
+    with _policy_cache_lock:
+        if policy_id is None:
+            _policy_cache.clear()
+        else:
+            _policy_cache.pop(policy_id, None)
+    _local.data_version = None
+
+@timed_db_call
 def get_all_policies() -> List[Dict]:
     with get_db() as conn:
         cursor = conn.cursor()
@@ -74,84 +136,267 @@ def get_all_policies() -> List[Dict]:
         rows = cursor.fetchall()
         policies = []
         for row in rows:
-            policy = dict(row)
-            policy['criteria'] = json.loads(policy['criteria'])
-            policy['guidelines'] = json.loads(policy['guidelines'])
-            policies.append(policy)
+            policies.append(_decode_policy(row))
         return policies
 
+@timed_db_call
 def get_policy(policy_id: str) -> Optional[Dict]:
+    # Cached policies are shared between callers; only the top-level dict is
+    # copied, so treat criteria and guidelines as read-only.
     with get_db() as conn:
+        _sync_policy_cache(conn)
+        if policy_id in _policy_cache:
+            policy = _policy_cache[policy_id]
+            return dict(policy) if policy else None
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM policies WHERE id = ?", (policy_id,))
         row = cursor.fetchone()
-        if row:
-            policy = dict(row)
-            policy['criteria'] = json.loads(policy['criteria'])
-            policy['guidelines'] = json.loads(policy['guidelines'])
-            return policy
-        return None
+        policy = _decode_policy(row) if row else None
+        with _policy_cache_lock:
+            _policy_cache[policy_id] = policy
+        return dict(policy) if policy else None
 
+@timed_db_call
 def insert_policy(policy: Dict):
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT OR REPLACE INTO policies (id, drug_name, indication, description, criteria, guidelines)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT OR REPLACE INTO policies (id, drug_name, indication, description, criteria, guidelines, model_routes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (
             policy['id'],
             policy['drug_name'],
             policy['indication'],
             policy.get('description', ''),
             json.dumps(policy['criteria']),
-            json.dumps(policy['guidelines'])
+            json.dumps(policy['guidelines']),
+            json.dumps(policy['model_routes']) if policy.get('model_routes') else None
         ))
         conn.commit()
+    invalidate_policy_cache(policy['id'])
+    _notify_policy_change(policy['id'])
 
-def get_all_cases() -> List[Dict]:
+@timed_db_call
+def update_policy_model_routes(policy_id: str, model_routes: Optional[Dict]):
+    with get_db() as conn:
+        conn.execute(
+            "UPDATE policies SET model_routes = ? WHERE id = ?",
+            (json.dumps(model_routes) if model_routes else None, policy_id)
+        )
+        conn.commit()
+    invalidate_policy_cache(policy_id)
+    _notify_policy_change(policy_id)
+
+CASE_COLUMNS = (
+    'id', 'title', 'raw_text', 'policy_id', 'status', 'extracted_data', 'criteria_evaluation',
+    'ai_recommendation', 'provider_letter', 'member_letter', 'final_decision', 'final_decision_notes',
+    'complexity', 'created_at', 'processed_at', 'decided_at', 'turnaround_minutes', 'recommendation_path',
+    'fallback_stages'
+)
+CASE_POLICY_COLUMNS = ('drug_name', 'indication')
+CASE_JSON_COLUMNS = ('extracted_data', 'criteria_evaluation', 'ai_recommendation')
+CASE_LIST_MAX_LIMIT = 500
+
+# Walks a policy's cases in idx_cases_policy_created order rather than sorting them.
+POLICY_CASE_EVALUATIONS_SQL = '''
+    SELECT id, extracted_data, criteria_evaluation FROM cases
+    WHERE policy_id = ? AND extracted_data IS NOT NULL
+    ORDER BY created_at, id
+'''
+CASE_AUDIT_LOGS_SQL = "SELECT * FROM audit_logs WHERE case_id = ? ORDER BY timestamp DESC"
+
+def encode_case_cursor(created_at: str, case_id: str) -> str:
+    payload = json.dumps([created_at, case_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_case_cursor(cursor_token: str) -> tuple:
+    try:
+        created_at, case_id = json.loads(base64.urlsafe_b64decode(cursor_token.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(case_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, case_id
+
+def build_case_list_query(
+    limit: int = 50,
+    cursor_token: Optional[str] = None,
+    status: Optional[str] = None,
+    policy_id: Optional[str] = None,
+    complexity: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Tuple[str, List[Any], List[str]]:
+    """Return the SQL, parameters and selected fields for one page of list_cases."""
+    if fields:
+        unknown = [f for f in fields if f not in CASE_COLUMNS and f not in CASE_POLICY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        selected = ['id', 'created_at'] + [f for f in dict.fromkeys(fields) if f not in ('id', 'created_at')]
+    else:
+        selected = list(CASE_COLUMNS) + list(CASE_POLICY_COLUMNS)
+    limit = max(1, min(limit, CASE_LIST_MAX_LIMIT))
+
+    columns = [f"p.{f}" if f in CASE_POLICY_COLUMNS else f"c.{f}" for f in selected]
+    query = f"SELECT {', '.join(columns)} FROM cases c"
+    if any(f in CASE_POLICY_COLUMNS for f in selected):
+        query += " LEFT JOIN policies p ON c.policy_id = p.id"
+
+    conditions = []
+    params: List[Any] = []
+    for column, value in (('status', status), ('policy_id', policy_id), ('complexity', complexity)):
+        if value:
+            conditions.append(f"c.{column} = ?")
+            params.append(value)
+    if cursor_token:
+        created_at, case_id = decode_case_cursor(cursor_token)
+        # The row-value form lets SQLite seek into idx_cases_created; the
+        # equivalent OR expansion makes every page scan the index from its head.
+        conditions.append("(c.created_at, c.id) < (?, ?)")
+        params.extend([created_at, case_id])
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY c.created_at DESC, c.id DESC LIMIT ?"
+    params.append(limit + 1)
+    return query, params, selected
+
+@timed_db_call
+def list_cases(
+    limit: int = 50,
+    cursor_token: Optional[str] = None,
+    status: Optional[str] = None,
+    policy_id: Optional[str] = None,
+    complexity: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Dict:
+    query, params, selected = build_case_list_query(limit, cursor_token, status, policy_id, complexity, fields)
+    limit = max(1, min(limit, CASE_LIST_MAX_LIMIT))
+
+    json_fields = [f for f in CASE_JSON_COLUMNS if f in selected]
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT c.*, p.drug_name, p.indication 
-            FROM cases c 
-            LEFT JOIN policies p ON c.policy_id = p.id 
-            ORDER BY c.created_at DESC
-        ''')
+        cursor.execute(query, params)
         rows = cursor.fetchall()
-        cases = []
-        for row in rows:
-            case = dict(row)
-            for field in ['extracted_data', 'criteria_evaluation', 'ai_recommendation']:
-                if case.get(field):
-                    try:
-                        case[field] = json.loads(case[field])
-                    except:
-                        pass
-            cases.append(case)
-        return cases
 
+    cases = []
+    for row in rows[:limit]:
+        case = dict(row)
+        for field in json_fields:
+            if case.get(field):
+                try:
+                    case[field] = json.loads(case[field])
+                except json.JSONDecodeError:
+                    pass
+        cases.append(case)
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = cases[-1]
+        next_cursor = encode_case_cursor(last['created_at'], last['id'])
+    return {'cases': cases, 'next_cursor': next_cursor}
+
+def _utc_timestamp(moment: datetime) -> str:
+    # Same format as CURRENT_TIMESTAMP, so stored timestamps compare as strings.
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+def _stale_claim_cutoff() -> str:
+    return _utc_timestamp(datetime.now(timezone.utc) - timedelta(seconds=CASE_CLAIM_TIMEOUT_SECONDS))
+
+@timed_db_call
+def claim_pending_case(case_id: str) -> bool:
+    """Move a pending case to 'processing'; False if it was not pending (e.g. another worker claimed it).
+
+    A 'processing' claim older than CASE_CLAIM_TIMEOUT_SECONDS is taken over.
+    """
+    with get_db() as conn:
+        cursor = conn.execute('''
+            UPDATE cases SET status = 'processing', claimed_at = ?
+            WHERE id = ? AND (status = 'pending' OR (status = 'processing' AND (claimed_at IS NULL OR claimed_at < ?)))
+        ''', (_utc_timestamp(datetime.now(timezone.utc)), case_id, _stale_claim_cutoff()))
+        conn.commit()
+        return cursor.rowcount == 1
+
+@timed_db_call
+def release_case_claim(case_id: str):
+    with get_db() as conn:
+        conn.execute(
+            "UPDATE cases SET status = 'pending', claimed_at = NULL WHERE id = ? AND status = 'processing'", (case_id,)
+        )
+        conn.commit()
+
+@timed_db_call
+def release_stale_claims() -> int:
+    """Hand cases left in 'processing' by a worker that died back to the pending queue."""
+    with get_db() as conn:
+        cursor = conn.execute('''
+            UPDATE cases SET status = 'pending', claimed_at = NULL
+            WHERE status = 'processing' AND (claimed_at IS NULL OR claimed_at < ?)
+        ''', (_stale_claim_cutoff(),))
+        conn.commit()
+        return cursor.rowcount
+
+def build_pending_case_ids_query(policy_id: Optional[str] = None, limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+    query = "SELECT id FROM cases WHERE status = 'pending'"
+    params: List[Any] = []
+    if policy_id:
+        query += " AND policy_id = ?"
+        params.append(policy_id)
+    query += " ORDER BY created_at, id"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+@timed_db_call
+def get_pending_case_ids(policy_id: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+    query, params = build_pending_case_ids_query(policy_id, limit)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return [row['id'] for row in cursor.fetchall()]
+
+@timed_db_call
+def get_policy_case_evaluations(policy_id: str) -> List[Dict]:
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(POLICY_CASE_EVALUATIONS_SQL, (policy_id,))
+        rows = []
+        for row in cursor.fetchall():
+            try:
+                extracted_data = json.loads(row['extracted_data'])
+                criteria_evaluation = json.loads(row['criteria_evaluation']) if row['criteria_evaluation'] else []
+            except json.JSONDecodeError:
+                continue
+            rows.append({
+                'id': row['id'],
+                'extracted_data': extracted_data,
+                'criteria_evaluation': criteria_evaluation
+            })
+        return rows
+
+@timed_db_call
 def get_case(case_id: str) -> Optional[Dict]:
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT c.*, p.drug_name, p.indication, p.description as policy_description,
-                   p.criteria as policy_criteria, p.guidelines as policy_guidelines
-            FROM cases c 
-            LEFT JOIN policies p ON c.policy_id = p.id 
-            WHERE c.id = ?
-        ''', (case_id,))
+        cursor.execute("SELECT * FROM cases WHERE id = ?", (case_id,))
         row = cursor.fetchone()
         if row:
             case = dict(row)
-            for field in ['extracted_data', 'criteria_evaluation', 'ai_recommendation', 'policy_criteria', 'policy_guidelines']:
+            for field in CASE_JSON_COLUMNS:
                 if case.get(field):
                     try:
                         case[field] = json.loads(case[field])
                     except:
                         pass
+            policy = get_policy(case['policy_id']) or {}
+            case['drug_name'] = policy.get('drug_name')
+            case['indication'] = policy.get('indication')
+            case['policy_description'] = policy.get('description')
+            case['policy_criteria'] = policy.get('criteria')
+            case['policy_guidelines'] = policy.get('guidelines')
             return case
         return None
 
+@timed_db_call
 def insert_case(case: Dict):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -167,71 +412,257 @@ def insert_case(case: Dict):
         ))
         conn.commit()
 
+def _case_row(case: Dict, defaults: Dict) -> tuple:
+    values = []
+    for column in CASE_COLUMNS:
+        value = case.get(column, defaults.get(column))
+        values.append(json.dumps(value) if isinstance(value, (dict, list)) else value)
+    return tuple(values)
+
+@timed_db_call
+def bulk_load(policies: List[Dict], cases: Iterable[Dict]) -> int:
+    """Insert policies and cases with executemany in a single transaction.
+
+    `cases` may be a generator, so large synthetic datasets are streamed into
+    SQLite rather than held in memory. Returns the number of cases written.
+    """
+    defaults = {'status': 'pending', 'created_at': _utc_timestamp(datetime.now(timezone.utc))}
+    counter = {'cases': 0}
+
+    def case_rows():
+        for case in cases:
+            counter['cases'] += 1
+            yield _case_row(case, defaults)
+
+    with get_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany('''
+            INSERT OR REPLACE INTO policies (id, drug_name, indication, description, criteria, guidelines, model_routes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(
+            policy['id'],
+            policy['drug_name'],
+            policy['indication'],
+            policy.get('description', ''),
+            json.dumps(policy['criteria']),
+            json.dumps(policy['guidelines']),
+            json.dumps(policy['model_routes']) if policy.get('model_routes') else None
+        ) for policy in policies])
+        conn.executemany(
+            f"INSERT OR REPLACE INTO cases ({', '.join(CASE_COLUMNS)}) VALUES ({', '.join('?' * len(CASE_COLUMNS))})",
+            case_rows()
+        )
+        conn.commit()
+    if policies:
+        invalidate_policy_cache()
+        _notify_policy_change(None)
+    return counter['cases']
+
+def _execute_case_update(cursor: sqlite3.Cursor, case_id: str, updates: Dict):
+    set_clauses = []
+    values = []
+    for key, value in updates.items():
+        set_clauses.append(f"{key} = ?")
+        if isinstance(value, (dict, list)):
+            values.append(json.dumps(value))
+        else:
+            values.append(value)
+    values.append(case_id)
+    
+    query = f"UPDATE cases SET {', '.join(set_clauses)} WHERE id = ?"
+    cursor.execute(query, values)
+
+@timed_db_call
 def update_case(case_id: str, updates: Dict):
     with get_db() as conn:
         cursor = conn.cursor()
-        set_clauses = []
-        values = []
-        for key, value in updates.items():
-            set_clauses.append(f"{key} = ?")
-            if isinstance(value, (dict, list)):
-                values.append(json.dumps(value))
-            else:
-                values.append(value)
-        values.append(case_id)
-        
-        query = f"UPDATE cases SET {', '.join(set_clauses)} WHERE id = ?"
-        cursor.execute(query, values)
+        _execute_case_update(cursor, case_id, updates)
         conn.commit()
 
-def add_audit_log(case_id: str, action: str, details: Optional[str] = None):
+@timed_db_call
+def add_audit_log(case_id: str, action: str, details: Optional[str] = None, duration_ms: Optional[float] = None):
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT INTO audit_logs (case_id, action, details)
-            VALUES (?, ?, ?)
-        ''', (case_id, action, details))
+            INSERT INTO audit_logs (case_id, action, details, duration_ms)
+            VALUES (?, ?, ?, ?)
+        ''', (case_id, action, details, duration_ms))
         conn.commit()
 
+class CaseUnitOfWork:
+    def __init__(self, case_id: str):
+        self.case_id = case_id
+        self.audit_entries: List[tuple] = []
+        self.case_updates: Dict[str, Any] = {}
+
+    def add_audit_log(self, action: str, details: Optional[str] = None, duration_ms: Optional[float] = None):
+        # Stamp entries when they happen, not when the batch is flushed, so the
+        # trail keeps its per-stage timing. Same format as CURRENT_TIMESTAMP.
+        timestamp = _utc_timestamp(datetime.now(timezone.utc))
+        self.audit_entries.append((self.case_id, action, details, timestamp, duration_ms))
+
+    def update_case(self, updates: Dict):
+        self.case_updates.update(updates)
+
+    def commit(self):
+        if not self.audit_entries and not self.case_updates:
+            return
+        self._write()
+        self.audit_entries = []
+        self.case_updates = {}
+
+    @timed_db_call(name='case_unit_of_work_commit')
+    def _write(self):
+        with get_db() as conn:
+            cursor = conn.cursor()
+            if self.case_updates:
+                _execute_case_update(cursor, self.case_id, self.case_updates)
+            cursor.executemany('''
+                INSERT INTO audit_logs (case_id, action, details, timestamp, duration_ms)
+                VALUES (?, ?, ?, ?, ?)
+            ''', self.audit_entries)
+            conn.commit()
+
+    def discard(self):
+        self.audit_entries = []
+        self.case_updates = {}
+
+@contextmanager
+def case_unit_of_work(case_id: str):
+    uow = CaseUnitOfWork(case_id)
+    try:
+        yield uow
+    except BaseException:
+        uow.discard()
+        raise
+    uow.commit()
+
+@timed_db_call
 def get_case_audit_logs(case_id: str) -> List[Dict]:
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM audit_logs WHERE case_id = ? ORDER BY timestamp DESC
-        ''', (case_id,))
+        cursor.execute(CASE_AUDIT_LOGS_SQL, (case_id,))
         return [dict(row) for row in cursor.fetchall()]
 
-def get_metrics() -> Dict:
+@timed_db_call
+def get_llm_cache_entry(cache_key: str, now: float) -> Optional[Dict]:
     with get_db() as conn:
         cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM cases")
-        total_cases = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM cases WHERE status = 'pending'")
-        pending_cases = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM cases WHERE status = 'processed'")
-        processed_cases = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM cases WHERE status = 'decided'")
-        decided_cases = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT AVG(turnaround_minutes) FROM cases WHERE turnaround_minutes IS NOT NULL")
-        avg_turnaround = cursor.fetchone()[0] or 0
-        
-        cursor.execute("SELECT final_decision, COUNT(*) FROM cases WHERE final_decision IS NOT NULL GROUP BY final_decision")
-        decisions = dict(cursor.fetchall())
-        
-        cursor.execute("SELECT complexity, COUNT(*) FROM cases WHERE complexity IS NOT NULL GROUP BY complexity")
-        complexity_dist = dict(cursor.fetchall())
-        
+        cursor.execute("SELECT * FROM llm_cache WHERE cache_key = ?", (cache_key,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        if row['expires_at'] <= now:
+            cursor.execute("DELETE FROM llm_cache WHERE cache_key = ?", (cache_key,))
+            conn.commit()
+            return None
+        cursor.execute(
+            "UPDATE llm_cache SET hit_count = hit_count + 1, last_accessed_at = ? WHERE cache_key = ?",
+            (now, cache_key)
+        )
+        conn.commit()
+        entry = dict(row)
+        entry['response'] = json.loads(entry['response'])
+        return entry
+
+@timed_db_call
+def put_llm_cache_entry(cache_key: str, stage: str, model: str, response: Dict, now: float, ttl_seconds: float, max_entries: int):
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO llm_cache (cache_key, stage, model, response, hit_count, created_at, last_accessed_at, expires_at)
+            VALUES (?, ?, ?, ?, 0, ?, ?, ?)
+        ''', (cache_key, stage, model, json.dumps(response), now, now, now + ttl_seconds))
+        cursor.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        cursor.execute('''
+            DELETE FROM llm_cache WHERE cache_key IN (
+                SELECT cache_key FROM llm_cache ORDER BY last_accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (max_entries,))
+        conn.commit()
+
+@timed_db_call
+def get_llm_cache_summary() -> Dict:
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT stage, COUNT(*), COALESCE(SUM(hit_count), 0) FROM llm_cache GROUP BY stage")
+        by_stage = {row[0]: {'entries': row[1], 'hits': row[2]} for row in cursor.fetchall()}
         return {
-            'total_cases': total_cases,
-            'pending_cases': pending_cases,
-            'processed_cases': processed_cases,
-            'decided_cases': decided_cases,
-            'avg_turnaround_minutes': round(avg_turnaround, 1),
-            'decisions': decisions,
-            'complexity_distribution': complexity_dist
+            'entries': sum(s['entries'] for s in by_stage.values()),
+            'by_stage': by_stage
         }
+
+@timed_db_call
+def clear_llm_cache():
+    with get_db() as conn:
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+
+@timed_db_call
+def add_llm_usage(stage: str, model: str, prompt_chars: int, prompt_tokens: Optional[int],
+                  completion_tokens: Optional[int], cached_tokens: Optional[int], now: float,
+                  complexity: Optional[str] = None, latency_ms: Optional[float] = None):
+    with get_db() as conn:
+        conn.execute('''
+            INSERT INTO llm_usage (
+                stage, model, prompt_chars, prompt_tokens, completion_tokens, cached_tokens, created_at,
+                complexity, latency_ms
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (stage, model, prompt_chars, prompt_tokens, completion_tokens, cached_tokens, now, complexity, latency_ms))
+        conn.commit()
+
+@timed_db_call
+def get_llm_usage_summary() -> List[Dict]:
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT stage, model, complexity, COUNT(*) AS calls,
+                   AVG(prompt_chars) AS avg_prompt_chars,
+                   AVG(prompt_tokens) AS avg_prompt_tokens,
+                   AVG(completion_tokens) AS avg_completion_tokens,
+                   COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+                   COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+                   COALESCE(SUM(cached_tokens), 0) AS cached_tokens,
+                   AVG(latency_ms) AS avg_latency_ms,
+                   MAX(latency_ms) AS max_latency_ms
+            FROM llm_usage GROUP BY stage, model, complexity ORDER BY stage, model, complexity
+        ''')
+        return [dict(row) for row in cursor.fetchall()]
+
+@timed_db_call
+def get_metrics() -> Dict:
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT dimension, bucket, value FROM case_stats")
+        stats: Dict[str, Dict[str, float]] = {}
+        for dimension, bucket, value in cursor.fetchall():
+            stats.setdefault(dimension, {})[bucket] = value
+    
+    status_counts = stats.get('status', {})
+    turnaround = stats.get('turnaround', {})
+    turnaround_count = turnaround.get('count', 0)
+    avg_turnaround = turnaround.get('sum', 0) / turnaround_count if turnaround_count else 0
+    paths = {k: int(v) for k, v in stats.get('recommendation_path', {}).items() if v > 0}
+    model_eligible = paths.get('rules', 0) + paths.get('llm', 0)
+    
+    return {
+        'total_cases': int(stats.get('total', {}).get('', 0)),
+        'pending_cases': int(status_counts.get('pending', 0)),
+        'processing_cases': int(status_counts.get('processing', 0)),
+        'processed_cases': int(status_counts.get('processed', 0)),
+        'decided_cases': int(status_counts.get('decided', 0)),
+        'avg_turnaround_minutes': round(avg_turnaround, 1),
+        'decisions': {k: int(v) for k, v in stats.get('decision', {}).items() if v > 0},
+        'complexity_distribution': {k: int(v) for k, v in stats.get('complexity', {}).items() if v > 0},
+        'recommendation_paths': paths,
+        'llm_recommendations_avoided_share': round(paths.get('rules', 0) / model_eligible, 3) if model_eligible else 0
+    }
+
+@timed_db_call
+def rebuild_case_stats():
+    with get_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for statement in CASE_STATS_REBUILD:
+            conn.execute(statement)
+        conn.commit()
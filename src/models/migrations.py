@@ -0,0 +1,234 @@
+import sqlite3
+from datetime import datetime
+from typing import List
+
+# Each migration runs once, in order, inside its own transaction. Append new
+# migrations to the end; never edit or reorder one that has shipped.
+MIGRATIONS = [
+    (1, "initial_schema", [
+        '''
+        CREATE TABLE IF NOT EXISTS policies (
+            id TEXT PRIMARY KEY,
+            drug_name TEXT NOT NULL,
+            indication TEXT NOT NULL,
+            description TEXT,
+            criteria TEXT NOT NULL,
+            guidelines TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS cases (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            raw_text TEXT NOT NULL,
+            policy_id TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            extracted_data TEXT,
+            criteria_evaluation TEXT,
+            ai_recommendation TEXT,
+            provider_letter TEXT,
+            member_letter TEXT,
+            final_decision TEXT,
+            final_decision_notes TEXT,
+            complexity TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP,
+            decided_at TIMESTAMP,
+            turnaround_minutes INTEGER,
+            FOREIGN KEY (policy_id) REFERENCES policies(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            details TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (case_id) REFERENCES cases(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            cache_key TEXT PRIMARY KEY,
+            stage TEXT NOT NULL,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            hit_count INTEGER DEFAULT 0,
+            created_at REAL NOT NULL,
+            last_accessed_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''',
+    ]),
+    (2, "hot_path_indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_cases_status_created ON cases(status, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_policy_created ON cases(policy_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_created ON cases(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_logs_case_timestamp ON audit_logs(case_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_cache(last_accessed_at)",
+    ]),
+]
+
+def _case_stats_deltas(row: str, sign: str, include_total: bool, extra_columns: tuple = ()) -> List[str]:
+    upsert = (
+        "INSERT INTO case_stats (dimension, bucket, value) SELECT {dimension}, {bucket}, {amount} "
+        "WHERE {condition} ON CONFLICT (dimension, bucket) DO UPDATE SET value = value + excluded.value;"
+    )
+    deltas = [
+        ("'status'", f"{row}.status", sign + "1", f"{row}.status IS NOT NULL"),
+        ("'decision'", f"{row}.final_decision", sign + "1", f"{row}.final_decision IS NOT NULL"),
+        ("'complexity'", f"{row}.complexity", sign + "1", f"{row}.complexity IS NOT NULL"),
+        ("'turnaround'", "'sum'", f"{sign}{row}.turnaround_minutes", f"{row}.turnaround_minutes IS NOT NULL"),
+        ("'turnaround'", "'count'", sign + "1", f"{row}.turnaround_minutes IS NOT NULL"),
+    ]
+    deltas += [(f"'{column}'", f"{row}.{column}", sign + "1", f"{row}.{column} IS NOT NULL") for column in extra_columns]
+    if include_total:
+        deltas.insert(0, ("'total'", "''", sign + "1", "1"))
+    return [
+        upsert.format(dimension=dimension, bucket=bucket, amount=amount, condition=condition)
+        for dimension, bucket, amount, condition in deltas
+    ]
+
+
+CASE_STATS_REBUILD = [
+    "DELETE FROM case_stats",
+    "INSERT INTO case_stats (dimension, bucket, value) SELECT 'total', '', COUNT(*) FROM cases",
+    "INSERT INTO case_stats (dimension, bucket, value) SELECT 'status', status, COUNT(*) FROM cases WHERE status IS NOT NULL GROUP BY status",
+    "INSERT INTO case_stats (dimension, bucket, value) SELECT 'decision', final_decision, COUNT(*) FROM cases WHERE final_decision IS NOT NULL GROUP BY final_decision",
+    "INSERT INTO case_stats (dimension, bucket, value) SELECT 'complexity', complexity, COUNT(*) FROM cases WHERE complexity IS NOT NULL GROUP BY complexity",
+    "INSERT INTO case_stats (dimension, bucket, value) SELECT 'turnaround', 'sum', COALESCE(SUM(turnaround_minutes), 0) FROM cases",
+    "INSERT INTO case_stats (dimension, bucket, value) SELECT 'turnaround', 'count', COUNT(turnaround_minutes) FROM cases",
+]
+
+MIGRATIONS.append((3, "case_stats_summary", [
+    '''
+    CREATE TABLE IF NOT EXISTS case_stats (
+        dimension TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        value REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, bucket)
+    )
+    ''',
+    "CREATE TRIGGER IF NOT EXISTS trg_case_stats_insert AFTER INSERT ON cases BEGIN "
+    + " ".join(_case_stats_deltas("NEW", "+", include_total=True)) + " END",
+    "CREATE TRIGGER IF NOT EXISTS trg_case_stats_delete AFTER DELETE ON cases BEGIN "
+    + " ".join(_case_stats_deltas("OLD", "-", include_total=True)) + " END",
+    "CREATE TRIGGER IF NOT EXISTS trg_case_stats_update "
+    "AFTER UPDATE OF status, final_decision, complexity, turnaround_minutes ON cases BEGIN "
+    + " ".join(_case_stats_deltas("OLD", "-", include_total=False) + _case_stats_deltas("NEW", "+", include_total=False))
+    + " END",
+] + CASE_STATS_REBUILD))
+
+MIGRATIONS.append((4, "policies_version", [
+    "CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO schema_meta (key, value) VALUES ('policies_version', 0)",
+    "CREATE TRIGGER IF NOT EXISTS trg_policies_version_insert AFTER INSERT ON policies BEGIN "
+    "UPDATE schema_meta SET value = value + 1 WHERE key = 'policies_version'; END",
+    "CREATE TRIGGER IF NOT EXISTS trg_policies_version_update AFTER UPDATE ON policies BEGIN "
+    "UPDATE schema_meta SET value = value + 1 WHERE key = 'policies_version'; END",
+    "CREATE TRIGGER IF NOT EXISTS trg_policies_version_delete AFTER DELETE ON policies BEGIN "
+    "UPDATE schema_meta SET value = value + 1 WHERE key = 'policies_version'; END",
+]))
+
+MIGRATIONS.append((5, "llm_usage", [
+    '''
+    CREATE TABLE IF NOT EXISTS llm_usage (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stage TEXT NOT NULL,
+        model TEXT NOT NULL,
+        prompt_chars INTEGER NOT NULL,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        cached_tokens INTEGER,
+        created_at REAL NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_llm_usage_stage_model ON llm_usage(stage, model)",
+]))
+
+# Counts of how each processed case got its recommendation (rules / llm / demo),
+# maintained by the case_stats triggers like the other dimensions.
+CASE_STATS_REBUILD.append(
+    "INSERT INTO case_stats (dimension, bucket, value) SELECT 'recommendation_path', recommendation_path, COUNT(*) "
+    "FROM cases WHERE recommendation_path IS NOT NULL GROUP BY recommendation_path"
+)
+_STATS_EXTRA_COLUMNS = ('recommendation_path',)
+
+MIGRATIONS.append((6, "recommendation_path", [
+    "ALTER TABLE cases ADD COLUMN recommendation_path TEXT",
+    "DROP TRIGGER IF EXISTS trg_case_stats_insert",
+    "DROP TRIGGER IF EXISTS trg_case_stats_delete",
+    "DROP TRIGGER IF EXISTS trg_case_stats_update",
+    "CREATE TRIGGER trg_case_stats_insert AFTER INSERT ON cases BEGIN "
+    + " ".join(_case_stats_deltas("NEW", "+", True, _STATS_EXTRA_COLUMNS)) + " END",
+    "CREATE TRIGGER trg_case_stats_delete AFTER DELETE ON cases BEGIN "
+    + " ".join(_case_stats_deltas("OLD", "-", True, _STATS_EXTRA_COLUMNS)) + " END",
+    "CREATE TRIGGER trg_case_stats_update "
+    "AFTER UPDATE OF status, final_decision, complexity, turnaround_minutes, recommendation_path ON cases BEGIN "
+    + " ".join(_case_stats_deltas("OLD", "-", False, _STATS_EXTRA_COLUMNS) + _case_stats_deltas("NEW", "+", False, _STATS_EXTRA_COLUMNS))
+    + " END",
+] + CASE_STATS_REBUILD))
+
+# How long the step an audit entry describes took, where it timed one.
+MIGRATIONS.append((7, "audit_log_durations", [
+    "ALTER TABLE audit_logs ADD COLUMN duration_ms REAL",
+]))
+
+# Comma-separated pipeline stages that used their deterministic twin instead of
+# the model on the last run (circuit breaker open or model call failed).
+MIGRATIONS.append((8, "case_fallback_stages", [
+    "ALTER TABLE cases ADD COLUMN fallback_stages TEXT",
+]))
+
+# Per-policy model routing overrides (JSON, see model_router.py), and the case
+# complexity and latency of each model call so usage can be compared per route.
+MIGRATIONS.append((9, "model_routing", [
+    "ALTER TABLE policies ADD COLUMN model_routes TEXT",
+    "ALTER TABLE llm_usage ADD COLUMN complexity TEXT",
+    "ALTER TABLE llm_usage ADD COLUMN latency_ms REAL",
+]))
+
+# When a case was moved to 'processing'. A claim older than the lease timeout
+# belongs to a worker that died mid-run and may be taken over.
+MIGRATIONS.append((10, "case_claim_lease", [
+    "ALTER TABLE cases ADD COLUMN claimed_at TEXT",
+]))
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    ''')
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(conn: sqlite3.Connection) -> List[int]:
+    get_schema_version(conn)
+    conn.commit()
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        # BEGIN IMMEDIATE makes DDL part of the transaction and serializes
+        # workers that start at the same time; re-check once the lock is held.
+        conn.execute("BEGIN IMMEDIATE")
+        if version <= get_schema_version(conn):
+            conn.rollback()
+            continue
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().isoformat())
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
@@ -0,0 +1,90 @@
+import sqlite3
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+from src.models.database import (
+    build_case_list_query, build_pending_case_ids_query, encode_case_cursor,
+    POLICY_CASE_EVALUATIONS_SQL, CASE_AUDIT_LOGS_SQL
+)
+
+
+class HotQuery(NamedTuple):
+    sql: str
+    params: Sequence[Any]
+    # The index the plan must use on the query's main table.
+    index: str
+    # An unfiltered first page may walk its index in order (it stops at LIMIT);
+    # everything else must seek.
+    ordered_scan: bool = False
+
+
+def hot_queries() -> Dict[str, HotQuery]:
+    """The queries behind the case list, batch processing, re-evaluation and the case page.
+
+    The SQL comes from the same builders the endpoints use, so the check follows
+    any change to them.
+    """
+    cursor = encode_case_cursor('2024-01-01T00:00:00', 'PA-2024-001')
+
+    def case_page(index: str, ordered_scan: bool = False, **filters) -> HotQuery:
+        sql, params, _ = build_case_list_query(**filters)
+        return HotQuery(sql, params, index, ordered_scan)
+
+    return {
+        'pending_case_ids': HotQuery(*build_pending_case_ids_query(), 'idx_cases_status_created'),
+        'pending_case_ids_by_policy': HotQuery(
+            *build_pending_case_ids_query('POL-ONC-001', 50), 'idx_cases_policy_created'
+        ),
+        'case_list_first_page': case_page('idx_cases_created', ordered_scan=True),
+        'case_list_next_page': case_page('idx_cases_created', cursor_token=cursor),
+        'case_list_by_status': case_page('idx_cases_status_created', status='processed'),
+        'case_list_by_status_next_page': case_page(
+            'idx_cases_status_created', status='processed', cursor_token=cursor
+        ),
+        'case_list_by_policy': case_page('idx_cases_policy_created', policy_id='POL-ONC-001'),
+        'case_list_by_policy_next_page': case_page(
+            'idx_cases_policy_created', policy_id='POL-ONC-001', cursor_token=cursor
+        ),
+        'policy_case_evaluations': HotQuery(POLICY_CASE_EVALUATIONS_SQL, ('POL-ONC-001',), 'idx_cases_policy_created'),
+        'case_audit_logs': HotQuery(CASE_AUDIT_LOGS_SQL, ('PA-2024-001',), 'idx_audit_logs_case_timestamp'),
+    }
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()) -> List[str]:
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", tuple(params)).fetchall()]
+
+
+def plan_problems(plan: List[str], query: HotQuery) -> List[str]:
+    problems = []
+    for step in plan:
+        if 'TEMP B-TREE' in step:
+            problems.append(f"sorts in a temporary b-tree: {step}")
+        elif step.startswith('SCAN') and not (query.ordered_scan and f"INDEX {query.index}" in step):
+            problems.append(f"scans where a seek is expected: {step}")
+    if not any(f"INDEX {query.index}" in step for step in plan):
+        problems.append(f"does not use {query.index}")
+    return problems
+
+
+def check_query_plans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    problems = {}
+    for name, query in hot_queries().items():
+        found = plan_problems(explain_query_plan(conn, query.sql, query.params), query)
+        if found:
+            problems[name] = found
+    return problems
+
+
+if __name__ == "__main__":
+    import sys
+    from src.models.database import get_db, init_db
+
+    init_db()
+    with get_db() as conn:
+        problems = check_query_plans(conn)
+    for name, found in problems.items():
+        print(f"{name}:")
+        for problem in found:
+            print(f"    {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"All {len(hot_queries())} hot queries seek their expected index")
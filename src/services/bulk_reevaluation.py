@@ -0,0 +1,245 @@
+import time
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+from src.models.database import get_policy_case_evaluations
+from src.services.criteria_compiler import (
+    CompiledCriterion, compile_policy,
+    EGFR_NEGATIVE_STATUSES, EGFR_POSITIVE_STATUSES, ALK_NEGATIVE_STATUSES, ALK_POSITIVE_STATUSES
+)
+
+UNKNOWN, MET, UNMET, ABSENT = 0, 1, 2, -1
+STATUS_NAMES = {UNKNOWN: 'unknown', MET: 'met', UNMET: 'unmet', ABSENT: 'absent'}
+STATUS_CODES = {'unknown': UNKNOWN, 'met': MET, 'unmet': UNMET}
+
+APPROVE, DENY, PEND = 0, 1, 2
+RECOMMENDATION_NAMES = {APPROVE: 'approve', DENY: 'deny', PEND: 'pend'}
+
+
+def _case_columns(extracted_data: dict) -> dict:
+    disease_stage = extracted_data.get('disease_stage', {}) or {}
+    stage = (disease_stage.get('stage', '') or '').lower()
+    biomarkers = extracted_data.get('biomarkers', {}) or {}
+
+    pd_l1 = biomarkers.get('pd_l1', {}) or {}
+    pd_l1_status = (pd_l1.get('status', '') or '').lower()
+    pd_l1_value = pd_l1.get('value', '')
+    try:
+        pd_l1_numeric = float(str(pd_l1_value).replace('%', '').strip())
+        pd_l1_numeric_ok = True
+    except ValueError:
+        pd_l1_numeric, pd_l1_numeric_ok = 0.0, False
+
+    egfr = biomarkers.get('egfr', {}) or {}
+    egfr_status = (egfr.get('status', '') or '').lower()
+    alk_status = ((biomarkers.get('alk', {}) or {}).get('status', '') or '').lower()
+
+    braf_result = ''
+    for marker in biomarkers.get('other_markers', []) or []:
+        if 'braf' in marker.get('name', '').lower():
+            braf_result = marker.get('result', '').lower()
+            break
+
+    prior_therapy = extracted_data.get('prior_therapy', {}) or {}
+    has_prior = prior_therapy.get('has_prior_systemic', False)
+    treatments = prior_therapy.get('treatments', []) or []
+
+    try:
+        ecog_value = int(str((extracted_data.get('performance_status', {}) or {}).get('ecog', '')).strip())
+        ecog_ok = True
+    except ValueError:
+        ecog_value, ecog_ok = 0, False
+
+    metastatic_sites = disease_stage.get('metastatic_sites', []) or []
+
+    return {
+        'stage_present': bool(stage),
+        'stage_iv': 'stage iv' in stage or 'stage 4' in stage or 'metastatic' in stage,
+        'stage_iii_plus': 'stage iii' in stage or 'stage 3' in stage or 'stage iv' in stage or 'stage 4' in stage,
+        'pd_l1_pending': pd_l1_status == 'pending' or 'pending' in str(pd_l1_value).lower(),
+        'pd_l1_numeric': pd_l1_numeric,
+        'pd_l1_numeric_ok': pd_l1_numeric_ok,
+        'pd_l1_positive_fallback': pd_l1_status == 'positive' or 'high' in pd_l1_status,
+        'pd_l1_negative_fallback': pd_l1_status == 'negative' or 'low' in pd_l1_status,
+        'pd_l1_positive': pd_l1_status in ('positive', 'detected'),
+        'pd_l1_negative': pd_l1_status in ('negative', 'not detected'),
+        'egfr_pending': egfr_status == 'pending',
+        'egfr_negative': egfr_status in EGFR_NEGATIVE_STATUSES,
+        'egfr_positive': egfr_status in EGFR_POSITIVE_STATUSES or bool(egfr.get('mutation', '')),
+        'alk_pending': alk_status == 'pending',
+        'alk_negative': alk_status in ALK_NEGATIVE_STATUSES,
+        'alk_positive': alk_status in ALK_POSITIVE_STATUSES,
+        'braf_present': bool(braf_result),
+        'braf_wild_type': 'wild type' in braf_result or 'negative' in braf_result,
+        'no_prior_ok': not has_prior or len(treatments) == 0 or all('no prior' in t.lower() for t in treatments),
+        'prior_ok': bool(has_prior) and len(treatments) > 0,
+        'ecog_value': ecog_value,
+        'ecog_ok': ecog_ok,
+        'has_brain_mets': any('brain' in site.lower() for site in metastatic_sites),
+    }
+
+
+def load_case_columns(rows: List[Dict]) -> Dict[str, np.ndarray]:
+    per_case = [_case_columns(row['extracted_data']) for row in rows]
+    if not per_case:
+        return {}
+    columns = {}
+    for name in per_case[0]:
+        values = [case[name] for case in per_case]
+        if name == 'pd_l1_numeric':
+            columns[name] = np.array(values, dtype=np.float64)
+        elif name == 'ecog_value':
+            columns[name] = np.array(values, dtype=np.int64)
+        else:
+            columns[name] = np.array(values, dtype=bool)
+    return columns
+
+
+def evaluate_criterion_vectorized(criterion: CompiledCriterion, cols: Dict[str, np.ndarray], size: int) -> np.ndarray:
+    kind = criterion.kind
+    if kind == 'stage_min':
+        reached = cols['stage_iv'] if criterion.min_stage == 4 else cols['stage_iii_plus']
+        return np.select([reached, cols['stage_present']], [MET, UNMET], UNKNOWN)
+    if kind == 'pd_l1_threshold':
+        numeric_ok = cols['pd_l1_numeric_ok']
+        return np.select(
+            [cols['pd_l1_pending'], numeric_ok & (cols['pd_l1_numeric'] >= criterion.threshold), numeric_ok,
+             cols['pd_l1_positive_fallback'], cols['pd_l1_negative_fallback']],
+            [UNKNOWN, MET, UNMET, MET, UNMET], UNKNOWN
+        )
+    if kind == 'pd_l1_positive':
+        return np.select([cols['pd_l1_pending'], cols['pd_l1_positive'], cols['pd_l1_negative']], [UNKNOWN, MET, UNMET], UNKNOWN)
+    if kind == 'egfr_absent':
+        return np.select([cols['egfr_pending'], cols['egfr_negative'], cols['egfr_positive']], [UNKNOWN, MET, UNMET], UNKNOWN)
+    if kind == 'egfr_present':
+        return np.select([cols['egfr_pending'], cols['egfr_positive']], [UNKNOWN, MET], UNMET)
+    if kind == 'alk_absent':
+        return np.select([cols['alk_pending'], cols['alk_negative'], cols['alk_positive']], [UNKNOWN, MET, UNMET], UNKNOWN)
+    if kind == 'braf_determined':
+        return np.where(cols['braf_present'], MET, UNKNOWN)
+    if kind == 'braf_wild_type':
+        return np.select([cols['braf_present'] & cols['braf_wild_type'], cols['braf_present']], [MET, UNMET], UNKNOWN)
+    if kind == 'no_prior_therapy':
+        return np.where(cols['no_prior_ok'], MET, UNMET)
+    if kind == 'prior_therapy_required':
+        return np.where(cols['prior_ok'], MET, UNMET)
+    if kind == 'ecog_max':
+        return np.select([~cols['ecog_ok'], cols['ecog_value'] <= criterion.max_value], [UNKNOWN, MET], UNMET)
+    if kind == 'no_active_brain_mets':
+        return np.where(cols['has_brain_mets'], UNKNOWN, MET)
+    if kind == 'brain_mets_required':
+        return np.where(cols['has_brain_mets'], MET, UNMET)
+    return np.full(size, UNKNOWN)
+
+
+def recommend_vectorized(statuses: np.ndarray, required: np.ndarray) -> np.ndarray:
+    if statuses.shape[1] == 0:
+        return np.full(statuses.shape[0], APPROVE)
+    required_statuses = np.where(required[np.newaxis, :], statuses, MET)
+    return np.select(
+        [(required_statuses == UNKNOWN).any(axis=1), (required_statuses == UNMET).any(axis=1)],
+        [PEND, DENY], APPROVE
+    )
+
+
+def _stored_statuses(rows: List[Dict], criterion_ids: List[str]) -> np.ndarray:
+    index = {criterion_id: i for i, criterion_id in enumerate(criterion_ids)}
+    statuses = np.full((len(rows), len(criterion_ids)), ABSENT, dtype=np.int8)
+    for row_index, row in enumerate(rows):
+        for evaluation in row['criteria_evaluation']:
+            column = index.get(evaluation.get('id'))
+            if column is not None:
+                statuses[row_index, column] = STATUS_CODES.get(evaluation.get('status'), UNKNOWN)
+    return statuses
+
+
+def _stored_recommendations(rows: List[Dict]) -> np.ndarray:
+    recommendations = np.empty(len(rows), dtype=np.int8)
+    for row_index, row in enumerate(rows):
+        required = [c for c in row['criteria_evaluation'] if c.get('required', True)]
+        if any(c.get('status') == 'unknown' for c in required):
+            recommendations[row_index] = PEND
+        elif any(c.get('status') == 'unmet' for c in required):
+            recommendations[row_index] = DENY
+        else:
+            recommendations[row_index] = APPROVE
+    return recommendations
+
+
+def _transitions(before: np.ndarray, after: np.ndarray, names: Dict[int, str]) -> Dict[str, int]:
+    changed = before != after
+    pairs = Counter(zip(before[changed].tolist(), after[changed].tolist()))
+    return {f"{names[b]}->{names[a]}": count for (b, a), count in sorted(pairs.items())}
+
+
+def reevaluate_policy_cases(policy: dict, limit: int = 500) -> dict:
+    started = time.perf_counter()
+    compiled = compile_policy(policy)
+    rows = get_policy_case_evaluations(policy['id'])
+    loaded = time.perf_counter()
+
+    size = len(rows)
+    criterion_ids = [c.id for c in compiled.criteria]
+    cols = load_case_columns(rows)
+    if size:
+        new_statuses = np.stack(
+            [evaluate_criterion_vectorized(c, cols, size) for c in compiled.criteria], axis=1
+        ).astype(np.int8) if compiled.criteria else np.zeros((size, 0), dtype=np.int8)
+    else:
+        new_statuses = np.zeros((0, len(criterion_ids)), dtype=np.int8)
+    required = np.array([c.required for c in compiled.criteria], dtype=bool)
+    new_recommendations = recommend_vectorized(new_statuses, required)
+    evaluated = time.perf_counter()
+
+    old_statuses = _stored_statuses(rows, criterion_ids)
+    old_recommendations = _stored_recommendations(rows)
+
+    criteria_report = {}
+    for column, criterion in enumerate(compiled.criteria):
+        before, after = old_statuses[:, column], new_statuses[:, column]
+        criteria_report[criterion.id] = {
+            'kind': criterion.kind,
+            'changed': int((before != after).sum()),
+            'transitions': _transitions(before, after, STATUS_NAMES)
+        }
+
+    status_changed = old_statuses != new_statuses
+    recommendation_changed = old_recommendations != new_recommendations
+    changed_rows = np.flatnonzero(status_changed.any(axis=1) | recommendation_changed)
+
+    changed_cases = []
+    for row_index in changed_rows[:limit].tolist():
+        changed_cases.append({
+            'case_id': rows[row_index]['id'],
+            'recommendation': {
+                'from': RECOMMENDATION_NAMES[int(old_recommendations[row_index])],
+                'to': RECOMMENDATION_NAMES[int(new_recommendations[row_index])]
+            },
+            'criteria': {
+                criterion_ids[column]: {
+                    'from': STATUS_NAMES[int(old_statuses[row_index, column])],
+                    'to': STATUS_NAMES[int(new_statuses[row_index, column])]
+                }
+                for column in np.flatnonzero(status_changed[row_index]).tolist()
+            }
+        })
+
+    return {
+        'policy_id': policy['id'],
+        'cases_evaluated': size,
+        'cases_changed': int(changed_rows.size),
+        'unparsed_criteria': compiled.unparsed,
+        'criteria': criteria_report,
+        'recommendations': {
+            'changed': int(recommendation_changed.sum()),
+            'transitions': _transitions(old_recommendations, new_recommendations, RECOMMENDATION_NAMES)
+        },
+        'changed_cases': changed_cases,
+        'timings_ms': {
+            'load': round((loaded - started) * 1000, 1),
+            'evaluate': round((evaluated - loaded) * 1000, 1),
+            'total': round((time.perf_counter() - started) * 1000, 1)
+        }
+    }
@@ -0,0 +1,253 @@
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Labels the extractor indexes, and whether they match case-insensitively.
+SECTION_LABELS = {
+    'patient': ('Patient:', False),
+    'dob': ('DOB:', False),
+    'member_id': ('Member ID:', False),
+    'diagnosis': ('Diagnosis:', False),
+    'icd10': ('ICD-10:', False),
+    'histology': ('Histology:', False),
+    'stage': ('stage', True),
+    'pd_l1': ('PD-L1', False),
+    'egfr': ('egfr', True),
+    'alk': ('alk', True),
+    'ecog': ('ECOG', False),
+    'no_prior_systemic': ('no prior systemic', True),
+    'comorbidities': ('COMORBIDITIES:', False),
+    'provider': ('Requesting Provider:', False),
+    'npi': ('NPI:', False),
+    'medication': ('MEDICATION REQUESTED:', False),
+    'requesting': ('REQUESTING', False),
+    'rationale': ('RATIONALE', False),
+}
+CASE_INSENSITIVE_LABELS = {
+    name: re.compile(re.escape(label), re.IGNORECASE)
+    for name, (label, case_insensitive) in SECTION_LABELS.items() if case_insensitive
+}
+# Labels where only some letters may vary in case: each occurrence of the
+# lowercase label is confirmed with its pattern.
+PATTERN_LABELS = {
+    'metastatic_sites': ('metastatic site', re.compile(r'[Mm]etastatic site')),
+    'prior_treatments': ('prior treatment', re.compile(r'Prior [Tt]reatment')),
+    'requested': ('requesting:', re.compile(r'REQUESTING:')),
+}
+
+# Patterns below are matched at the end of their section's label.
+LINE_VALUE = re.compile(r'\s*([^\n]+)')
+PATIENT_NAME_VALUE = re.compile(r'\s*([^\n\(]+)')
+DOB_VALUE = re.compile(r'\s*(\d{1,2}/\d{1,2}/\d{4})')
+STAGE_VALUE = re.compile(r'[:\s]+(IV|III|II|I)[\s\(]*([^\n\)]*)', re.IGNORECASE)
+METASTATIC_SITES_VALUE = re.compile(r's?:\s*([^\n]+)')
+PD_L1_VALUE = re.compile(r'[^:]*:\s*(\d+)%')
+EGFR_WILD_TYPE_VALUE = re.compile(r'[:\s]+Wild type', re.IGNORECASE)
+EGFR_EXON_VALUE = re.compile(r'[:\s]+(Exon \d+ [^\n,]+)', re.IGNORECASE)
+ALK_NEGATIVE_VALUE = re.compile(r'[:\s]+Negative', re.IGNORECASE)
+ALK_POSITIVE_VALUE = re.compile(r'[:\s]+Positive', re.IGNORECASE)
+ECOG_VALUE = re.compile(r'[:\s]+(\d)')
+ECOG_DESCRIPTION_VALUE = re.compile(r'[:\s]+\d+\s*[-–]\s*([^\n]+)')
+PRIOR_TREATMENTS_LABEL = re.compile(r's?:')
+PRIOR_TREATMENTS_VALUE = re.compile(r's?:\s*([^\n]+)')
+NPI_VALUE = re.compile(r'\s*(\d+)')
+LEADING_WHITESPACE = re.compile(r'\s*')
+
+
+def _label_ends(text: str, label: str) -> List[int]:
+    ends = []
+    position = text.find(label)
+    while position != -1:
+        ends.append(position + len(label))
+        position = text.find(label, position + 1)
+    return ends
+
+
+def index_sections(pa_text: str, lowered: Optional[str] = None) -> Dict[str, List[int]]:
+    """Map each label to the offsets just past its occurrences, in document order.
+
+    Every field pattern is then matched only at its own labels instead of being
+    searched for across the whole document.
+    """
+    # Lowercasing keeps offsets stable for ASCII text; otherwise fall back to
+    # IGNORECASE scans so Unicode case folding behaves as it did with re.search.
+    if not pa_text.isascii():
+        lowered = None
+    elif lowered is None:
+        lowered = pa_text.lower()
+    sections = {}
+    for name, (label, case_insensitive) in SECTION_LABELS.items():
+        if not case_insensitive:
+            ends = _label_ends(pa_text, label)
+        elif lowered is not None:
+            ends = _label_ends(lowered, label)
+        else:
+            ends = [match.end() for match in CASE_INSENSITIVE_LABELS[name].finditer(pa_text)]
+        if ends:
+            sections[name] = ends
+    for name, (label, pattern) in PATTERN_LABELS.items():
+        if lowered is not None:
+            matches = (pattern.match(pa_text, end - len(label)) for end in _label_ends(lowered, label))
+            ends = [match.end() for match in matches if match]
+        else:
+            ends = [match.end() for match in pattern.finditer(pa_text)]
+        if ends:
+            sections[name] = ends
+    return sections
+
+
+def _first_match(pattern: re.Pattern, pa_text: str, positions: List[int]) -> Optional[re.Match]:
+    for position in positions:
+        match = pattern.match(pa_text, position)
+        if match:
+            return match
+    return None
+
+
+def _first_value(pattern: re.Pattern, pa_text: str, sections: Dict[str, List[int]], label: str) -> Optional[str]:
+    match = _first_match(pattern, pa_text, sections.get(label, ()))
+    return match.group(1) if match else None
+
+
+def _comorbidities_text(pa_text: str, sections: Dict[str, List[int]]) -> Optional[str]:
+    starts = sections.get('comorbidities')
+    if not starts:
+        return None
+    start = LEADING_WHITESPACE.match(pa_text, starts[0]).end()
+    # The section runs to the next RATIONALE/REQUESTING label, or to the end of
+    # the text (before a trailing newline, as `$` would).
+    end = len(pa_text) - 1 if pa_text.endswith('\n') else len(pa_text)
+    if end < start:
+        end = len(pa_text)
+    for label in ('rationale', 'requesting'):
+        positions = sections.get(label, [])
+        index = bisect_left(positions, start + len(label))
+        if index < len(positions):
+            end = min(end, positions[index] - len(label))
+    return pa_text[start:end]
+
+
+def extract_case_data_sections(pa_text: str) -> dict:
+    lowered = pa_text.lower()
+    sections = index_sections(pa_text, lowered)
+
+    patient_info = {"name": "N/A", "dob": "N/A", "member_id": "N/A"}
+    name = _first_value(PATIENT_NAME_VALUE, pa_text, sections, 'patient')
+    if name is not None:
+        patient_info["name"] = name.strip()
+    dob = _first_value(DOB_VALUE, pa_text, sections, 'dob')
+    if dob is not None:
+        patient_info["dob"] = dob
+    member_id = _first_value(LINE_VALUE, pa_text, sections, 'member_id')
+    if member_id is not None:
+        patient_info["member_id"] = member_id.strip()
+
+    diagnosis = {"primary": "N/A", "icd10": "", "histology": ""}
+    for field, label in (("primary", 'diagnosis'), ("icd10", 'icd10'), ("histology", 'histology')):
+        value = _first_value(LINE_VALUE, pa_text, sections, label)
+        if value is not None:
+            diagnosis[field] = value.strip()
+
+    disease_stage = {"stage": "N/A", "tnm": "", "metastatic_sites": []}
+    stage_match = _first_match(STAGE_VALUE, pa_text, sections.get('stage', ()))
+    if stage_match:
+        disease_stage["stage"] = f"Stage {stage_match.group(1).upper()}"
+        if stage_match.group(2):
+            disease_stage["tnm"] = stage_match.group(2).strip()
+    sites = _first_value(METASTATIC_SITES_VALUE, pa_text, sections, 'metastatic_sites')
+    if sites is not None:
+        disease_stage["metastatic_sites"] = [s.strip() for s in sites.split(',')]
+
+    pd_l1 = {"status": "not tested", "value": "", "test_date": ""}
+    pd_l1_value = _first_value(PD_L1_VALUE, pa_text, sections, 'pd_l1')
+    if pd_l1_value is not None:
+        value = int(pd_l1_value)
+        pd_l1["status"] = "positive" if value > 0 else "negative"
+        pd_l1["value"] = f"{value}%"
+    elif "pending" in lowered and "pd-l1" in lowered:
+        pd_l1["status"] = "pending"
+
+    egfr = {"status": "not tested", "mutation": ""}
+    egfr_positions = sections.get('egfr', ())
+    if _first_match(EGFR_WILD_TYPE_VALUE, pa_text, egfr_positions):
+        egfr["status"] = "wild type"
+    else:
+        mutation = _first_value(EGFR_EXON_VALUE, pa_text, sections, 'egfr')
+        if mutation is not None:
+            egfr["status"] = "mutated"
+            egfr["mutation"] = mutation.strip()
+        elif "egfr" in lowered and "pending" in lowered:
+            egfr["status"] = "pending"
+
+    alk = {"status": "not tested"}
+    alk_positions = sections.get('alk', ())
+    if _first_match(ALK_NEGATIVE_VALUE, pa_text, alk_positions):
+        alk["status"] = "negative"
+    elif _first_match(ALK_POSITIVE_VALUE, pa_text, alk_positions):
+        alk["status"] = "positive"
+
+    performance_status = {"ecog": "", "description": ""}
+    ecog = _first_value(ECOG_VALUE, pa_text, sections, 'ecog')
+    if ecog is not None:
+        performance_status["ecog"] = ecog
+    description = _first_value(ECOG_DESCRIPTION_VALUE, pa_text, sections, 'ecog')
+    if description is not None:
+        performance_status["description"] = description.strip()
+
+    prior_therapy = {"has_prior_systemic": False, "treatments": [], "immunotherapy_history": "none"}
+    if 'no_prior_systemic' in sections:
+        prior_therapy["treatments"] = ["No prior systemic therapy"]
+    elif _first_match(PRIOR_TREATMENTS_LABEL, pa_text, sections.get('prior_treatments', ())):
+        treatments = _first_value(PRIOR_TREATMENTS_VALUE, pa_text, sections, 'prior_treatments')
+        if treatments is not None and "no prior" not in treatments.lower():
+            prior_therapy["has_prior_systemic"] = True
+            prior_therapy["treatments"] = [treatments.strip()]
+
+    comorbidities = []
+    comor_text = _comorbidities_text(pa_text, sections)
+    if comor_text is not None:
+        comor_lines = [line.strip().strip('-').strip() for line in comor_text.split('\n') if line.strip() and line.strip() != '-']
+        comorbidities = [c for c in comor_lines if c and len(c) > 2]
+
+    provider = {"name": "", "npi": "", "facility": ""}
+    provider_name = _first_value(LINE_VALUE, pa_text, sections, 'provider')
+    if provider_name is not None:
+        provider["name"] = provider_name.strip()
+    npi = _first_value(NPI_VALUE, pa_text, sections, 'npi')
+    if npi is not None:
+        provider["npi"] = npi
+
+    drug = {"name": "", "dose": "", "duration": ""}
+    drug_name = _first_value(LINE_VALUE, pa_text, sections, 'medication')
+    if drug_name is not None:
+        drug["name"] = drug_name.strip()
+    duration = _first_value(LINE_VALUE, pa_text, sections, 'requested')
+    if duration is not None:
+        drug["duration"] = duration.strip()
+
+    return {
+        "patient_info": patient_info,
+        "diagnosis": diagnosis,
+        "disease_stage": disease_stage,
+        "biomarkers": {
+            "pd_l1": pd_l1,
+            "egfr": egfr,
+            "alk": alk,
+            "other_markers": []
+        },
+        "labs": {
+            "wbc": "",
+            "hemoglobin": "",
+            "platelets": "",
+            "creatinine": "",
+            "alt": "",
+            "ast": "",
+            "other": []
+        },
+        "performance_status": performance_status,
+        "prior_therapy": prior_therapy,
+        "comorbidities": comorbidities,
+        "requesting_provider": provider,
+        "drug_requested": drug,
+        "_demo_mode": True
+    }
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# A stage's breaker opens when, over its last PA_BREAKER_WINDOW model calls (and
+# at least PA_BREAKER_MIN_CALLS of them), the error rate or the p95 latency goes
+# over its threshold. While open the stage uses its deterministic twin; after the
+# cooldown one probe call is let through and closes the breaker if it succeeds.
+BREAKER_ENABLED = os.environ.get("PA_BREAKER_ENABLED", "1") != "0"
+BREAKER_WINDOW = int(os.environ.get("PA_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.environ.get("PA_BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.environ.get("PA_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_P95_SECONDS = float(os.environ.get("PA_BREAKER_P95_SECONDS", "30"))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get("PA_BREAKER_COOLDOWN_SECONDS", "30"))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Model call stage (as passed to complete_json and recorded in llm_usage) -> the
+# pipeline stage whose breaker it reports to.
+CALL_STAGES = {
+    'extraction': 'extraction',
+    'extraction_hybrid': 'extraction',
+    'recommendation': 'recommendation',
+    'letter_rationale': 'letters',
+    'letters_stream': 'letters'
+}
+
+
+class CircuitBreaker:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.state = CLOSED
+        # (succeeded, seconds) for the most recent model calls
+        self._calls: deque = deque(maxlen=BREAKER_WINDOW)
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._opened_count = 0
+        self._short_circuited = 0
+        self._lock = threading.Lock()
+
+    def _p95(self) -> float:
+        latencies = sorted(seconds for _, seconds in self._calls)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def _error_rate(self) -> float:
+        return sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self._opened_count += 1
+
+    def allow(self) -> bool:
+        """Whether the stage may call the model now; False means use the deterministic twin."""
+        if not BREAKER_ENABLED:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self._opened_at >= BREAKER_COOLDOWN_SECONDS:
+                self.state = HALF_OPEN
+            # A probe that never reported back (a cache hit, say) frees the slot after a cooldown.
+            if self.state == HALF_OPEN and (
+                self._probe_started is None or now - self._probe_started >= BREAKER_COOLDOWN_SECONDS
+            ):
+                self._probe_started = now
+                return True
+            self._short_circuited += 1
+            return False
+
+    def record(self, succeeded: bool, seconds: float):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if succeeded and seconds <= BREAKER_P95_SECONDS:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    self._probe_started = None
+                else:
+                    self._open(now)
+                return
+            self._calls.append((succeeded, seconds))
+            if self.state == CLOSED and len(self._calls) >= BREAKER_MIN_CALLS and (
+                self._error_rate() > BREAKER_ERROR_RATE or self._p95() > BREAKER_P95_SECONDS
+            ):
+                self._open(now)
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Time one model call and report it; cancellation is not counted."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(False, time.perf_counter() - started)
+            raise
+        self.record(True, time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'window_calls': len(self._calls),
+                'error_rate': round(self._error_rate(), 3) if self._calls else 0,
+                'p95_ms': round(self._p95() * 1000, 1) if self._calls else None,
+                'times_opened': self._opened_count,
+                'short_circuited': self._short_circuited
+            }
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {
+    stage: CircuitBreaker(stage) for stage in ('extraction', 'recommendation', 'letters')
+}
+
+
+def get_breaker(stage: str) -> CircuitBreaker:
+    return BREAKERS[CALL_STAGES.get(stage, stage)]
+
+
+def get_breaker_stats() -> dict:
+    return {stage: breaker.stats() for stage, breaker in BREAKERS.items()}
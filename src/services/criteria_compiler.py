@@ -0,0 +1,421 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.models.database import on_policy_change
+
+logger = logging.getLogger(__name__)
+
+PDL1_THRESHOLD_PATTERN = re.compile(r'(?:>=|≥)\s*(\d+(?:\.\d+)?)\s*%|tps\s*(?:>=|≥)\s*(\d+(?:\.\d+)?)')
+ECOG_RANGE_PATTERN = re.compile(r'ecog (?:performance status )?0-(\d)')
+
+EGFR_NEGATIVE_STATUSES = ('wild type', 'negative', 'not detected', 'no mutations')
+EGFR_POSITIVE_STATUSES = ('mutated', 'positive', 'detected')
+ALK_NEGATIVE_STATUSES = ('negative', 'not detected', 'no rearrangement')
+ALK_POSITIVE_STATUSES = ('positive', 'detected', 'rearranged')
+
+Predicate = Callable[[dict, dict], None]
+
+
+@dataclass
+class CompiledCriterion:
+    id: str
+    description: str
+    type: str
+    required: bool
+    kind: str
+    predicate: Predicate
+    threshold: Optional[float] = None
+    min_stage: Optional[int] = None
+    max_value: Optional[int] = None
+    negated: bool = False
+
+    def evaluate(self, case_data: dict) -> dict:
+        evaluation = {
+            'id': self.id,
+            'description': self.description,
+            'type': self.type,
+            'required': self.required,
+            'status': 'unknown',
+            'evidence': '',
+            'details': ''
+        }
+        self.predicate(case_data, evaluation)
+        return evaluation
+
+
+@dataclass
+class CompiledPolicy:
+    policy_id: str
+    version: str
+    criteria: List[CompiledCriterion]
+    unparsed: List[Dict] = field(default_factory=list)
+
+    def evaluate(self, case_data: dict) -> List[Dict]:
+        return [criterion.evaluate(case_data) for criterion in self.criteria]
+
+
+def _set(evaluation: dict, status: str, evidence: str):
+    evaluation['status'] = status
+    evaluation['evidence'] = evidence
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if value == int(value) else str(value)
+
+
+def _unparsed(case_data: dict, evaluation: dict):
+    pass
+
+
+def _stage_text(case_data: dict) -> Tuple[dict, str]:
+    disease_stage = case_data.get('disease_stage', {})
+    return disease_stage, disease_stage.get('stage', '').lower()
+
+
+def _is_stage_iv(stage: str) -> bool:
+    return 'stage iv' in stage or 'stage 4' in stage or 'metastatic' in stage
+
+
+def _stage_iv_required(case_data: dict, evaluation: dict):
+    disease_stage, stage = _stage_text(case_data)
+    if _is_stage_iv(stage):
+        _set(evaluation, 'met', f"Patient has {disease_stage.get('stage', 'Stage IV')}")
+        if disease_stage.get('metastatic_sites'):
+            evaluation['details'] = f"Metastatic sites: {', '.join(disease_stage['metastatic_sites'])}"
+    elif stage:
+        _set(evaluation, 'unmet', f"Patient stage is {disease_stage.get('stage')}, not Stage IV/metastatic")
+    else:
+        _set(evaluation, 'unknown', "Disease stage not documented")
+
+
+def _stage_iii_required(case_data: dict, evaluation: dict):
+    disease_stage, stage = _stage_text(case_data)
+    if 'stage iii' in stage or 'stage 3' in stage or 'stage iv' in stage or 'stage 4' in stage:
+        _set(evaluation, 'met', f"Patient has {disease_stage.get('stage', 'Stage III+')}")
+    elif stage:
+        _set(evaluation, 'unmet', f"Patient stage is {disease_stage.get('stage')}")
+    else:
+        _set(evaluation, 'unknown', "Disease stage not documented")
+
+
+def _pd_l1_fields(case_data: dict) -> Tuple[str, str]:
+    pd_l1 = case_data.get('biomarkers', {}).get('pd_l1', {})
+    return pd_l1.get('status', '').lower(), pd_l1.get('value', '')
+
+
+def _make_pd_l1_threshold(threshold: float) -> Predicate:
+    label = _format_number(threshold)
+
+    def predicate(case_data: dict, evaluation: dict):
+        status, value = _pd_l1_fields(case_data)
+        if status == 'pending' or 'pending' in str(value).lower():
+            _set(evaluation, 'unknown', "PD-L1 testing is pending")
+            return
+        try:
+            numeric_value = float(str(value).replace('%', '').strip())
+        except ValueError:
+            if status == 'positive' or 'high' in status:
+                _set(evaluation, 'met', f"PD-L1 status: {status}")
+            elif status == 'negative' or 'low' in status:
+                _set(evaluation, 'unmet', f"PD-L1 status: {status}")
+            else:
+                _set(evaluation, 'unknown', "PD-L1 level not clearly documented")
+            return
+        if numeric_value >= threshold:
+            _set(evaluation, 'met', f"PD-L1 TPS is {value} (>= {label}% required)")
+        else:
+            _set(evaluation, 'unmet', f"PD-L1 TPS is {value} (< {label}% required threshold)")
+
+    return predicate
+
+
+def _pd_l1_positive(case_data: dict, evaluation: dict):
+    status, value = _pd_l1_fields(case_data)
+    if status == 'pending' or 'pending' in str(value).lower():
+        _set(evaluation, 'unknown', "PD-L1 testing is pending")
+    elif status in ['positive', 'detected']:
+        _set(evaluation, 'met', f"PD-L1 {status}: {value}" if value else f"PD-L1 {status}")
+    elif status in ['negative', 'not detected']:
+        _set(evaluation, 'unmet', f"PD-L1 {status}")
+    elif status == 'not tested':
+        _set(evaluation, 'unknown', "PD-L1 not tested")
+    else:
+        _set(evaluation, 'unknown', "PD-L1 status unclear")
+
+
+def _egfr_fields(case_data: dict) -> Tuple[str, str]:
+    egfr = case_data.get('biomarkers', {}).get('egfr', {})
+    return egfr.get('status', '').lower(), egfr.get('mutation', '')
+
+
+def _egfr_absent(case_data: dict, evaluation: dict):
+    status, mutation = _egfr_fields(case_data)
+    if status == 'pending':
+        _set(evaluation, 'unknown', "EGFR testing is pending")
+    elif status in EGFR_NEGATIVE_STATUSES:
+        _set(evaluation, 'met', f"EGFR: {status} (no mutations detected)")
+    elif status in EGFR_POSITIVE_STATUSES or mutation:
+        _set(evaluation, 'unmet', f"EGFR mutation detected: {mutation or status}")
+    elif status == 'not tested':
+        _set(evaluation, 'unknown', "EGFR not tested")
+    else:
+        _set(evaluation, 'unknown', "EGFR status unclear")
+
+
+def _egfr_present(case_data: dict, evaluation: dict):
+    status, mutation = _egfr_fields(case_data)
+    if status == 'pending':
+        _set(evaluation, 'unknown', "EGFR testing is pending")
+    elif status in EGFR_POSITIVE_STATUSES or mutation:
+        _set(evaluation, 'met', f"EGFR mutation: {mutation or 'detected'}")
+    else:
+        _set(evaluation, 'unmet', f"EGFR: {status}")
+
+
+def _alk_absent(case_data: dict, evaluation: dict):
+    status = case_data.get('biomarkers', {}).get('alk', {}).get('status', '').lower()
+    if status == 'pending':
+        _set(evaluation, 'unknown', "ALK testing is pending")
+    elif status in ALK_NEGATIVE_STATUSES:
+        _set(evaluation, 'met', f"ALK: {status} (no rearrangement)")
+    elif status in ALK_POSITIVE_STATUSES:
+        _set(evaluation, 'unmet', "ALK rearrangement detected")
+    elif status == 'not tested':
+        _set(evaluation, 'unknown', "ALK not tested")
+    else:
+        _set(evaluation, 'unknown', "ALK status unclear")
+
+
+def _braf_result(case_data: dict) -> Optional[str]:
+    for marker in case_data.get('biomarkers', {}).get('other_markers', []):
+        if 'braf' in marker.get('name', '').lower():
+            return marker.get('result', '').lower()
+    return None
+
+
+def _braf_determined(case_data: dict, evaluation: dict):
+    braf_result = _braf_result(case_data)
+    if braf_result:
+        _set(evaluation, 'met', f"BRAF status determined: {braf_result}")
+    else:
+        _set(evaluation, 'unknown', "BRAF status not documented")
+
+
+def _braf_wild_type(case_data: dict, evaluation: dict):
+    braf_result = _braf_result(case_data)
+    if not braf_result:
+        return
+    if 'wild type' in braf_result or 'negative' in braf_result:
+        _set(evaluation, 'met', f"BRAF: {braf_result}")
+    else:
+        _set(evaluation, 'unmet', f"BRAF mutation detected: {braf_result}")
+
+
+def _prior_treatments(case_data: dict) -> Tuple[bool, list]:
+    prior_therapy = case_data.get('prior_therapy', {})
+    return prior_therapy.get('has_prior_systemic', False), prior_therapy.get('treatments', [])
+
+
+def _no_prior_therapy(case_data: dict, evaluation: dict):
+    has_prior, treatments = _prior_treatments(case_data)
+    if not has_prior or len(treatments) == 0 or all('no prior' in t.lower() for t in treatments):
+        _set(evaluation, 'met', "No prior systemic therapy documented")
+    else:
+        _set(evaluation, 'unmet', f"Prior treatments: {', '.join(treatments)}")
+
+
+def _prior_therapy_required(case_data: dict, evaluation: dict):
+    has_prior, treatments = _prior_treatments(case_data)
+    if has_prior and len(treatments) > 0:
+        _set(evaluation, 'met', f"Prior treatments: {', '.join(treatments)}")
+    else:
+        _set(evaluation, 'unmet', "No prior therapy documented")
+
+
+def _make_ecog_max(max_value: int) -> Predicate:
+    def predicate(case_data: dict, evaluation: dict):
+        ecog = case_data.get('performance_status', {}).get('ecog', '')
+        try:
+            ecog_value = int(str(ecog).strip())
+        except ValueError:
+            _set(evaluation, 'unknown', "ECOG Performance Status not clearly documented")
+            return
+        if ecog_value <= max_value:
+            _set(evaluation, 'met', f"ECOG Performance Status: {ecog_value}")
+        else:
+            _set(evaluation, 'unmet', f"ECOG {ecog_value} exceeds 0-{max_value} requirement")
+
+    return predicate
+
+
+def _has_brain_mets(case_data: dict) -> bool:
+    metastatic_sites = case_data.get('disease_stage', {}).get('metastatic_sites', [])
+    return any('brain' in site.lower() for site in metastatic_sites)
+
+
+def _no_active_brain_mets(case_data: dict, evaluation: dict):
+    if not _has_brain_mets(case_data):
+        _set(evaluation, 'met', "No brain metastases documented")
+    else:
+        _set(evaluation, 'unknown', "Brain metastases present - stability status needs verification")
+
+
+def _brain_mets_required(case_data: dict, evaluation: dict):
+    if _has_brain_mets(case_data):
+        _set(evaluation, 'met', "Brain metastases documented")
+    else:
+        _set(evaluation, 'unmet', "No brain metastases documented")
+
+
+def _compile_stage(desc: str) -> dict:
+    if 'stage iv' in desc or 'stage 4' in desc or 'metastatic' in desc:
+        return {'kind': 'stage_min', 'min_stage': 4, 'predicate': _stage_iv_required}
+    if 'stage iii' in desc or 'stage 3' in desc:
+        return {'kind': 'stage_min', 'min_stage': 3, 'predicate': _stage_iii_required}
+    return {}
+
+
+def _compile_biomarker(desc: str) -> dict:
+    if 'pd-l1' in desc or 'pdl1' in desc:
+        threshold_match = PDL1_THRESHOLD_PATTERN.search(desc)
+        if threshold_match:
+            threshold = float(threshold_match.group(1) or threshold_match.group(2))
+            return {'kind': 'pd_l1_threshold', 'threshold': threshold, 'predicate': _make_pd_l1_threshold(threshold)}
+        return {'kind': 'pd_l1_positive', 'predicate': _pd_l1_positive}
+    if 'egfr' in desc:
+        if 'no egfr' in desc or 'egfr negative' in desc or 'no' in desc:
+            return {'kind': 'egfr_absent', 'negated': True, 'predicate': _egfr_absent}
+        return {'kind': 'egfr_present', 'predicate': _egfr_present}
+    if 'alk' in desc:
+        if 'no alk' in desc or 'alk negative' in desc or 'no' in desc:
+            return {'kind': 'alk_absent', 'negated': True, 'predicate': _alk_absent}
+        return {}
+    if 'braf' in desc:
+        if 'determined' in desc:
+            return {'kind': 'braf_determined', 'predicate': _braf_determined}
+        if 'negative' in desc or 'wild type' in desc:
+            return {'kind': 'braf_wild_type', 'negated': True, 'predicate': _braf_wild_type}
+    return {}
+
+
+def _compile_prior_therapy(desc: str) -> dict:
+    if 'no prior' in desc or 'first-line' in desc or 'first line' in desc:
+        return {'kind': 'no_prior_therapy', 'negated': True, 'predicate': _no_prior_therapy}
+    return {'kind': 'prior_therapy_required', 'predicate': _prior_therapy_required}
+
+
+def _compile_clinical(desc: str) -> dict:
+    if 'ecog' in desc or 'performance status' in desc:
+        range_match = ECOG_RANGE_PATTERN.search(desc)
+        if range_match:
+            max_value = int(range_match.group(1))
+            return {'kind': 'ecog_max', 'max_value': max_value, 'predicate': _make_ecog_max(max_value)}
+        return {}
+    if 'brain metastases' in desc or 'brain metastasis' in desc:
+        if 'no active brain' in desc:
+            return {'kind': 'no_active_brain_mets', 'negated': True, 'predicate': _no_active_brain_mets}
+        return {'kind': 'brain_mets_required', 'predicate': _brain_mets_required}
+    return {}
+
+
+CRITERION_COMPILERS = {
+    'stage': _compile_stage,
+    'biomarker': _compile_biomarker,
+    'prior_therapy': _compile_prior_therapy,
+    'clinical': _compile_clinical,
+}
+
+
+def compile_criterion(criterion: dict) -> CompiledCriterion:
+    compiler = CRITERION_COMPILERS.get(criterion['type'])
+    spec = compiler(criterion['description'].lower()) if compiler else {}
+    return CompiledCriterion(
+        id=criterion['id'],
+        description=criterion['description'],
+        type=criterion['type'],
+        required=criterion.get('required', True),
+        kind=spec.get('kind', 'unparsed'),
+        predicate=spec.get('predicate', _unparsed),
+        threshold=spec.get('threshold'),
+        min_stage=spec.get('min_stage'),
+        max_value=spec.get('max_value'),
+        negated=spec.get('negated', False)
+    )
+
+
+def policy_version(policy: dict) -> str:
+    # A hash of everything the compiled criteria and the letter templates can
+    # read. created_at only has one-second resolution, so two writes in the
+    # same second would otherwise share a version.
+    content = {key: value for key, value in policy.items() if key != 'created_at'}
+    payload = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def compile_policy(policy: dict) -> CompiledPolicy:
+    criteria = [compile_criterion(c) for c in policy.get('criteria', [])]
+    unparsed = [
+        {'id': c.id, 'type': c.type, 'description': c.description}
+        for c in criteria if c.kind == 'unparsed'
+    ]
+    for item in unparsed:
+        logger.warning(
+            "Policy %s criterion %s (%s) could not be compiled and will always evaluate to 'unknown': %s",
+            policy.get('id'), item['id'], item['type'], item['description']
+        )
+    return CompiledPolicy(
+        policy_id=policy.get('id', ''),
+        version=policy_version(policy),
+        criteria=criteria,
+        unparsed=unparsed
+    )
+
+
+_compiled_policies: Dict[Tuple[str, str], CompiledPolicy] = {}
+_compiled_policies_lock = threading.Lock()
+
+
+def get_compiled_policy(policy: dict) -> CompiledPolicy:
+    key = (policy.get('id', ''), policy_version(policy))
+    compiled = _compiled_policies.get(key)
+    if compiled is None:
+        compiled = compile_policy(policy)
+        with _compiled_policies_lock:
+            _compiled_policies[key] = compiled
+    return compiled
+
+
+def describe_compiled_policy(compiled: CompiledPolicy) -> dict:
+    return {
+        'policy_id': compiled.policy_id,
+        'version': compiled.version,
+        'criteria': [
+            {
+                'id': c.id,
+                'type': c.type,
+                'kind': c.kind,
+                'required': c.required,
+                'threshold': c.threshold,
+                'min_stage': c.min_stage,
+                'max_value': c.max_value,
+                'negated': c.negated
+            }
+            for c in compiled.criteria
+        ],
+        'unparsed': compiled.unparsed
+    }
+
+
+def invalidate_compiled_policy(policy_id: Optional[str] = None):
+    with _compiled_policies_lock:
+        for key in list(_compiled_policies):
+            if policy_id is None or key[0] == policy_id:
+                del _compiled_policies[key]
+
+
+on_policy_change(invalidate_compiled_policy)
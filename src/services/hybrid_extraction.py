@@ -0,0 +1,159 @@
+import copy
+import os
+from typing import Any, Dict, List, Optional
+
+from src.services.criteria_compiler import get_compiled_policy
+
+MISSING_VALUES = ('', 'n/a', 'not tested')
+
+# Fields the hybrid extractor can fill. Each maps to its part of the extraction
+# schema and, for grouped fields, the key that decides whether the group was found.
+FIELD_SCHEMA = {
+    'patient_info.name': ("patient name", None),
+    'patient_info.dob': ("date of birth", None),
+    'patient_info.member_id': ("member ID", None),
+    'diagnosis.primary': ("primary diagnosis", None),
+    'diagnosis.icd10': ("ICD-10 code(s)", None),
+    'diagnosis.histology': ("histology type if applicable", None),
+    'disease_stage.stage': ("cancer stage (e.g., Stage IV)", None),
+    'disease_stage.tnm': ("TNM staging if available", None),
+    'disease_stage.metastatic_sites': (["list of metastatic sites"], None),
+    'biomarkers.pd_l1': ({
+        "status": "positive/negative/pending/not tested",
+        "value": "TPS percentage if available",
+        "test_date": "date of test"
+    }, 'status'),
+    'biomarkers.egfr': ({
+        "status": "wild type/mutated/pending/not tested",
+        "mutation": "specific mutation if detected"
+    }, 'status'),
+    'biomarkers.alk': ({"status": "positive/negative/pending/not tested"}, 'status'),
+    'biomarkers.other_markers': ([{"name": "marker name", "result": "result"}], None),
+    'labs': ({
+        "wbc": "value with unit",
+        "hemoglobin": "value with unit",
+        "platelets": "value with unit",
+        "creatinine": "value with unit",
+        "alt": "value with unit",
+        "ast": "value with unit",
+        "other": ["other relevant labs"]
+    }, None),
+    'performance_status.ecog': ("ECOG score (0-4)", None),
+    'performance_status.description': ("brief description", None),
+    'prior_therapy': ({
+        "has_prior_systemic": "true/false",
+        "treatments": ["list of prior treatments"],
+        "immunotherapy_history": "description or 'none'"
+    }, 'treatments'),
+    'comorbidities': (["list of comorbidities"], None),
+    'requesting_provider.name': ("provider name", None),
+    'requesting_provider.npi': ("NPI number", None),
+    'requesting_provider.facility': ("facility name", None),
+    'drug_requested.name': ("drug name", None),
+    'drug_requested.dose': ("dose and frequency", None),
+    'drug_requested.duration': ("requested duration", None),
+}
+
+# Always worth an LLM call when the regex pass leaves them empty.
+BASE_FIELDS = [
+    'patient_info.name', 'patient_info.dob', 'patient_info.member_id',
+    'diagnosis.primary', 'diagnosis.icd10', 'drug_requested.name'
+] + [f.strip() for f in os.environ.get("PA_HYBRID_EXTRACTION_FIELDS", "").split(',') if f.strip()]
+
+# Fields each compiled criterion kind reads; only the policy's own criteria
+# decide which of these are requested.
+CRITERION_FIELDS = {
+    'stage_min': ['disease_stage.stage'],
+    'pd_l1_threshold': ['biomarkers.pd_l1'],
+    'pd_l1_positive': ['biomarkers.pd_l1'],
+    'egfr_absent': ['biomarkers.egfr'],
+    'egfr_present': ['biomarkers.egfr'],
+    'alk_absent': ['biomarkers.alk'],
+    'braf_determined': ['biomarkers.other_markers'],
+    'braf_wild_type': ['biomarkers.other_markers'],
+    'no_prior_therapy': ['prior_therapy'],
+    'prior_therapy_required': ['prior_therapy'],
+    'ecog_max': ['performance_status.ecog'],
+    'no_active_brain_mets': ['disease_stage.metastatic_sites'],
+    'brain_mets_required': ['disease_stage.metastatic_sites'],
+}
+
+
+def get_path(data: dict, path: str) -> Any:
+    value = data
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def set_path(data: dict, path: str, value: Any):
+    *parents, last = path.split('.')
+    for key in parents:
+        data = data.setdefault(key, {})
+    data[last] = value
+
+
+def is_missing(value: Any, key_field: Optional[str] = None) -> bool:
+    if isinstance(value, dict):
+        if key_field:
+            return is_missing(value.get(key_field))
+        return all(is_missing(v) for v in value.values())
+    if isinstance(value, list):
+        return len(value) == 0
+    if isinstance(value, str):
+        return value.strip().lower() in MISSING_VALUES
+    return value is None
+
+
+def fields_for_policy(policy: Optional[dict]) -> List[str]:
+    fields = list(BASE_FIELDS)
+    if policy:
+        for criterion in get_compiled_policy(policy).criteria:
+            fields += CRITERION_FIELDS.get(criterion.kind, [])
+    return [f for f in dict.fromkeys(fields) if f in FIELD_SCHEMA]
+
+
+def find_missing_fields(data: dict, fields: List[str]) -> List[str]:
+    return [path for path in fields if is_missing(get_path(data, path), FIELD_SCHEMA[path][1])]
+
+
+def build_trimmed_schema(paths: List[str]) -> dict:
+    schema = {}
+    for path in FIELD_SCHEMA:
+        if path in paths:
+            set_path(schema, path, copy.deepcopy(FIELD_SCHEMA[path][0]))
+    return schema
+
+
+def merge_extraction(regex_data: dict, llm_data: Optional[dict], requested: List[str]) -> dict:
+    """Fill the requested fields from the LLM answer and record where each field came from."""
+    merged = copy.deepcopy(regex_data)
+    merged.pop('_demo_mode', None)
+    provenance: Dict[str, str] = {}
+    for path, (_, key_field) in FIELD_SCHEMA.items():
+        if not is_missing(get_path(regex_data, path), key_field):
+            provenance[path] = 'regex'
+            continue
+        if path not in requested:
+            provenance[path] = 'not_requested'
+            continue
+        value = get_path(llm_data or {}, path)
+        if is_missing(value, key_field):
+            provenance[path] = 'missing'
+            continue
+        current = get_path(merged, path)
+        if isinstance(current, dict) and isinstance(value, dict):
+            value = {**current, **value}
+        set_path(merged, path, value)
+        provenance[path] = 'llm'
+    merged['_provenance'] = provenance
+    return merged
+
+
+def summarize_provenance(data: dict) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for source in (data.get('_provenance') or {}).values():
+        counts[source] = counts.get(source, 0) + 1
+    return counts
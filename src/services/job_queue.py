@@ -0,0 +1,150 @@
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from src.services.pipeline import run_case_pipeline, reserve_case, release_case, CaseProcessingError
+
+JOB_WORKERS = int(os.environ.get("PA_JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.environ.get("PA_JOB_QUEUE_SIZE", "500"))
+MAX_FINISHED_JOBS = int(os.environ.get("PA_MAX_FINISHED_JOBS", "1000"))
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+_jobs: "OrderedDict[str, dict]" = OrderedDict()
+_active_jobs_by_case: Dict[str, str] = {}
+_job_signals: Dict[str, asyncio.Event] = {}
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _publish(job: dict, stage: str, details: str = ""):
+    job['stage'] = stage
+    job['events'].append({
+        'stage': stage,
+        'details': details,
+        'timestamp': datetime.now().isoformat()
+    })
+    signal = _job_signals.get(job['id'])
+    _job_signals[job['id']] = asyncio.Event()
+    if signal:
+        signal.set()
+
+
+def _prune_finished_jobs():
+    finished = [job_id for job_id, job in _jobs.items() if job['status'] in TERMINAL_STATUSES]
+    for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        _jobs.pop(job_id, None)
+        _job_signals.pop(job_id, None)
+
+
+def enqueue_case_job(case_id: str) -> dict:
+    if _queue is None:
+        raise RuntimeError("Job workers are not running")
+
+    active_job_id = _active_jobs_by_case.get(case_id)
+    if active_job_id and active_job_id in _jobs:
+        return _jobs[active_job_id]
+    if not reserve_case(case_id):
+        raise CaseProcessingError("Case is already being processed by a batch run", status_code=409)
+
+    job = {
+        'id': uuid.uuid4().hex,
+        'case_id': case_id,
+        'status': 'queued',
+        'stage': None,
+        'events': [],
+        'result': None,
+        'error': None,
+        'created_at': datetime.now().isoformat(),
+        'started_at': None,
+        'finished_at': None
+    }
+    try:
+        _queue.put_nowait(job['id'])
+    except asyncio.QueueFull:
+        release_case(case_id)
+        raise JobQueueFull(f"Job queue is full ({JOB_QUEUE_SIZE} jobs waiting)")
+
+    _jobs[job['id']] = job
+    _active_jobs_by_case[case_id] = job['id']
+    _publish(job, 'job_queued', f"Queued processing for case {case_id}")
+    _prune_finished_jobs()
+    return job
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    return _jobs.get(job_id)
+
+
+async def stream_job_events(job_id: str) -> AsyncIterator[dict]:
+    sent = 0
+    while True:
+        job = _jobs.get(job_id)
+        if not job:
+            return
+        signal = _job_signals.get(job_id)
+        while sent < len(job['events']):
+            yield job['events'][sent]
+            sent += 1
+        if job['status'] in TERMINAL_STATUSES:
+            return
+        if signal:
+            await signal.wait()
+
+
+async def _run_job(job: dict):
+    job['status'] = 'running'
+    job['started_at'] = datetime.now().isoformat()
+    try:
+        job['result'] = await run_case_pipeline(
+            job['case_id'],
+            on_progress=lambda stage, details: _publish(job, stage, details)
+        )
+        job['status'] = 'completed'
+        job['finished_at'] = datetime.now().isoformat()
+        _publish(job, 'job_completed', "Case processed successfully")
+    except Exception as e:
+        job['error'] = e.message if isinstance(e, CaseProcessingError) else str(e)
+        job['status'] = 'failed'
+        job['finished_at'] = datetime.now().isoformat()
+        _publish(job, 'job_failed', job['error'])
+    finally:
+        if _active_jobs_by_case.get(job['case_id']) == job['id']:
+            del _active_jobs_by_case[job['case_id']]
+        release_case(job['case_id'])
+
+
+async def _worker():
+    while True:
+        job_id = await _queue.get()
+        try:
+            job = _jobs.get(job_id)
+            if job:
+                await _run_job(job)
+        finally:
+            _queue.task_done()
+
+
+async def start_job_workers():
+    global _queue
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+    for _ in range(JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_job_workers():
+    global _queue
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
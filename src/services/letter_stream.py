@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Tuple
+
+from src.models.database import case_unit_of_work
+from src.services.model_router import route_model
+from src.services.openai_client import LETTER_MARKERS, stream_letters_async
+
+TTFT_SAMPLE_SIZE = int(os.environ.get("PA_TTFT_SAMPLE_SIZE", "500"))
+
+_ttft_samples = deque(maxlen=TTFT_SAMPLE_SIZE)
+_counters = {'streams': 0, 'failures': 0, 'fallbacks': 0}
+_stats_lock = threading.Lock()
+
+
+class LetterStreamParser:
+    """Split the streamed model output into provider and member letter text.
+
+    Headings may arrive split across chunks, so any tail that could still turn
+    into a heading is held back until the next chunk decides it.
+    """
+
+    def __init__(self):
+        self.letters = {letter: '' for letter in LETTER_MARKERS}
+        self.current = None
+        self._pending = ''
+        self._markers = {marker: letter for letter, marker in LETTER_MARKERS.items()}
+
+    def _held_back(self) -> int:
+        for size in range(min(len(self._pending), max(map(len, self._markers))), 0, -1):
+            tail = self._pending[-size:]
+            if any(marker.startswith(tail) for marker in self._markers):
+                return size
+        return 0
+
+    def _emit(self, text: str) -> List[Tuple[str, str]]:
+        if not text or self.current is None:
+            return []
+        self.letters[self.current] += text
+        return [(self.current, text)]
+
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        self._pending += delta
+        tokens = []
+        while True:
+            found = [(self._pending.find(marker), marker) for marker in self._markers]
+            found = [(index, marker) for index, marker in found if index != -1]
+            if not found:
+                break
+            index, marker = min(found)
+            tokens += self._emit(self._pending[:index])
+            self.current = self._markers[marker]
+            self._pending = self._pending[index + len(marker):]
+        held = self._held_back()
+        tokens += self._emit(self._pending[:len(self._pending) - held])
+        self._pending = self._pending[len(self._pending) - held:]
+        return tokens
+
+    def finish(self) -> List[Tuple[str, str]]:
+        tokens = self._emit(self._pending)
+        self._pending = ''
+        return tokens
+
+
+def _record_stream(ttft_ms: float):
+    with _stats_lock:
+        _counters['streams'] += 1
+        _ttft_samples.append(ttft_ms)
+
+
+def _record_fallback():
+    with _stats_lock:
+        _counters['fallbacks'] += 1
+
+
+def _record_failure():
+    with _stats_lock:
+        _counters['failures'] += 1
+
+
+def get_letter_stream_stats() -> dict:
+    with _stats_lock:
+        samples = sorted(_ttft_samples)
+        counters = dict(_counters)
+    if not samples:
+        return {**counters, 'ttft_ms': None}
+    return {
+        **counters,
+        'ttft_ms': {
+            'samples': len(samples),
+            'avg': round(sum(samples) / len(samples), 1),
+            'p50': samples[len(samples) // 2],
+            'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'max': samples[-1]
+        }
+    }
+
+
+async def stream_case_letters(case: dict, policy: dict) -> AsyncIterator[Dict]:
+    started = time.perf_counter()
+    ttft_ms = None
+    fallback = None
+    parser = LetterStreamParser()
+    yield {'stage': 'letters_started', 'details': "Drafting provider and member letters"}
+
+    try:
+        route = route_model('letters', case.get('complexity'), policy)
+        async for delta in stream_letters_async(case['extracted_data'], policy, case['ai_recommendation'], route):
+            if isinstance(delta, dict):
+                fallback = delta.get('_fallback')
+                continue
+            if ttft_ms is None and not fallback:
+                ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+            for letter, text in parser.feed(delta):
+                yield {'stage': 'letter_token', 'letter': letter, 'text': text}
+        for letter, text in parser.finish():
+            yield {'stage': 'letter_token', 'letter': letter, 'text': text}
+    except Exception as e:
+        _record_failure()
+        yield {'stage': 'letters_failed', 'details': str(e)}
+        return
+
+    letters = {letter: text.strip() for letter, text in parser.letters.items()}
+    if not all(letters.values()):
+        _record_failure()
+        yield {'stage': 'letters_failed', 'details': "Model response did not contain both letters"}
+        return
+
+    total_ms = round((time.perf_counter() - started) * 1000, 1)
+    with case_unit_of_work(case['id']) as uow:
+        updates = {
+            'provider_letter': letters['provider'],
+            'member_letter': letters['member']
+        }
+        if fallback:
+            # Template letters are not a model stream, so they stay out of the TTFT samples.
+            stages = [stage for stage in (case.get('fallback_stages') or '').split(',') if stage]
+            updates['fallback_stages'] = ','.join(dict.fromkeys(stages + ['letters']))
+            uow.add_audit_log("stage_fallback", "letters: circuit breaker open; used the deterministic pipeline")
+            uow.add_audit_log("letters_streamed", f"Letters redrafted from templates ({total_ms} ms total)", total_ms)
+        else:
+            uow.add_audit_log("letters_streamed", f"Letters redrafted (first token after {ttft_ms} ms, {total_ms} ms total)", total_ms)
+        uow.update_case(updates)
+    if fallback:
+        _record_fallback()
+    else:
+        _record_stream(ttft_ms)
+
+    yield {
+        'stage': 'letters_completed',
+        'details': "Provider and member letters saved",
+        'ttft_ms': ttft_ms,
+        'fallback': bool(fallback),
+        'total_ms': total_ms,
+        'provider_letter': letters['provider'],
+        'member_letter': letters['member']
+    }
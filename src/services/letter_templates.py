@@ -0,0 +1,111 @@
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+from src.models.database import on_policy_change
+from src.services.criteria_compiler import policy_version
+
+LETTER_TEMPLATES_DIR = Path(__file__).resolve().parents[2] / "templates" / "letters"
+LETTER_AUDIENCES = ('provider', 'member')
+
+# Case-specific parts of a letter. Everything else depends only on the policy
+# and decision, so it is rendered once per policy and reused.
+LETTER_SLOTS = ('reasons', 'rationale', 'information_gaps')
+SLOT_MARKER = '\x00'
+
+_env = Environment(
+    loader=FileSystemLoader(str(LETTER_TEMPLATES_DIR)),
+    autoescape=False,
+    undefined=StrictUndefined
+)
+_skeletons: Dict[Tuple[str, str, str, str], List[str]] = {}
+_skeletons_lock = threading.Lock()
+
+
+def letter_decision(recommendation: dict) -> str:
+    decision = (recommendation.get('recommendation') or 'pend').lower()
+    return decision if decision in ('approve', 'deny') else 'pend'
+
+
+def _render_skeleton(policy: dict, decision: str, audience: str) -> List[str]:
+    # A policy can override any letter with templates/letters/<policy id>/<decision>_<audience>.txt.
+    template = _env.select_template([
+        f"{policy.get('id')}/{decision}_{audience}.txt",
+        f"{decision}_{audience}.txt"
+    ])
+    text = template.render(
+        policy=policy,
+        drug_name=policy.get('drug_name', 'the requested medication'),
+        indication=policy.get('indication', 'the stated indication'),
+        **{slot: f"{SLOT_MARKER}{slot}{SLOT_MARKER}" for slot in LETTER_SLOTS}
+    )
+    # Even positions are literal text, odd positions are slot names.
+    return text.split(SLOT_MARKER)
+
+
+def get_letter_skeleton(policy: dict, decision: str, audience: str) -> List[str]:
+    key = (policy.get('id'), policy_version(policy), decision, audience)
+    with _skeletons_lock:
+        skeleton = _skeletons.get(key)
+    if skeleton is None:
+        skeleton = _render_skeleton(policy, decision, audience)
+        with _skeletons_lock:
+            _skeletons[key] = skeleton
+    return skeleton
+
+
+def invalidate_letter_templates(policy_id: Optional[str] = None):
+    with _skeletons_lock:
+        if policy_id is None:
+            _skeletons.clear()
+        else:
+            for key in [k for k in _skeletons if k[0] == policy_id]:
+                del _skeletons[key]
+
+
+on_policy_change(invalidate_letter_templates)
+
+
+def letter_slots_needed(policy: dict, decision: str) -> List[str]:
+    slots = []
+    for audience in LETTER_AUDIENCES:
+        slots += get_letter_skeleton(policy, decision, audience)[1::2]
+    return list(dict.fromkeys(slots))
+
+
+def _bullets(items: List[str]) -> str:
+    return '\n'.join(f"  - {item}" for item in items)
+
+
+def default_letter_slots(recommendation: dict) -> Dict[str, str]:
+    reasons = recommendation.get('primary_reasons', [])
+    reasons_text = _bullets(reasons) if reasons else "  - See clinical rationale"
+    decision = letter_decision(recommendation)
+    if decision == 'approve':
+        rationale = reasons_text
+    else:
+        rationale = recommendation.get(
+            'clinical_rationale', 'The submitted documentation does not meet the required coverage criteria.'
+        )
+    return {
+        'reasons': reasons_text,
+        'rationale': rationale,
+        'information_gaps': _bullets(recommendation.get('information_gaps', ['Additional clinical documentation']))
+    }
+
+
+def render_letter(policy: dict, decision: str, audience: str, slots: Dict[str, str]) -> str:
+    parts = get_letter_skeleton(policy, decision, audience)
+    return ''.join(part if index % 2 == 0 else slots[part] for index, part in enumerate(parts))
+
+
+def render_letters(policy: dict, recommendation: dict, slots: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Render both letters, filling slots from `slots` first and the recommendation otherwise."""
+    decision = letter_decision(recommendation)
+    filled = {**default_letter_slots(recommendation), **(slots or {})}
+    return {
+        f"{audience}_letter": render_letter(policy, decision, audience, filled)
+        for audience in LETTER_AUDIENCES
+    }
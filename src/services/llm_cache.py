@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from src.models.database import get_llm_cache_entry, put_llm_cache_entry, get_llm_cache_summary, clear_llm_cache
+
+LLM_CACHE_ENABLED = os.environ.get("PA_LLM_CACHE_ENABLED", "1") != "0"
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("PA_LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("PA_LLM_CACHE_MAX_ENTRIES", "5000"))
+
+_counters = {'hits': 0, 'misses': 0, 'stores': 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name: str):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def make_cache_key(model: str, system_prompt: str, user_prompt: str) -> str:
+    payload = json.dumps([model, system_prompt, user_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_response(cache_key: str) -> Optional[dict]:
+    if not LLM_CACHE_ENABLED:
+        return None
+    entry = get_llm_cache_entry(cache_key, time.time())
+    if entry is None:
+        _count('misses')
+        return None
+    _count('hits')
+    return entry['response']
+
+
+def store_response(cache_key: str, stage: str, model: str, response: dict):
+    if not LLM_CACHE_ENABLED or 'error' in response:
+        return
+    put_llm_cache_entry(
+        cache_key, stage, model, response, time.time(),
+        LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES
+    )
+    _count('stores')
+
+
+def get_cache_stats() -> dict:
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = counters['hits'] + counters['misses']
+    return {
+        'enabled': LLM_CACHE_ENABLED,
+        'ttl_seconds': LLM_CACHE_TTL_SECONDS,
+        'max_entries': LLM_CACHE_MAX_ENTRIES,
+        **counters,
+        'hit_rate': round(counters['hits'] / lookups, 3) if lookups else 0,
+        **get_llm_cache_summary()
+    }
+
+
+def clear_cache():
+    clear_llm_cache()
+    with _counters_lock:
+        for name in _counters:
+            _counters[name] = 0
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import weakref
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import openai
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("PA_OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+OPENAI_READ_TIMEOUT_SECONDS = float(os.environ.get("PA_OPENAI_READ_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_RETRIES = int(os.environ.get("PA_OPENAI_MAX_RETRIES", "3"))
+OPENAI_BACKOFF_BASE_SECONDS = float(os.environ.get("PA_OPENAI_BACKOFF_BASE_SECONDS", "0.5"))
+OPENAI_BACKOFF_MAX_SECONDS = float(os.environ.get("PA_OPENAI_BACKOFF_MAX_SECONDS", "20"))
+# A Retry-After longer than this fails the call instead of parking the case.
+OPENAI_RETRY_AFTER_MAX_SECONDS = float(os.environ.get("PA_OPENAI_RETRY_AFTER_MAX_SECONDS", "60"))
+
+RETRYABLE_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+T = TypeVar("T")
+
+# One client per event loop (its connection pool belongs to the loop that
+# opened it), so connections and TLS sessions are reused across calls.
+# Retries are done here, not by the SDK.
+_client_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _client_settings() -> Optional[tuple]:
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    return api_key, os.environ.get("OPENAI_BASE_URL")
+
+
+def _client_options(settings: tuple) -> dict:
+    return {
+        'api_key': settings[0],
+        'base_url': settings[1],
+        'timeout': openai.Timeout(OPENAI_READ_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+        'max_retries': 0
+    }
+
+
+def get_async_openai_client() -> Optional[AsyncOpenAI]:
+    settings = _client_settings()
+    if settings is None:
+        return None
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        cached = _async_clients.get(loop)
+        if cached is None or cached[0] != settings:
+            cached = _async_clients[loop] = (settings, AsyncOpenAI(**_client_options(settings)))
+        return cached[1]
+
+
+async def close_openai_clients():
+    with _client_lock:
+        cached = _async_clients.pop(asyncio.get_running_loop(), None)
+    if cached is not None:
+        await cached[1].close()
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    milliseconds = response.headers.get('retry-after-ms')
+    if milliseconds:
+        try:
+            return float(milliseconds) / 1000
+        except ValueError:
+            pass
+    value = response.headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES
+
+
+def retry_delay(attempt: int, error: Exception) -> Optional[float]:
+    """Seconds to wait before retrying after `attempt` failed attempts, or None to give up."""
+    if attempt > OPENAI_MAX_RETRIES or not is_retryable(error):
+        return None
+    # Full jitter keeps concurrent callers from retrying in lockstep.
+    backoff = random.uniform(0, min(OPENAI_BACKOFF_MAX_SECONDS, OPENAI_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
+    retry_after = _retry_after_seconds(error)
+    if retry_after is None:
+        return backoff
+    if retry_after > OPENAI_RETRY_AFTER_MAX_SECONDS:
+        return None
+    return retry_after + random.uniform(0, OPENAI_BACKOFF_BASE_SECONDS)
+
+
+def _log_retry(stage: str, attempt: int, error: Exception, delay: float):
+    logger.warning("%s call failed (%s), retry %d/%d in %.2fs", stage, error, attempt, OPENAI_MAX_RETRIES, delay)
+
+
+async def call_with_retries_async(stage: str, call: Callable[[], Awaitable[T]]) -> T:
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except openai.OpenAIError as e:
+            attempt += 1
+            delay = retry_delay(attempt, e)
+            if delay is None:
+                raise
+            _log_retry(stage, attempt, e, delay)
+            await asyncio.sleep(delay)
@@ -0,0 +1,200 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from src.services.telemetry import LLM_QUEUE_WAIT
+
+# Account limits for the model, shared by every call in the process. 0 turns a
+# limit off. The defaults are OpenAI's tier-1 gpt-4o limits.
+LLM_RPM_LIMIT = int(os.environ.get("PA_LLM_RPM_LIMIT", "500"))
+LLM_TPM_LIMIT = int(os.environ.get("PA_LLM_TPM_LIMIT", "30000"))
+CHARS_PER_TOKEN = 4
+# Upper bound on how long a waiter sleeps before re-checking, in case a wake-up is missed.
+MAX_WAIT_SLICE_SECONDS = 1.0
+
+# Lower runs first. The pipeline sets it to the case's creation time, so with a
+# single turnaround SLA the case closest to its deadline gets capacity first.
+_priority: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_priority", default=None)
+
+
+def estimate_tokens(*texts: str) -> int:
+    return max(1, sum(len(text) for text in texts) // CHARS_PER_TOKEN)
+
+
+def case_priority(created_at: Optional[str]) -> float:
+    # created_at is stored as naive UTC; .timestamp() alone would read it as local time.
+    try:
+        created = datetime.fromisoformat(created_at)
+    except (TypeError, ValueError):
+        return time.time()
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created.timestamp()
+
+
+@contextmanager
+def llm_priority(priority: float) -> Iterator[None]:
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until(self, amount: float) -> float:
+        # Requests bigger than the whole bucket go through once it is full.
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.rate)
+
+
+class _Waiter:
+    def __init__(self, priority: float, seq: int, tokens: int, stage: str, loop: asyncio.AbstractEventLoop):
+        self.key = (priority, seq)
+        self.tokens = tokens
+        self.stage = stage
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return self.key < other.key
+
+    def wake(self):
+        # Waiters may belong to different event loops, so wake them through their own.
+        self.loop.call_soon_threadsafe(self.event.set)
+
+
+class LLMScheduler:
+    """Shared requests-per-minute and tokens-per-minute budget with a priority queue.
+
+    Callers wait until both buckets can cover their request, in priority order;
+    nobody is turned away.
+    """
+
+    def __init__(self, rpm_limit: int, tpm_limit: int):
+        self.requests = _TokenBucket(rpm_limit)
+        self.tokens = _TokenBucket(tpm_limit)
+        self._queue: List[_Waiter] = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._stats = {'granted': 0, 'waited': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+    def _enqueue(self, stage: str, tokens: int, loop: asyncio.AbstractEventLoop) -> _Waiter:
+        priority = _priority.get()
+        waiter = _Waiter(time.time() if priority is None else priority, next(self._seq), tokens, stage, loop)
+        with self._lock:
+            heapq.heappush(self._queue, waiter)
+        return waiter
+
+    def _try_acquire(self, waiter: _Waiter) -> Optional[float]:
+        """Take capacity if `waiter` is next and it is available; otherwise return how long to wait."""
+        with self._lock:
+            if self._queue[0] is not waiter:
+                return MAX_WAIT_SLICE_SECONDS
+            now = time.monotonic()
+            wait = 0.0
+            for bucket, amount in ((self.requests, 1), (self.tokens, waiter.tokens)):
+                if bucket.enabled:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.seconds_until(amount))
+            if wait > 0:
+                return min(wait, MAX_WAIT_SLICE_SECONDS)
+            if self.requests.enabled:
+                self.requests.level -= 1
+            if self.tokens.enabled:
+                self.tokens.level -= min(waiter.tokens, self.tokens.capacity)
+            heapq.heappop(self._queue)
+            self._record_grant(now - waiter.enqueued)
+            next_waiter = self._queue[0] if self._queue else None
+        LLM_QUEUE_WAIT.observe((waiter.stage,), now - waiter.enqueued)
+        if next_waiter:
+            next_waiter.wake()
+        return None
+
+    def _record_grant(self, waited: float):
+        self._stats['granted'] += 1
+        if waited > 0.001:
+            self._stats['waited'] += 1
+        self._stats['wait_seconds'] += waited
+        self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+
+    def _abandon(self, waiter: _Waiter):
+        with self._lock:
+            if waiter not in self._queue:
+                return
+            was_next = self._queue[0] is waiter
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+            next_waiter = self._queue[0] if was_next and self._queue else None
+        if next_waiter:
+            next_waiter.wake()
+
+    async def acquire_async(self, stage: str, tokens: int):
+        waiter = self._enqueue(stage, tokens, asyncio.get_running_loop())
+        try:
+            while True:
+                waiter.event.clear()
+                delay = self._try_acquire(waiter)
+                if delay is None:
+                    return
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Charge the difference between the estimate and what the call really used."""
+        if actual_tokens is None or not self.tokens.enabled:
+            return
+        with self._lock:
+            self.tokens.refill(time.monotonic())
+            self.tokens.level -= actual_tokens - min(estimated_tokens, self.tokens.capacity)
+            next_waiter = self._queue[0] if self._queue and actual_tokens < estimated_tokens else None
+        if next_waiter:
+            next_waiter.wake()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            queued = len(self._queue)
+        return {
+            'rpm_limit': int(self.requests.capacity),
+            'tpm_limit': int(self.tokens.capacity),
+            'queued': queued,
+            'granted': stats['granted'],
+            'waited': stats['waited'],
+            'avg_wait_ms': round(stats['wait_seconds'] / stats['granted'] * 1000, 1) if stats['granted'] else 0,
+            'max_wait_ms': round(stats['max_wait_seconds'] * 1000, 1)
+        }
+
+
+scheduler = LLMScheduler(LLM_RPM_LIMIT, LLM_TPM_LIMIT)
+
+
+def get_scheduler_stats() -> dict:
+    return scheduler.stats()
@@ -0,0 +1,46 @@
+import time
+from typing import Any, Optional
+
+from src.models.database import add_llm_usage, get_llm_usage_summary
+from src.services.model_router import estimate_cost
+
+
+def record_usage(stage: str, model: str, prompt_chars: int, usage: Any,
+                 complexity: Optional[str] = None, latency_ms: Optional[float] = None):
+    """Store the token counts the API reported for one call (usage may be None)."""
+    prompt_tokens = getattr(usage, 'prompt_tokens', None)
+    completion_tokens = getattr(usage, 'completion_tokens', None)
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', None)
+    add_llm_usage(
+        stage, model, prompt_chars, prompt_tokens, completion_tokens, cached_tokens, time.time(),
+        complexity, latency_ms
+    )
+
+
+def _route_cost(row: dict) -> Optional[float]:
+    cost = estimate_cost(row['model'], row['prompt_tokens'], row['cached_tokens'], row['completion_tokens'])
+    return round(cost, 4) if cost is not None else None
+
+
+def get_usage_stats() -> dict:
+    routes = []
+    for row in get_llm_usage_summary():
+        routes.append({
+            **row,
+            'avg_prompt_chars': round(row['avg_prompt_chars'] or 0, 1),
+            'avg_prompt_tokens': round(row['avg_prompt_tokens'], 1) if row['avg_prompt_tokens'] is not None else None,
+            'avg_completion_tokens': round(row['avg_completion_tokens'], 1) if row['avg_completion_tokens'] is not None else None,
+            'cached_share': round(row['cached_tokens'] / row['prompt_tokens'], 3) if row['prompt_tokens'] else 0,
+            'avg_latency_ms': round(row['avg_latency_ms'], 1) if row['avg_latency_ms'] is not None else None,
+            'max_latency_ms': round(row['max_latency_ms'], 1) if row['max_latency_ms'] is not None else None,
+            'estimated_cost_usd': _route_cost(row)
+        })
+    return {
+        'calls': sum(r['calls'] for r in routes),
+        'prompt_tokens': sum(r['prompt_tokens'] for r in routes),
+        'completion_tokens': sum(r['completion_tokens'] for r in routes),
+        'cached_tokens': sum(r['cached_tokens'] for r in routes),
+        'estimated_cost_usd': round(sum(r['estimated_cost_usd'] or 0 for r in routes), 4),
+        'by_stage': routes
+    }
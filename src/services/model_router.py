@@ -0,0 +1,88 @@
+import json
+import os
+from typing import Dict, NamedTuple, Optional
+
+from src.services.case_extractor import extract_case_data_sections
+from src.services.policy_engine import evaluate_criteria, calculate_complexity
+
+DEFAULT_MODEL = os.environ.get("PA_MODEL_DEFAULT", "gpt-4o")
+SMALL_MODEL = os.environ.get("PA_MODEL_SMALL", "gpt-4o-mini")
+
+ROUTED_STAGES = ('extraction', 'recommendation', 'letters')
+COMPLEXITIES = ('low', 'high')
+
+# stage -> complexity -> model. Straightforward cases go to the smaller model;
+# anything the policy engine rates high complexity stays on the default one.
+DEFAULT_ROUTES: Dict[str, Dict[str, str]] = {
+    'extraction': {'low': SMALL_MODEL, 'high': DEFAULT_MODEL},
+    'recommendation': {'low': SMALL_MODEL, 'high': DEFAULT_MODEL},
+    'letters': {'low': SMALL_MODEL, 'high': DEFAULT_MODEL}
+}
+
+# USD per million tokens: (input, cached input, output), from OpenAI's published pricing.
+MODEL_PRICES_PER_MILLION = {
+    'gpt-4o': (2.50, 1.25, 10.00),
+    'gpt-4o-mini': (0.15, 0.075, 0.60),
+    'gpt-4.1': (2.00, 0.50, 8.00),
+    'gpt-4.1-mini': (0.40, 0.10, 1.60),
+    'gpt-4.1-nano': (0.10, 0.025, 0.40)
+}
+
+
+class ModelRoute(NamedTuple):
+    model: str
+    complexity: Optional[str] = None
+
+
+def normalize_routes(routes: Dict) -> Dict[str, Dict[str, str]]:
+    """Validate a routes override; a stage may map to one model or to {complexity: model}."""
+    normalized = {}
+    for stage, target in routes.items():
+        if stage not in ROUTED_STAGES:
+            raise ValueError(f"Unknown stage '{stage}' (expected one of {', '.join(ROUTED_STAGES)})")
+        if isinstance(target, str):
+            target = {complexity: target for complexity in COMPLEXITIES}
+        if not isinstance(target, dict):
+            raise ValueError(f"Route for '{stage}' must be a model name or a mapping of complexity to model")
+        for complexity, model in target.items():
+            if complexity not in COMPLEXITIES:
+                raise ValueError(f"Unknown complexity '{complexity}' for stage '{stage}'")
+            if not isinstance(model, str) or not model:
+                raise ValueError(f"Model for '{stage}'/{complexity} must be a non-empty string")
+        normalized[stage] = dict(target)
+    return normalized
+
+
+def _merge(base: Dict[str, Dict[str, str]], override: Optional[Dict]) -> Dict[str, Dict[str, str]]:
+    merged = {stage: dict(targets) for stage, targets in base.items()}
+    for stage, targets in normalize_routes(override or {}).items():
+        merged[stage].update(targets)
+    return merged
+
+
+ROUTES = _merge(DEFAULT_ROUTES, json.loads(os.environ.get("PA_MODEL_ROUTES") or "{}"))
+
+
+def routes_for_policy(policy: Optional[Dict]) -> Dict[str, Dict[str, str]]:
+    return _merge(ROUTES, (policy or {}).get('model_routes'))
+
+
+def route_model(stage: str, complexity: Optional[str], policy: Optional[Dict] = None) -> ModelRoute:
+    """Pick the model for one stage of one case; unknown complexity routes as high."""
+    routes = routes_for_policy(policy)[stage]
+    return ModelRoute(routes.get(complexity) or routes['high'], complexity)
+
+
+def predict_complexity(pa_text: str, policy: Dict) -> str:
+    """Complexity from the regex extractor, for routing the extraction call before its result exists."""
+    return calculate_complexity(evaluate_criteria(extract_case_data_sections(pa_text), policy))
+
+
+def estimate_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> Optional[float]:
+    prices = MODEL_PRICES_PER_MILLION.get(model)
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    return (
+        (prompt_tokens - cached_tokens) * input_price + cached_tokens * cached_price + completion_tokens * output_price
+    ) / 1_000_000
@@ -1,15 +1,26 @@
+import asyncio
 import json
 import os
-import re
-from openai import OpenAI
+import time
+from typing import Any, AsyncIterator, Optional, Union
+
+from src.services.case_extractor import extract_case_data_sections
+from src.services.circuit_breaker import get_breaker
+from src.services.hybrid_extraction import (
+    fields_for_policy, find_missing_fields, build_trimmed_schema, merge_extraction
+)
+from src.services.letter_templates import render_letters, letter_slots_needed, letter_decision
+from src.services.llm_cache import make_cache_key, get_cached_response, store_response
+from src.services.llm_client import get_async_openai_client, call_with_retries_async
+from src.services.llm_scheduler import scheduler, estimate_tokens
+from src.services.llm_usage import record_usage
+from src.services.model_router import ModelRoute, DEFAULT_MODEL
 
 DEMO_MODE = not os.environ.get("OPENAI_API_KEY")
-
-def get_openai_client():
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    return OpenAI(api_key=api_key)
+# "llm" sends the whole document to the model, "hybrid" only asks it for the
+# fields the regex extractor could not find, "regex" never calls it.
+EXTRACTION_MODE = os.environ.get("PA_EXTRACTION_MODE", "llm").lower()
+DEMO_STREAM_CHUNK_CHARS = 24
 
 SYSTEM_PROMPT = """You are a clinical prior authorization co-pilot for a health plan. 
 You never make final decisions; you prepare structured summaries, recommendations, and draft letters 
@@ -24,152 +35,24 @@ You are highly knowledgeable about:
 Always be precise, evidence-based, and cite specific clinical data from the case when making assessments."""
 
 
-def extract_patient_info_demo(pa_text: str) -> dict:
-    patient_info = {"name": "N/A", "dob": "N/A", "member_id": "N/A"}
-    
-    name_match = re.search(r'Patient:\s*([^\n\(]+)', pa_text)
-    if name_match:
-        patient_info["name"] = name_match.group(1).strip()
-    
-    dob_match = re.search(r'DOB:\s*(\d{1,2}/\d{1,2}/\d{4})', pa_text)
-    if dob_match:
-        patient_info["dob"] = dob_match.group(1)
-    
-    member_match = re.search(r'Member ID:\s*([^\n]+)', pa_text)
-    if member_match:
-        patient_info["member_id"] = member_match.group(1).strip()
-    
-    return patient_info
+def extract_case_data_demo(pa_text: str) -> dict:
+    return extract_case_data_sections(pa_text)
 
 
-def extract_case_data_demo(pa_text: str) -> dict:
-    patient_info = extract_patient_info_demo(pa_text)
-    
-    diagnosis = {"primary": "N/A", "icd10": "", "histology": ""}
-    diag_match = re.search(r'Diagnosis:\s*([^\n]+)', pa_text)
-    if diag_match:
-        diagnosis["primary"] = diag_match.group(1).strip()
-    icd_match = re.search(r'ICD-10:\s*([^\n]+)', pa_text)
-    if icd_match:
-        diagnosis["icd10"] = icd_match.group(1).strip()
-    hist_match = re.search(r'Histology:\s*([^\n]+)', pa_text)
-    if hist_match:
-        diagnosis["histology"] = hist_match.group(1).strip()
-    
-    disease_stage = {"stage": "N/A", "tnm": "", "metastatic_sites": []}
-    stage_match = re.search(r'Stage[:\s]+(IV|III|II|I)[\s\(]*([^\n\)]*)', pa_text, re.IGNORECASE)
-    if stage_match:
-        disease_stage["stage"] = f"Stage {stage_match.group(1).upper()}"
-        if stage_match.group(2):
-            disease_stage["tnm"] = stage_match.group(2).strip()
-    
-    met_match = re.search(r'[Mm]etastatic sites?:\s*([^\n]+)', pa_text)
-    if met_match:
-        disease_stage["metastatic_sites"] = [s.strip() for s in met_match.group(1).split(',')]
-    
-    pd_l1 = {"status": "not tested", "value": "", "test_date": ""}
-    pdl1_match = re.search(r'PD-L1[^:]*:\s*(\d+)%', pa_text)
-    if pdl1_match:
-        value = int(pdl1_match.group(1))
-        pd_l1["status"] = "positive" if value > 0 else "negative"
-        pd_l1["value"] = f"{value}%"
-    elif "pending" in pa_text.lower() and "pd-l1" in pa_text.lower():
-        pd_l1["status"] = "pending"
-    
-    egfr = {"status": "not tested", "mutation": ""}
-    if re.search(r'EGFR[:\s]+Wild type', pa_text, re.IGNORECASE):
-        egfr["status"] = "wild type"
-    elif re.search(r'EGFR[:\s]+(Exon \d+ [^\n,]+)', pa_text, re.IGNORECASE):
-        egfr["status"] = "mutated"
-        egfr_mut = re.search(r'EGFR[:\s]+(Exon \d+ [^\n,]+)', pa_text, re.IGNORECASE)
-        if egfr_mut:
-            egfr["mutation"] = egfr_mut.group(1).strip()
-    elif "egfr" in pa_text.lower() and "pending" in pa_text.lower():
-        egfr["status"] = "pending"
-    
-    alk = {"status": "not tested"}
-    if re.search(r'ALK[:\s]+Negative', pa_text, re.IGNORECASE):
-        alk["status"] = "negative"
-    elif re.search(r'ALK[:\s]+Positive', pa_text, re.IGNORECASE):
-        alk["status"] = "positive"
-    
-    performance_status = {"ecog": "", "description": ""}
-    ecog_match = re.search(r'ECOG[:\s]+(\d)', pa_text)
-    if ecog_match:
-        performance_status["ecog"] = ecog_match.group(1)
-    perf_desc = re.search(r'ECOG[:\s]+\d+\s*[-–]\s*([^\n]+)', pa_text)
-    if perf_desc:
-        performance_status["description"] = perf_desc.group(1).strip()
-    
-    prior_therapy = {"has_prior_systemic": False, "treatments": [], "immunotherapy_history": "none"}
-    if re.search(r'No prior systemic', pa_text, re.IGNORECASE):
-        prior_therapy["has_prior_systemic"] = False
-        prior_therapy["treatments"] = ["No prior systemic therapy"]
-    elif re.search(r'Prior [Tt]reatments?:', pa_text):
-        prior_match = re.search(r'Prior [Tt]reatments?:\s*([^\n]+)', pa_text)
-        if prior_match and "no prior" not in prior_match.group(1).lower():
-            prior_therapy["has_prior_systemic"] = True
-            prior_therapy["treatments"] = [prior_match.group(1).strip()]
-    
-    comorbidities = []
-    comor_match = re.search(r'COMORBIDITIES:\s*([\s\S]*?)(?=RATIONALE|REQUESTING|$)', pa_text)
-    if comor_match:
-        comor_text = comor_match.group(1)
-        comor_lines = [line.strip().strip('-').strip() for line in comor_text.split('\n') if line.strip() and line.strip() != '-']
-        comorbidities = [c for c in comor_lines if c and len(c) > 2]
-    
-    provider = {"name": "", "npi": "", "facility": ""}
-    prov_match = re.search(r'Requesting Provider:\s*([^\n]+)', pa_text)
-    if prov_match:
-        provider["name"] = prov_match.group(1).strip()
-    npi_match = re.search(r'NPI:\s*(\d+)', pa_text)
-    if npi_match:
-        provider["npi"] = npi_match.group(1)
-    
-    drug = {"name": "", "dose": "", "duration": ""}
-    drug_match = re.search(r'MEDICATION REQUESTED:\s*([^\n]+)', pa_text)
-    if drug_match:
-        drug["name"] = drug_match.group(1).strip()
-    req_match = re.search(r'REQUESTING:\s*([^\n]+)', pa_text)
-    if req_match:
-        drug["duration"] = req_match.group(1).strip()
-    
-    return {
-        "patient_info": patient_info,
-        "diagnosis": diagnosis,
-        "disease_stage": disease_stage,
-        "biomarkers": {
-            "pd_l1": pd_l1,
-            "egfr": egfr,
-            "alk": alk,
-            "other_markers": []
-        },
-        "labs": {
-            "wbc": "",
-            "hemoglobin": "",
-            "platelets": "",
-            "creatinine": "",
-            "alt": "",
-            "ast": "",
-            "other": []
-        },
-        "performance_status": performance_status,
-        "prior_therapy": prior_therapy,
-        "comorbidities": comorbidities,
-        "requesting_provider": provider,
-        "drug_requested": drug,
-        "_demo_mode": True
-    }
+def with_model(result: dict, route: Optional[ModelRoute]) -> dict:
+    """Note which model produced a stage result, for the audit log."""
+    result['_model'] = (route or ModelRoute(DEFAULT_MODEL)).model
+    return result
 
 
-def extract_case_data(pa_text: str) -> dict:
-    if DEMO_MODE:
-        return extract_case_data_demo(pa_text)
-    
-    prompt = f"""Analyze this prior authorization request and extract structured clinical data.
+def with_fallback(result: dict, reason: str, error: str = None) -> dict:
+    """Mark a deterministic result that stood in for a model call ("circuit_open" or "llm_error")."""
+    result['_fallback'] = {'reason': reason, 'error': error} if error else {'reason': reason}
+    return result
 
-PA REQUEST TEXT:
-{pa_text}
+
+def build_extraction_prompt(pa_text: str) -> str:
+    return f"""Analyze the prior authorization request at the end of this message and extract structured clinical data.
 
 Extract and return a JSON object with these exact fields:
 {{
@@ -236,24 +119,130 @@ Extract and return a JSON object with these exact fields:
     }}
 }}
 
-Return ONLY valid JSON, no additional text."""
+Return ONLY valid JSON, no additional text.
+
+PA REQUEST TEXT:
+{pa_text}"""
+
+
+def prune_empty(value: Any) -> Any:
+    """Drop None, empty strings/lists/dicts and `_`-prefixed markers; keep False and 0."""
+    if isinstance(value, dict):
+        pruned = {k: prune_empty(v) for k, v in value.items() if not str(k).startswith('_')}
+        return {k: v for k, v in pruned.items() if v is not None and v != '' and v != [] and v != {}}
+    if isinstance(value, list):
+        pruned = [prune_empty(v) for v in value]
+        return [v for v in pruned if v is not None and v != '' and v != [] and v != {}]
+    return value
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(prune_empty(value), separators=(',', ':'), ensure_ascii=False)
+
+
+def format_guidelines(guidelines: list) -> str:
+    return "\n".join(f"- {guideline}" for guideline in guidelines)
+
+
+def build_messages(prompt: str) -> list:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+async def complete_json_async(client, stage: str, prompt: str, route: Optional[ModelRoute] = None):
+    route = route or ModelRoute(DEFAULT_MODEL)
+    model = route.model
+    cache_key = make_cache_key(model, SYSTEM_PROMPT, prompt)
+    cached = get_cached_response(cache_key)
+    if cached is not None:
+        return cached
+    estimated_tokens = estimate_tokens(SYSTEM_PROMPT, prompt)
+    # Latency covers the attempt that succeeded, not queueing or earlier retries.
+    started = 0.0
+
+    async def send():
+        nonlocal started
+        # Every attempt, retries included, counts against the rate limits.
+        await scheduler.acquire_async(stage, estimated_tokens)
+        started = time.perf_counter()
+        with get_breaker(stage).track():
+            return await client.chat.completions.create(
+                model=model,
+                messages=build_messages(prompt),
+                response_format={"type": "json_object"}
+            )
+
+    response = await call_with_retries_async(stage, send)
+    latency_ms = round((time.perf_counter() - started) * 1000, 1)
+    scheduler.settle(estimated_tokens, getattr(response.usage, 'total_tokens', None))
+    record_usage(stage, model, len(SYSTEM_PROMPT) + len(prompt), response.usage, route.complexity, latency_ms)
+    content = response.choices[0].message.content
+    if not content:
+        return None
+    result = json.loads(content)
+    store_response(cache_key, stage, model, result)
+    return result
+
+
+def build_hybrid_extraction_prompt(pa_text: str, schema: dict) -> str:
+    return f"""Analyze the prior authorization request at the end of this message. The other fields were already extracted; extract ONLY the fields below.
+
+Return a JSON object with exactly this structure, using "N/A" for anything the request does not state:
+{json.dumps(schema, indent=2)}
+
+Return ONLY valid JSON, no additional text.
+
+PA REQUEST TEXT:
+{pa_text}"""
+
+
+def _hybrid_result(regex_data: dict, llm_data, missing: list, error: str = None) -> dict:
+    merged = merge_extraction(regex_data, llm_data, missing)
+    if error:
+        merged['_llm_error'] = error
+    return merged
+
+
+async def extract_case_data_hybrid_async(pa_text: str, policy: dict = None, route: Optional[ModelRoute] = None) -> dict:
+    regex_data = extract_case_data_demo(pa_text)
+    missing = find_missing_fields(regex_data, fields_for_policy(policy))
+    if not missing:
+        return _hybrid_result(regex_data, None, missing)
+    if not get_breaker("extraction_hybrid").allow():
+        return with_fallback(_hybrid_result(regex_data, None, missing), "circuit_open")
+    prompt = build_hybrid_extraction_prompt(pa_text, build_trimmed_schema(missing))
 
     try:
-        client = get_openai_client()
+        client = get_async_openai_client()
         if not client:
-            return extract_case_data_demo(pa_text)
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+            return _hybrid_result(regex_data, None, missing)
+        return with_model(
+            _hybrid_result(regex_data, await complete_json_async(client, "extraction_hybrid", prompt, route), missing), route
         )
-        content = response.choices[0].message.content
-        return json.loads(content) if content else {"error": "Empty response"}
     except Exception as e:
-        return {"error": str(e)}
+        return with_fallback(_hybrid_result(regex_data, None, missing, str(e)), "llm_error", str(e))
+
+
+async def extract_case_data_async(pa_text: str, policy: dict = None, route: Optional[ModelRoute] = None) -> dict:
+    if DEMO_MODE or EXTRACTION_MODE == "regex":
+        return extract_case_data_demo(pa_text)
+    if EXTRACTION_MODE == "hybrid":
+        return await extract_case_data_hybrid_async(pa_text, policy, route)
+    
+    if not get_breaker("extraction").allow():
+        return with_fallback(extract_case_data_demo(pa_text), "circuit_open")
+    prompt = build_extraction_prompt(pa_text)
+
+    try:
+        client = get_async_openai_client()
+        if not client:
+            return extract_case_data_demo(pa_text)
+        result = await complete_json_async(client, "extraction", prompt, route)
+        return with_model(result, route) if result is not None else {"error": "Empty response"}
+    except Exception as e:
+        return with_fallback(extract_case_data_demo(pa_text), "llm_error", str(e))
 
 
 def generate_recommendation_demo(case_data: dict, policy: dict, criteria_evaluation: list) -> dict:
@@ -309,23 +298,16 @@ def generate_recommendation_demo(case_data: dict, policy: dict, criteria_evaluat
     }
 
 
-def generate_recommendation(case_data: dict, policy: dict, criteria_evaluation: list, guidelines: list) -> dict:
-    if DEMO_MODE:
-        return generate_recommendation_demo(case_data, policy, criteria_evaluation)
-    
-    prompt = f"""Based on the following clinical case data, policy criteria, and guidelines, generate a prior authorization recommendation.
-
-EXTRACTED CASE DATA:
-{json.dumps(case_data, indent=2)}
+def build_recommendation_prompt(case_data: dict, policy: dict, criteria_evaluation: list, guidelines: list) -> str:
+    # Policy and guideline text come before anything case-specific so prompts
+    # for the same policy share a long identical prefix the API can cache.
+    return f"""Based on the policy, clinical guidelines, criteria evaluation and clinical case data below, generate a prior authorization recommendation.
 
 POLICY: {policy['drug_name']} - {policy['indication']}
 Policy Description: {policy.get('description', '')}
 
-CRITERIA EVALUATION:
-{json.dumps(criteria_evaluation, indent=2)}
-
 CLINICAL GUIDELINES:
-{json.dumps(guidelines, indent=2)}
+{format_guidelines(guidelines)}
 
 Generate a recommendation JSON with these exact fields:
 {{
@@ -351,243 +333,183 @@ Decision Logic:
 - DENY if any required criterion is clearly NOT MET based on documented evidence  
 - PEND if required criteria cannot be evaluated due to missing/pending information
 
-Return ONLY valid JSON."""
-
-    try:
-        client = get_openai_client()
-        if not client:
-            return generate_recommendation_demo(case_data, policy, criteria_evaluation)
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
-        content = response.choices[0].message.content
-        return json.loads(content) if content else {"error": "Empty response", "recommendation": "pend"}
-    except Exception as e:
-        return {"error": str(e), "recommendation": "pend"}
-
-
-def draft_letters_demo(case_data: dict, policy: dict, recommendation: dict) -> dict:
-    rec = recommendation.get('recommendation', 'pend').upper()
-    drug_name = policy.get('drug_name', 'the requested medication')
-    indication = policy.get('indication', 'the stated indication')
-    reasons = recommendation.get('primary_reasons', [])
-    reasons_text = '\n'.join([f"  - {r}" for r in reasons]) if reasons else "  - See clinical rationale"
-    
-    if rec == 'APPROVE':
-        provider_letter = f"""PRIOR AUTHORIZATION DETERMINATION
-
-RE: {drug_name} for {indication}
-
-Dear Healthcare Provider,
-
-Following our review of the prior authorization request submitted for the above-referenced medication, we are pleased to inform you that this request has been APPROVED.
-
-DETERMINATION: APPROVED
-EFFECTIVE DATE: Upon receipt
-AUTHORIZATION PERIOD: Per policy guidelines
-
-CLINICAL RATIONALE:
-{reasons_text}
-
-The submitted clinical documentation demonstrates that the patient meets the applicable coverage criteria for {drug_name}. This authorization is valid for the standard treatment duration as outlined in our coverage policy.
+Return ONLY valid JSON.
 
-Please ensure that all claims are submitted with the appropriate authorization reference number. If you have any questions regarding this determination, please contact our Provider Services line.
-
-Sincerely,
-Medical Management Department"""
-        
-        member_letter = f"""PRIOR AUTHORIZATION DECISION
-
-Dear Member,
-
-We have reviewed your doctor's request for {drug_name} to treat your condition.
-
-DECISION: APPROVED
-
-Good news! Your request has been approved. This means your health plan will cover this medication according to your plan benefits.
-
-WHAT HAPPENS NEXT:
-- Your doctor can now prescribe this medication
-- Take the prescription to your pharmacy
-- Your regular copay or coinsurance will apply
+CRITERIA EVALUATION:
+{compact_json(criteria_evaluation)}
 
-If you have any questions about this decision or your benefits, please call the Member Services number on the back of your ID card.
+EXTRACTED CASE DATA:
+{compact_json(case_data)}"""
 
-We wish you the best with your treatment.
 
-Sincerely,
-Member Services"""
+async def generate_recommendation_async(case_data: dict, policy: dict, criteria_evaluation: list, guidelines: list,
+                                        route: Optional[ModelRoute] = None) -> dict:
+    if DEMO_MODE:
+        return generate_recommendation_demo(case_data, policy, criteria_evaluation)
     
-    elif rec == 'DENY':
-        provider_letter = f"""PRIOR AUTHORIZATION DETERMINATION
-
-RE: {drug_name} for {indication}
-
-Dear Healthcare Provider,
-
-Following our review of the prior authorization request submitted for the above-referenced medication, we regret to inform you that this request has been DENIED.
-
-DETERMINATION: DENIED
-DATE OF DETERMINATION: Current Date
-
-REASONS FOR DENIAL:
-{reasons_text}
-
-CLINICAL RATIONALE:
-{recommendation.get('clinical_rationale', 'The submitted documentation does not meet the required coverage criteria.')}
-
-APPEAL RIGHTS:
-You and/or the member have the right to appeal this decision. To file an appeal, please submit additional clinical documentation addressing the criteria noted above within 180 days of this notice.
-
-If you have questions about this determination or the appeal process, please contact our Provider Services line.
-
-Sincerely,
-Medical Management Department"""
-        
-        member_letter = f"""PRIOR AUTHORIZATION DECISION
+    if not get_breaker("recommendation").allow():
+        return with_fallback(generate_recommendation_demo(case_data, policy, criteria_evaluation), "circuit_open")
+    prompt = build_recommendation_prompt(case_data, policy, criteria_evaluation, guidelines)
 
-Dear Member,
-
-We have reviewed your doctor's request for {drug_name} to treat your condition.
+    try:
+        client = get_async_openai_client()
+        if not client:
+            return generate_recommendation_demo(case_data, policy, criteria_evaluation)
+        result = await complete_json_async(client, "recommendation", prompt, route)
+        return with_model(result, route) if result is not None else {"error": "Empty response", "recommendation": "pend"}
+    except Exception as e:
+        return with_fallback(generate_recommendation_demo(case_data, policy, criteria_evaluation), "llm_error", str(e))
 
-DECISION: NOT APPROVED AT THIS TIME
 
-We understand this may not be the answer you were hoping for. Here's why we made this decision:
+def draft_letters_demo(case_data: dict, policy: dict, recommendation: dict) -> dict:
+    return {**render_letters(policy, recommendation), "_demo_mode": True}
 
-The information your doctor sent us did not show that you meet all the requirements for this medication under your health plan.
 
-WHAT YOU CAN DO:
-1. Talk to your doctor about other treatment options that may be covered
-2. Ask your doctor to send us more information and request another review
-3. File an appeal if you disagree with this decision
+PROVIDER_LETTER_GUIDANCE = """A formal, clinical letter to the requesting provider. Include:
+        - Patient identification (use generic 'the patient' for privacy)
+        - Decision and effective date
+        - Clinical rationale with policy references
+        - Specific criteria met or not met
+        - If denied/pended: clear explanation of what is needed
+        - Appeal rights information
+        - Contact information placeholder
+        This should be professional, detailed, and reference specific clinical findings."""
 
-HOW TO APPEAL:
-You have the right to ask us to look at this decision again. Call the Member Services number on your ID card, and we will help you understand your options.
+MEMBER_LETTER_GUIDANCE = """A simplified letter to the member/patient in plain language. Include:
+        - Clear statement of the decision
+        - Simple explanation of what this means
+        - What happens next
+        - If denied/pended: what they can do
+        - How to get help or ask questions
+        - Reassurance and support
+        Use 6th-grade reading level, avoid medical jargon."""
 
-We're here to help. Please don't hesitate to contact us with any questions.
+LETTER_MARKERS = {
+    'provider': '### PROVIDER LETTER',
+    'member': '### MEMBER LETTER'
+}
 
-Sincerely,
-Member Services"""
-    
-    else:
-        info_gaps = recommendation.get('information_gaps', ['Additional clinical documentation'])
-        gaps_text = '\n'.join([f"  - {g}" for g in info_gaps])
-        
-        provider_letter = f"""PRIOR AUTHORIZATION DETERMINATION
 
-RE: {drug_name} for {indication}
+def build_letters_stream_prompt(case_data: dict, policy: dict, recommendation: dict) -> str:
+    return f"""Generate two letters for the prior authorization decision described at the end of this message.
 
-Dear Healthcare Provider,
+POLICY: {policy['drug_name']} - {policy['indication']}
 
-Following our review of the prior authorization request submitted for the above-referenced medication, we require additional information to complete our determination.
+Write the provider letter first, then the member letter, as plain text (not JSON).
+Start each letter with its heading on a line of its own, exactly as shown:
 
-DETERMINATION: PENDED FOR ADDITIONAL INFORMATION
-DATE: Current Date
+{LETTER_MARKERS['provider']}
+{PROVIDER_LETTER_GUIDANCE}
 
-INFORMATION NEEDED:
-{gaps_text}
+{LETTER_MARKERS['member']}
+{MEMBER_LETTER_GUIDANCE}
 
-Please submit the requested documentation within 14 days to avoid delays in processing. Once received, we will complete our review and issue a determination.
+Format each letter professionally with appropriate sections. Do not add any text before the first heading.
 
-SUBMISSION INSTRUCTIONS:
-Please fax the requested information to our Medical Management department with the case reference number clearly noted.
+RECOMMENDATION: {compact_json(recommendation)}
 
-If you have questions about the requested information, please contact our Provider Services line.
+CASE DATA:
+{compact_json(case_data)}"""
 
-Sincerely,
-Medical Management Department"""
-        
-        member_letter = f"""PRIOR AUTHORIZATION UPDATE
 
-Dear Member,
+def build_letter_rationale_prompt(case_data: dict, policy: dict, recommendation: dict) -> str:
+    return f"""Write the clinical rationale section of a prior authorization determination letter to the requesting provider.
+The rest of the letter (greeting, determination, reasons list, appeal rights, contact details) is already written from a template; do not repeat any of it.
 
-We are reviewing your doctor's request for {drug_name} to treat your condition.
+POLICY: {policy['drug_name']} - {policy['indication']}
 
-STATUS: WE NEED MORE INFORMATION
+Return a JSON object:
+{{
+    "rationale": "One or two short paragraphs explaining the determination, citing the specific clinical findings and policy criteria behind it. Refer to 'the patient', never by name."
+}}
 
-We don't have all the information we need to make a decision yet. We have asked your doctor to send us more details about your treatment.
+Return ONLY valid JSON.
 
-WHAT HAPPENS NEXT:
-- Your doctor will send us the information we requested
-- Once we get it, we will finish our review
-- We will send you another letter with our decision
+RECOMMENDATION: {compact_json(recommendation)}
 
-You don't need to do anything right now. If you have questions, you can call the Member Services number on your ID card.
+CASE DATA:
+{compact_json(case_data)}"""
 
-Thank you for your patience.
 
-Sincerely,
-Member Services"""
-    
-    return {
-        "provider_letter": provider_letter,
-        "member_letter": member_letter,
-        "_demo_mode": True
-    }
+def _letters_with_rationale(policy: dict, recommendation: dict, result: dict) -> dict:
+    if result is None or not result.get('rationale'):
+        return {"error": "Empty response", "provider_letter": "", "member_letter": ""}
+    return render_letters(policy, recommendation, {'rationale': result['rationale'].strip()})
 
 
-def draft_letters(case_data: dict, policy: dict, recommendation: dict) -> dict:
+async def draft_letters_async(case_data: dict, policy: dict, recommendation: dict,
+                              route: Optional[ModelRoute] = None) -> dict:
     if DEMO_MODE:
         return draft_letters_demo(case_data, policy, recommendation)
+    # Only the rationale paragraph is case-specific prose; letters without one
+    # are rendered entirely from templates.
+    if 'rationale' not in letter_slots_needed(policy, letter_decision(recommendation)):
+        return render_letters(policy, recommendation)
     
-    prompt = f"""Generate two letters for this prior authorization decision.
-
-CASE DATA:
-{json.dumps(case_data, indent=2)}
-
-POLICY: {policy['drug_name']} - {policy['indication']}
-
-RECOMMENDATION: {json.dumps(recommendation, indent=2)}
-
-Generate a JSON with two letters:
-{{
-    "provider_letter": "A formal, clinical letter to the requesting provider. Include:
-        - Patient identification (use generic 'the patient' for privacy)
-        - Decision and effective date
-        - Clinical rationale with policy references
-        - Specific criteria met or not met
-        - If denied/pended: clear explanation of what is needed
-        - Appeal rights information
-        - Contact information placeholder
-        This should be professional, detailed, and reference specific clinical findings.",
-    
-    "member_letter": "A simplified letter to the member/patient in plain language. Include:
-        - Clear statement of the decision
-        - Simple explanation of what this means
-        - What happens next
-        - If denied/pended: what they can do
-        - How to get help or ask questions
-        - Reassurance and support
-        Use 6th-grade reading level, avoid medical jargon."
-}}
-
-Format each letter professionally with appropriate sections. Return ONLY valid JSON."""
+    if not get_breaker("letter_rationale").allow():
+        return with_fallback(draft_letters_demo(case_data, policy, recommendation), "circuit_open")
+    prompt = build_letter_rationale_prompt(case_data, policy, recommendation)
 
     try:
-        client = get_openai_client()
+        client = get_async_openai_client()
         if not client:
             return draft_letters_demo(case_data, policy, recommendation)
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
-        content = response.choices[0].message.content
-        return json.loads(content) if content else {"error": "Empty response", "provider_letter": "", "member_letter": ""}
+        result = await complete_json_async(client, "letter_rationale", prompt, route)
+        return with_model(_letters_with_rationale(policy, recommendation, result), route)
     except Exception as e:
-        return {
-            "error": str(e),
-            "provider_letter": "Error generating letter. Please try again.",
-            "member_letter": "Error generating letter. Please try again."
-        }
+        return with_fallback(draft_letters_demo(case_data, policy, recommendation), "llm_error", str(e))
+
+
+async def stream_letters_async(case_data: dict, policy: dict, recommendation: dict,
+                               route: Optional[ModelRoute] = None) -> AsyncIterator[Union[str, dict]]:
+    """Yield the letters text as it streams.
+
+    When the letters breaker is open the template letters are streamed instead,
+    preceded by a with_fallback() marker dict so the caller can flag the case.
+    """
+    client = get_async_openai_client() if not DEMO_MODE else None
+    if client and not get_breaker("letters_stream").allow():
+        client = None
+        yield with_fallback({}, 'circuit_open')
+    if not client:
+        letters = draft_letters_demo(case_data, policy, recommendation)
+        for letter, marker in LETTER_MARKERS.items():
+            text = f"{marker}\n{letters[f'{letter}_letter']}\n\n"
+            for start in range(0, len(text), DEMO_STREAM_CHUNK_CHARS):
+                yield text[start:start + DEMO_STREAM_CHUNK_CHARS]
+                await asyncio.sleep(0)
+        return
+
+    route = route or ModelRoute(DEFAULT_MODEL)
+    model = route.model
+    prompt = build_letters_stream_prompt(case_data, policy, recommendation)
+    estimated_tokens = estimate_tokens(SYSTEM_PROMPT, prompt)
+    started = 0.0
+
+    async def open_stream():
+        nonlocal started
+        await scheduler.acquire_async("letters_stream", estimated_tokens)
+        started = time.perf_counter()
+        with get_breaker("letters_stream").track():
+            return await client.chat.completions.create(
+                model=model,
+                messages=build_messages(prompt),
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+    # Only opening the stream is retried; once tokens reach the client a
+    # retry would repeat them.
+    stream = await call_with_retries_async("letters_stream", open_stream)
+    async for chunk in stream:
+        if chunk.usage:
+            scheduler.settle(estimated_tokens, chunk.usage.total_tokens)
+            record_usage(
+                "letters_stream", model, len(SYSTEM_PROMPT) + len(prompt), chunk.usage,
+                route.complexity, round((time.perf_counter() - started) * 1000, 1)
+            )
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
 
 
 def is_demo_mode() -> bool:
@@ -0,0 +1,245 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, Optional, Set
+
+from src.models.database import (
+    get_case, get_policy, case_unit_of_work, get_pending_case_ids, claim_pending_case, release_case_claim,
+    release_stale_claims
+)
+from src.services.openai_client import (
+    extract_case_data_async, generate_recommendation_async, generate_recommendation_demo, draft_letters_async
+)
+from src.services.hybrid_extraction import summarize_provenance
+from src.services.llm_scheduler import llm_priority, case_priority
+from src.services.model_router import route_model, predict_complexity
+from src.services.telemetry import stage_span
+from src.services.policy_engine import (
+    evaluate_criteria, calculate_complexity, get_triage_summary, rule_based_outcome
+)
+
+
+class CaseProcessingError(Exception):
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+# Cases with a pipeline run queued or in progress in this process. Batches and
+# the job queue reserve a case here before running it, so they never overlap.
+_reserved_cases: Set[str] = set()
+
+
+def reserve_case(case_id: str) -> bool:
+    if case_id in _reserved_cases:
+        return False
+    _reserved_cases.add(case_id)
+    return True
+
+
+def release_case(case_id: str):
+    _reserved_cases.discard(case_id)
+
+
+async def run_case_pipeline(case_id: str, on_progress: Optional[Callable[[str, str], None]] = None) -> dict:
+    # Claiming a pending case in the database keeps other processes off it; a
+    # failed run hands it back as pending. A claim left by a worker that died
+    # expires after CASE_CLAIM_TIMEOUT_SECONDS.
+    claimed = claim_pending_case(case_id)
+    try:
+        with stage_span('pipeline') as pipeline_span:
+            return await _run_case_stages(case_id, on_progress, pipeline_span, claimed)
+    except BaseException:
+        if claimed:
+            release_case_claim(case_id)
+        raise
+
+
+async def _run_case_stages(case_id: str, on_progress: Optional[Callable[[str, str], None]], pipeline_span,
+                           claimed: bool) -> dict:
+    started = time.perf_counter()
+    with stage_span('load_case'):
+        case = get_case(case_id)
+        policy = get_policy(case['policy_id']) if case else None
+    if not case:
+        raise CaseProcessingError("Case not found", status_code=404)
+    if not policy:
+        raise CaseProcessingError("Policy not found", status_code=404)
+    if case['status'] == 'processing' and not claimed:
+        raise CaseProcessingError("Case is already being processed", status_code=409)
+
+    # Model calls for older cases are served first when rate limits queue them.
+    with case_unit_of_work(case_id) as uow, llm_priority(case_priority(case['created_at'])):
+        def log(action: str, details: str, duration_ms: Optional[float] = None):
+            uow.add_audit_log(action, details, duration_ms)
+            if on_progress:
+                on_progress(action, details)
+
+        log("processing_started", "AI processing initiated")
+
+        fallback_stages = []
+
+        def note_fallback(stage: str, result: dict, span) -> bool:
+            fallback = result.pop('_fallback', None)
+            if not fallback:
+                return False
+            span.outcome = 'fallback'
+            fallback_stages.append(stage)
+            reason = "circuit breaker open" if fallback['reason'] == 'circuit_open' else f"model call failed: {fallback.get('error')}"
+            log("stage_fallback", f"{stage}: {reason}; used the deterministic pipeline")
+            return True
+
+        def model_note(result: dict) -> str:
+            model = result.pop('_model', None)
+            return f"model: {model}" if model else ""
+
+        with stage_span('extract_case_data') as span:
+            # Extraction runs before the real complexity is known, so it is
+            # routed on what the regex extractor makes of the request.
+            route = route_model('extraction', predict_complexity(case['raw_text'], policy), policy)
+            extracted_data = await extract_case_data_async(case['raw_text'], policy, route)
+            if 'error' in extracted_data:
+                span.outcome = 'error'
+            note_fallback('extraction', extracted_data, span)
+            extraction_model = model_note(extracted_data)
+
+        if 'error' in extracted_data:
+            pipeline_span.outcome = 'error'
+            log("extraction_error", extracted_data.get('error'), span.duration_ms)
+            uow.commit()
+            raise CaseProcessingError(f"Extraction error: {extracted_data.get('error')}")
+
+        provenance = summarize_provenance(extracted_data)
+        notes = []
+        if provenance:
+            notes.append("fields by source - " + ", ".join(f"{source}: {count}" for source, count in sorted(provenance.items())))
+        if extraction_model:
+            notes.append(extraction_model)
+        details = "Clinical data extracted successfully"
+        log("case_extracted", f"{details} ({'; '.join(notes)})" if notes else details, span.duration_ms)
+
+        with stage_span('evaluate_criteria') as span:
+            criteria_evaluation = evaluate_criteria(extracted_data, policy)
+            complexity = calculate_complexity(criteria_evaluation)
+            triage_summary = get_triage_summary(criteria_evaluation)
+
+        log("criteria_evaluated", f"Complexity: {complexity}", span.duration_ms)
+
+        with stage_span('generate_recommendation') as span:
+            if rule_based_outcome(triage_summary):
+                recommendation = generate_recommendation_demo(extracted_data, policy, criteria_evaluation)
+                recommendation.pop('_demo_mode', None)
+                recommendation_path = 'rules'
+            else:
+                recommendation = await generate_recommendation_async(
+                    extracted_data,
+                    policy,
+                    criteria_evaluation,
+                    policy.get('guidelines', []),
+                    route_model('recommendation', complexity, policy)
+                )
+                if note_fallback('recommendation', recommendation, span):
+                    recommendation_path = 'fallback'
+                else:
+                    recommendation_path = 'demo' if recommendation.get('_demo_mode') else 'llm'
+            if 'error' in recommendation:
+                span.outcome = 'error'
+            recommendation_model = model_note(recommendation)
+
+        path_note = f"path: {recommendation_path}, {recommendation_model}" if recommendation_model else f"path: {recommendation_path}"
+        log(
+            "recommendation_generated",
+            f"AI suggests: {recommendation.get('recommendation', 'unknown')} ({path_note})",
+            span.duration_ms
+        )
+
+        with stage_span('draft_letters') as span:
+            letters = await draft_letters_async(
+                extracted_data, policy, recommendation, route_model('letters', complexity, policy)
+            )
+            if 'error' in letters:
+                span.outcome = 'error'
+            note_fallback('letters', letters, span)
+            letters_model = model_note(letters)
+
+        log(
+            "letters_drafted",
+            f"Provider and member letters generated ({letters_model})" if letters_model else "Provider and member letters generated",
+            span.duration_ms
+        )
+
+        uow.update_case({
+            'extracted_data': extracted_data,
+            'criteria_evaluation': criteria_evaluation,
+            'ai_recommendation': recommendation,
+            'provider_letter': letters.get('provider_letter', ''),
+            'member_letter': letters.get('member_letter', ''),
+            'complexity': complexity,
+            'recommendation_path': recommendation_path,
+            'fallback_stages': ','.join(fallback_stages) or None,
+            'status': 'processed',
+            'claimed_at': None,
+            'processed_at': datetime.now().isoformat()
+        })
+
+        log(
+            "processing_completed",
+            "Case ready for Medical Director review",
+            round((time.perf_counter() - started) * 1000, 3)
+        )
+
+        with stage_span('persist'):
+            uow.commit()
+
+    return {
+        'case_id': case_id,
+        'complexity': complexity,
+        'recommendation': recommendation.get('recommendation', 'unknown'),
+        'triage_summary': triage_summary,
+        'fallback_stages': fallback_stages
+    }
+
+
+async def run_pending_batch(policy_id: Optional[str] = None, concurrency: int = 4, limit: Optional[int] = None) -> dict:
+    release_stale_claims()
+    pending_ids = get_pending_case_ids(policy_id, limit)
+    # Skip cases a queued job or an overlapping batch already has.
+    case_ids = [case_id for case_id in pending_ids if reserve_case(case_id)]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+
+    async def process_one(case_id: str) -> dict:
+        async with semaphore:
+            case_started = time.perf_counter()
+            try:
+                result = await run_case_pipeline(case_id)
+                outcome = {'case_id': case_id, 'status': 'processed', 'recommendation': result['recommendation'], 'complexity': result['complexity']}
+                if result['fallback_stages']:
+                    outcome['fallback_stages'] = result['fallback_stages']
+            except CaseProcessingError as e:
+                outcome = {'case_id': case_id, 'status': 'skipped' if e.status_code == 409 else 'failed', 'error': e.message}
+            except Exception as e:
+                outcome = {'case_id': case_id, 'status': 'failed', 'error': str(e)}
+            finally:
+                release_case(case_id)
+            outcome['duration_seconds'] = round(time.perf_counter() - case_started, 3)
+            return outcome
+
+    outcomes = await asyncio.gather(*(process_one(case_id) for case_id in case_ids))
+    elapsed = time.perf_counter() - started
+    processed = sum(1 for o in outcomes if o['status'] == 'processed')
+    skipped = len(pending_ids) - len(case_ids) + sum(1 for o in outcomes if o['status'] == 'skipped')
+
+    return {
+        'policy_id': policy_id,
+        'concurrency': max(1, concurrency),
+        'total_cases': len(outcomes),
+        'processed': processed,
+        'skipped': skipped,
+        'failed': sum(1 for o in outcomes if o['status'] == 'failed'),
+        'elapsed_seconds': round(elapsed, 3),
+        'cases_per_minute': round(len(outcomes) / elapsed * 60, 1) if outcomes and elapsed > 0 else 0,
+        'avg_case_seconds': round(sum(o['duration_seconds'] for o in outcomes) / len(outcomes), 3) if outcomes else 0,
+        'results': outcomes
+    }
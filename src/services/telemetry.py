@@ -0,0 +1,129 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, from sub-millisecond SQLite calls to slow model calls.
+LATENCY_BUCKETS_SECONDS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class LatencyHistogram:
+    """A Prometheus-style histogram keyed by label values."""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS_SECONDS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # label values -> [count per bucket (last one is +Inf)..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: Tuple[str, ...], seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for label_values, values in series:
+            labels = ','.join(
+                f'{name}="{_escape_label_value(value)}"' for name, value in zip(self.label_names, label_values)
+            )
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{_format_float(bound)}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_float(values[-1])}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = LatencyHistogram(
+    "pa_http_request_duration_seconds", "HTTP request latency by route.", ('method', 'route', 'status')
+)
+STAGE_LATENCY = LatencyHistogram(
+    "pa_pipeline_stage_duration_seconds", "Case pipeline stage latency.", ('stage', 'outcome')
+)
+DB_CALL_LATENCY = LatencyHistogram(
+    "pa_db_call_duration_seconds", "Latency of database.py helpers.", ('function', 'outcome')
+)
+LLM_QUEUE_WAIT = LatencyHistogram(
+    "pa_llm_queue_wait_seconds", "Time model calls waited for rate-limit capacity.", ('stage',)
+)
+HISTOGRAMS = (REQUEST_LATENCY, STAGE_LATENCY, DB_CALL_LATENCY, LLM_QUEUE_WAIT)
+
+
+class StageSpan:
+    def __init__(self, stage: str):
+        self.stage = stage
+        # Set to 'error' to count a stage that returned an error result rather than raising.
+        self.outcome = 'ok'
+        self.duration_ms: Optional[float] = None
+
+
+@contextmanager
+def stage_span(stage: str) -> Iterator[StageSpan]:
+    span = StageSpan(stage)
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException:
+        span.outcome = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        span.duration_ms = round(elapsed * 1000, 3)
+        STAGE_LATENCY.observe((stage, span.outcome), elapsed)
+
+
+def timed_db_call(func: Callable = None, *, name: Optional[str] = None) -> Callable:
+    """Record the latency of a database helper under its function name."""
+    if func is None:
+        return lambda f: timed_db_call(f, name=name)
+    label = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = func(*args, **kwargs)
+            outcome = 'ok'
+            return result
+        finally:
+            DB_CALL_LATENCY.observe((label, outcome), time.perf_counter() - started)
+    return wrapper
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    REQUEST_LATENCY.observe((method, route, str(status)), seconds)
+
+
+def render_prometheus() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render()
+    return '\n'.join(lines) + '\n'
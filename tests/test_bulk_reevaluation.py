@@ -0,0 +1,115 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.data.seed_data import POLICIES
+from src.services.bulk_reevaluation import (
+    APPROVE, DENY, PEND, STATUS_CODES, evaluate_criterion_vectorized, load_case_columns, recommend_vectorized
+)
+from src.services.criteria_compiler import compile_policy
+
+STAGES = ('', 'Stage IV', 'Stage IVA', 'Stage IIIB', 'Stage 3', 'Stage II', 'metastatic disease')
+PD_L1 = (
+    ('positive', '60%'), ('positive', '50%'), ('positive', '10%'), ('negative', '0%'), ('pending', ''),
+    ('not tested', ''), ('positive', 'high'), ('negative', 'n/a'), ('', '')
+)
+EGFR = ('wild type', 'negative', 'not detected', 'no mutations', 'mutated', 'positive', 'detected', 'pending', 'not tested', '')
+ALK = ('negative', 'not detected', 'no rearrangement', 'positive', 'detected', 'rearranged', 'pending', 'not tested', '')
+BRAF = (None, 'Wild type', 'Negative', 'V600E mutated')
+PRIOR = ((False, []), (True, ['Carboplatin/pemetrexed']), (True, []), (True, ['No prior systemic therapy']))
+ECOG = ('', '0', '1', '2', '3', 'unknown')
+SITES = ((), ('Liver',), ('Brain',), ('Multiple brain lesions', 'Bone'))
+
+CRITERIA = [
+    ('stage', "Patient has histologically or cytologically confirmed metastatic NSCLC (Stage IV)", True),
+    ('stage', "Unresectable Stage III disease", True),
+    ('biomarker', "Tumor expresses PD-L1 (Tumor Proportion Score >= 50%) as determined by FDA-approved test", True),
+    ('biomarker', "PD-L1 TPS >= 1", True),
+    ('biomarker', "Tumor expresses PD-L1", False),
+    ('biomarker', "No EGFR or ALK genomic tumor aberrations present", True),
+    ('biomarker', "EGFR exon 19 deletion or exon 21 L858R substitution", False),
+    ('biomarker', "No ALK rearrangement", True),
+    ('biomarker', "BRAF mutation status has been determined", True),
+    ('biomarker', "BRAF wild type", False),
+    ('prior_therapy', "No prior systemic chemotherapy for metastatic NSCLC (first-line treatment)", False),
+    ('prior_therapy', "Progression on platinum-based chemotherapy", False),
+    ('clinical', "ECOG Performance Status 0-1", True),
+    ('clinical', "ECOG Performance Status 0-2", False),
+    ('clinical', "No active brain metastases (treated and stable brain metastases allowed)", True),
+    ('clinical', "Documented brain metastases", False),
+    ('clinical', "Adequate organ function", False),
+]
+
+
+def random_case(rng):
+    braf = rng.choice(BRAF)
+    pd_l1_status, pd_l1_value = rng.choice(PD_L1)
+    has_prior, treatments = rng.choice(PRIOR)
+    return {
+        'disease_stage': {'stage': rng.choice(STAGES), 'metastatic_sites': list(rng.choice(SITES))},
+        'biomarkers': {
+            'pd_l1': {'status': pd_l1_status, 'value': pd_l1_value},
+            'egfr': {'status': rng.choice(EGFR)},
+            'alk': {'status': rng.choice(ALK)},
+            'other_markers': [{'name': 'BRAF V600', 'result': braf}] if braf else []
+        },
+        'prior_therapy': {'has_prior_systemic': has_prior, 'treatments': list(treatments)},
+        'performance_status': {'ecog': rng.choice(ECOG)}
+    }
+
+
+def scalar_recommendation(evaluations):
+    required = [e for e in evaluations if e['required']]
+    if any(e['status'] == 'unknown' for e in required):
+        return PEND
+    if any(e['status'] == 'unmet' for e in required):
+        return DENY
+    return APPROVE
+
+
+def compare(policy, cases):
+    compiled = compile_policy(policy)
+    cols = load_case_columns([{'extracted_data': case} for case in cases])
+    statuses = np.stack(
+        [evaluate_criterion_vectorized(c, cols, len(cases)) for c in compiled.criteria], axis=1
+    ).astype(np.int8)
+    required = np.array([c.required for c in compiled.criteria], dtype=bool)
+    recommendations = recommend_vectorized(statuses, required)
+
+    for row, case in enumerate(cases):
+        evaluations = compiled.evaluate(case)
+        assert statuses[row].tolist() == [STATUS_CODES[e['status']] for e in evaluations], case
+        assert recommendations[row] == scalar_recommendation(evaluations), case
+
+
+def test_vectorized_matches_compiled_evaluator_on_random_cases():
+    rng = random.Random(7)
+    policy = {
+        'id': 'POL-TEST',
+        'criteria': [
+            {'id': f"C{i}", 'type': kind, 'description': description, 'required': required}
+            for i, (kind, description, required) in enumerate(CRITERIA, 1)
+        ]
+    }
+    compare(policy, [random_case(rng) for _ in range(3000)])
+
+
+@pytest.mark.parametrize('policy', POLICIES, ids=[p['id'] for p in POLICIES])
+def test_vectorized_matches_compiled_evaluator_on_seed_policies(policy):
+    rng = random.Random(policy['id'])
+    compare(policy, [random_case(rng) for _ in range(500)])
+
+
+def test_recommend_vectorized_table():
+    met, unmet, unknown = STATUS_CODES['met'], STATUS_CODES['unmet'], STATUS_CODES['unknown']
+    statuses = np.array([
+        [met, met, unknown],
+        [met, unmet, met],
+        [unknown, unmet, met],
+        [met, met, met],
+    ], dtype=np.int8)
+    required = np.array([True, True, False])
+
+    assert recommend_vectorized(statuses, required).tolist() == [APPROVE, DENY, PEND, APPROVE]
+    assert recommend_vectorized(np.zeros((2, 0), dtype=np.int8), np.zeros(0, dtype=bool)).tolist() == [APPROVE, APPROVE]
@@ -0,0 +1,52 @@
+import pytest
+
+from src.models import database
+
+
+@pytest.fixture
+def case_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_PATH', str(tmp_path / 'claims.db'))
+    database.init_db()
+    database.insert_policy({
+        'id': 'POL-1', 'drug_name': 'Drug', 'indication': 'Indication', 'criteria': [], 'guidelines': []
+    })
+    database.insert_case({'id': 'PA-1', 'title': 'Case', 'raw_text': 'text', 'policy_id': 'POL-1'})
+    yield 'PA-1'
+    database.close_db_connections()
+
+
+def set_claimed_at(case_id, claimed_at):
+    with database.get_db() as conn:
+        conn.execute("UPDATE cases SET claimed_at = ? WHERE id = ?", (claimed_at, case_id))
+        conn.commit()
+
+
+def test_claim_is_exclusive_while_fresh(case_id):
+    assert database.claim_pending_case(case_id)
+    assert not database.claim_pending_case(case_id)
+    assert database.get_case(case_id)['status'] == 'processing'
+    assert database.get_metrics()['processing_cases'] == 1
+
+
+def test_stale_claim_is_taken_over(case_id):
+    assert database.claim_pending_case(case_id)
+    set_claimed_at(case_id, '2000-01-01 00:00:00')
+    assert database.claim_pending_case(case_id)
+    assert database.get_case(case_id)['claimed_at'] > '2000-01-01 00:00:00'
+
+
+def test_release_stale_claims_requeues_abandoned_cases(case_id):
+    assert database.claim_pending_case(case_id)
+    assert database.release_stale_claims() == 0
+    set_claimed_at(case_id, '2000-01-01 00:00:00')
+    assert database.release_stale_claims() == 1
+    case = database.get_case(case_id)
+    assert (case['status'], case['claimed_at']) == ('pending', None)
+    assert database.get_pending_case_ids() == [case_id]
+
+
+def test_release_case_claim(case_id):
+    assert database.claim_pending_case(case_id)
+    database.release_case_claim(case_id)
+    metrics = database.get_metrics()
+    assert (metrics['pending_cases'], metrics['processing_cases']) == (1, 0)
@@ -0,0 +1,86 @@
+import pytest
+
+from benchmarks.extraction import extract_case_data_legacy
+from src.data.seed_data import CASES
+from src.services.case_extractor import extract_case_data_sections
+
+SEED_TEXTS = {case['id']: case['raw_text'] for case in CASES}
+
+# (case id, field path, expected value) for the seeded cases.
+SEED_EXPECTATIONS = [
+    ('PA-2024-001', 'patient_info.name', "John Smith"),
+    ('PA-2024-001', 'patient_info.dob', "03/15/1958"),
+    ('PA-2024-001', 'patient_info.member_id', "MEM-789456123"),
+    ('PA-2024-001', 'disease_stage.stage', "Stage IV"),
+    ('PA-2024-001', 'disease_stage.tnm', "T3N2M1a"),
+    ('PA-2024-001', 'disease_stage.metastatic_sites', ["Contralateral lung nodules", "mediastinal lymph nodes"]),
+    ('PA-2024-001', 'biomarkers.pd_l1', {"status": "positive", "value": "75%", "test_date": ""}),
+    ('PA-2024-001', 'biomarkers.egfr.status', "wild type"),
+    ('PA-2024-001', 'biomarkers.alk.status', "negative"),
+    ('PA-2024-001', 'performance_status', {"ecog": "1", "description": "Restricted in strenuous activity but ambulatory"}),
+    ('PA-2024-001', 'prior_therapy.treatments', ["No prior systemic therapy"]),
+    ('PA-2024-001', 'drug_requested.name', "Keytruda (pembrolizumab) 200mg IV every 3 weeks"),
+    ('PA-2024-001', 'drug_requested.duration', "Approval for Keytruda 200mg IV Q3W x 24 months or until progression"),
+    ('PA-2024-002', 'disease_stage.metastatic_sites', ["Liver", "bone (L3 vertebra)"]),
+    ('PA-2024-002', 'biomarkers.pd_l1.value', "15%"),
+    ('PA-2024-002', 'biomarkers.egfr.status', "not tested"),
+    ('PA-2024-002', 'performance_status.ecog', "2"),
+    ('PA-2024-002', 'drug_requested.duration', "Approval for Keytruda 200mg IV Q3W"),
+    ('PA-2024-003', 'disease_stage.tnm', "metastatic to brain"),
+    ('PA-2024-003', 'disease_stage.metastatic_sites', ["Multiple brain lesions (treated with SRS 11/15/2024)"]),
+    ('PA-2024-003', 'biomarkers.pd_l1.status', "pending"),
+    ('PA-2024-003', 'biomarkers.egfr.status', "pending"),
+    ('PA-2024-003', 'drug_requested.duration', "Expedited approval for Keytruda pending biomarker confirmation"),
+    ('PA-2024-004', 'disease_stage.tnm', "M1c"),
+    ('PA-2024-004', 'biomarkers.pd_l1.status', "not tested"),
+    ('PA-2024-004', 'performance_status', {"ecog": "0", "description": "Fully active, no restrictions"}),
+    ('PA-2024-004', 'drug_requested.name', "Opdivo (nivolumab) 480mg IV every 4 weeks"),
+    ('PA-2024-005', 'disease_stage.metastatic_sites', ["Contralateral lung", "pleural effusion"]),
+    ('PA-2024-005', 'biomarkers.egfr', {"status": "mutated", "mutation": "Exon 19 deletion DETECTED"}),
+    ('PA-2024-005', 'biomarkers.alk.status', "negative"),
+]
+
+# Label variants the section index has to treat like the original whole-text regexes.
+LABEL_VARIANTS = [
+    lambda text: text.replace("Metastatic sites", "metastatic sites"),
+    lambda text: text.replace("Metastatic sites", "METASTATIC SITES"),
+    lambda text: text.replace("REQUESTING:", "REQUESTING :"),
+    lambda text: text.replace("REQUESTING:", "REQUESTING:\n"),
+    lambda text: text + "\nPrior treatments: Carboplatin/pemetrexed\n",
+    lambda text: text + "\nprior Treatment: x\nPrior Treatments: Docetaxel\n",
+    lambda text: text.replace("No prior systemic", "None before").replace("no prior systemic", "none before")
+    + "\nPrior treatment: Carboplatin\n",
+    lambda text: text.replace("Stage", "stage"),
+    lambda text: text + "\nMétastatic sites: ignored\n",
+]
+
+
+def field(data, path):
+    for key in path.split('.'):
+        data = data[key]
+    return data
+
+
+@pytest.mark.parametrize('case_id, path, expected', SEED_EXPECTATIONS)
+def test_seed_case_fields(case_id, path, expected):
+    assert field(extract_case_data_sections(SEED_TEXTS[case_id]), path) == expected
+
+
+@pytest.mark.parametrize('case_id', sorted(SEED_TEXTS))
+def test_seed_cases_match_the_original_extractor(case_id):
+    text = SEED_TEXTS[case_id]
+    assert extract_case_data_sections(text) == extract_case_data_legacy(text)
+
+
+@pytest.mark.parametrize('variant', range(len(LABEL_VARIANTS)))
+@pytest.mark.parametrize('case_id', sorted(SEED_TEXTS))
+def test_label_variants_match_the_original_extractor(case_id, variant):
+    text = LABEL_VARIANTS[variant](SEED_TEXTS[case_id])
+    assert extract_case_data_sections(text) == extract_case_data_legacy(text)
+
+
+@pytest.mark.parametrize('text', [
+    "", "Metastatic site", "Prior Treatment", "REQUESTING:", "xPrior treatment: z", "Patient:", "PD-L1 TPS: 5%"
+])
+def test_fragments_match_the_original_extractor(text):
+    assert extract_case_data_sections(text) == extract_case_data_legacy(text)
@@ -0,0 +1,68 @@
+import base64
+import json
+
+import pytest
+
+from src.models import database
+
+
+@pytest.fixture
+def case_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_PATH', str(tmp_path / 'cases.db'))
+    database.init_db()
+    database.insert_policy({
+        'id': 'POL-1', 'drug_name': 'Drug', 'indication': 'Indication', 'criteria': [], 'guidelines': []
+    })
+    # Three timestamps with several cases each, so pages end in the middle of a tie.
+    cases = [
+        {'id': f"PA-{index:02d}", 'title': 'Case', 'raw_text': 'text', 'policy_id': 'POL-1',
+         'created_at': f"2024-01-0{index % 3 + 1} 00:00:00"}
+        for index in range(10)
+    ]
+    database.bulk_load([], cases)
+    yield [case['id'] for case in sorted(cases, key=lambda c: (c['created_at'], c['id']), reverse=True)]
+    database.close_db_connections()
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def test_cursor_round_trip():
+    token = database.encode_case_cursor('2024-01-01 00:00:00', 'PA-01')
+    assert database.decode_case_cursor(token) == ('2024-01-01 00:00:00', 'PA-01')
+
+
+@pytest.mark.parametrize('token', [
+    'not base64!',
+    raw_cursor('PA-01'),
+    raw_cursor(['2024-01-01 00:00:00']),
+    raw_cursor([[1], [2]]),
+    raw_cursor([{}, 1]),
+    raw_cursor([None, 'PA-01']),
+])
+def test_invalid_cursor_is_rejected(token):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        database.decode_case_cursor(token)
+
+
+@pytest.mark.parametrize('limit', [1, 3, 4, 10])
+def test_pages_cover_every_case_once_in_order(case_ids, limit):
+    seen, cursor = [], None
+    while True:
+        page = database.list_cases(limit, cursor, fields=['title'])
+        seen += [case['id'] for case in page['cases']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == case_ids
+
+
+def test_filtered_pages_follow_the_same_order(case_ids):
+    with database.get_db() as conn:
+        conn.execute("UPDATE cases SET status = 'processed' WHERE id IN ('PA-00', 'PA-03', 'PA-04', 'PA-07')")
+        conn.commit()
+    first = database.list_cases(2, status='processed', fields=['status'])
+    second = database.list_cases(2, first['next_cursor'], status='processed', fields=['status'])
+    assert [c['id'] for c in first['cases'] + second['cases']] == ['PA-07', 'PA-04', 'PA-03', 'PA-00']
+    assert second['next_cursor'] is None
@@ -0,0 +1,76 @@
+import pytest
+
+from src.models import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_PATH', str(tmp_path / 'stats.db'))
+    database.init_db()
+    database.insert_policy({
+        'id': 'POL-1', 'drug_name': 'Drug', 'indication': 'Indication', 'criteria': [], 'guidelines': []
+    })
+    yield
+    database.close_db_connections()
+
+
+def stats():
+    # The triggers leave buckets at zero once their last case moves away, where
+    # a rebuild has no row at all.
+    with database.get_db() as conn:
+        rows = conn.execute("SELECT dimension, bucket, value FROM case_stats").fetchall()
+    return {(dimension, bucket): value for dimension, bucket, value in rows if value}
+
+
+def assert_matches_rebuild():
+    maintained = stats()
+    database.rebuild_case_stats()
+    assert maintained == stats()
+
+
+def case(case_id, **fields):
+    return {'id': case_id, 'title': 'Case', 'raw_text': 'text', 'policy_id': 'POL-1', **fields}
+
+
+def test_insert(db):
+    database.insert_case(case('PA-1'))
+    database.bulk_load([], [
+        case('PA-2', status='processed', complexity='high', recommendation_path='llm'),
+        case('PA-3', status='decided', complexity='low', recommendation_path='rules',
+             final_decision='approve', turnaround_minutes=42),
+    ])
+    assert stats()[('total', '')] == 3
+    assert_matches_rebuild()
+
+
+def test_replace_counts_the_case_once(db):
+    database.insert_case(case('PA-1'))
+    database.insert_case(case('PA-1', status='processed'))
+    database.bulk_load([], [case('PA-1', status='decided', final_decision='deny', turnaround_minutes=5)])
+    assert stats()[('total', '')] == 1
+    assert_matches_rebuild()
+
+
+def test_update(db):
+    database.bulk_load([], [case('PA-1'), case('PA-2', status='processed', complexity='high')])
+    database.update_case('PA-1', {'status': 'processed', 'complexity': 'low', 'recommendation_path': 'rules'})
+    database.update_case('PA-2', {
+        'status': 'decided', 'final_decision': 'approve', 'turnaround_minutes': 30, 'recommendation_path': 'llm'
+    })
+    with database.case_unit_of_work('PA-2') as uow:
+        uow.update_case({'complexity': None, 'final_decision': 'deny', 'turnaround_minutes': 45})
+    # Columns the triggers do not track leave the counts alone.
+    database.update_case('PA-1', {'title': 'Renamed'})
+    assert_matches_rebuild()
+
+
+def test_delete(db):
+    database.bulk_load([], [
+        case('PA-1', status='decided', final_decision='approve', turnaround_minutes=10, complexity='low'),
+        case('PA-2', status='pending'),
+    ])
+    with database.get_db() as conn:
+        conn.execute("DELETE FROM cases WHERE id = 'PA-1'")
+        conn.commit()
+    assert stats() == {('total', ''): 1, ('status', 'pending'): 1}
+    assert_matches_rebuild()
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from src.models import database
+
+
+@pytest.fixture
+def case_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_PATH', str(tmp_path / 'uow.db'))
+    database.init_db()
+    database.insert_policy({
+        'id': 'POL-1', 'drug_name': 'Drug', 'indication': 'Indication', 'criteria': [], 'guidelines': []
+    })
+    database.insert_case({'id': 'PA-1', 'title': 'Case', 'raw_text': 'text', 'policy_id': 'POL-1'})
+    yield 'PA-1'
+    database.close_db_connections()
+
+
+def audit_actions(case_id):
+    return sorted(entry['action'] for entry in database.get_case_audit_logs(case_id))
+
+
+def test_writes_land_together_on_success(case_id):
+    with database.case_unit_of_work(case_id) as uow:
+        uow.update_case({'status': 'processed', 'complexity': 'low'})
+        uow.add_audit_log('case_extracted', 'Extracted', 12.5)
+        uow.add_audit_log('case_triaged')
+        # Nothing is written until the block ends.
+        assert database.get_case(case_id)['status'] == 'pending'
+        assert audit_actions(case_id) == []
+    case = database.get_case(case_id)
+    assert (case['status'], case['complexity']) == ('processed', 'low')
+    assert audit_actions(case_id) == ['case_extracted', 'case_triaged']
+
+
+def test_exception_discards_everything(case_id):
+    with pytest.raises(RuntimeError):
+        with database.case_unit_of_work(case_id) as uow:
+            uow.update_case({'status': 'processed'})
+            uow.add_audit_log('case_extracted')
+            raise RuntimeError('stage failed')
+    assert database.get_case(case_id)['status'] == 'pending'
+    assert audit_actions(case_id) == []
+
+
+def test_failed_flush_rolls_back_the_case_update(case_id):
+    with pytest.raises(sqlite3.IntegrityError):
+        with database.case_unit_of_work(case_id) as uow:
+            uow.update_case({'status': 'processed'})
+            uow.add_audit_log('case_extracted')
+            # audit_logs.action is NOT NULL, so the insert after the update fails.
+            uow.add_audit_log(None)
+    assert database.get_case(case_id)['status'] == 'pending'
+    assert audit_actions(case_id) == []
+
+
+def test_commit_can_be_called_between_stages(case_id):
+    with database.case_unit_of_work(case_id) as uow:
+        uow.add_audit_log('case_extracted')
+        uow.commit()
+        uow.add_audit_log('case_triaged')
+    assert audit_actions(case_id) == ['case_extracted', 'case_triaged']
@@ -0,0 +1,120 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services import circuit_breaker
+from src.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, 'time', SimpleNamespace(monotonic=clock, perf_counter=time.perf_counter))
+    monkeypatch.setattr(circuit_breaker, 'BREAKER_ENABLED', True)
+    monkeypatch.setattr(circuit_breaker, 'BREAKER_WINDOW', 10)
+    monkeypatch.setattr(circuit_breaker, 'BREAKER_MIN_CALLS', 4)
+    monkeypatch.setattr(circuit_breaker, 'BREAKER_ERROR_RATE', 0.5)
+    monkeypatch.setattr(circuit_breaker, 'BREAKER_P95_SECONDS', 2.0)
+    monkeypatch.setattr(circuit_breaker, 'BREAKER_COOLDOWN_SECONDS', 30.0)
+    return clock
+
+
+def opened_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker('test')
+    for _ in range(circuit_breaker.BREAKER_MIN_CALLS):
+        breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_stays_closed_below_min_calls_and_thresholds(clock):
+    breaker = CircuitBreaker('test')
+    for _ in range(3):
+        breaker.record(False, 0.1)
+    assert breaker.state == CLOSED
+    breaker = CircuitBreaker('test')
+    for ok in (True, False, True, False, True, True):
+        breaker.record(ok, 0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_opens_on_error_rate(clock):
+    breaker = CircuitBreaker('test')
+    for ok in (True, False, False, False):
+        breaker.record(ok, 0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow() and not breaker.allow()
+    assert breaker.stats()['short_circuited'] == 2
+    assert breaker.stats()['times_opened'] == 1
+
+
+def test_opens_on_p95_latency(clock):
+    breaker = CircuitBreaker('test')
+    for seconds in (0.1, 0.1, 0.1, 5.0):
+        breaker.record(True, seconds)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = opened_breaker()
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time.
+    assert not breaker.allow()
+
+    breaker.record(True, 0.1)
+
+    assert breaker.state == CLOSED and breaker.allow()
+    assert breaker.stats()['window_calls'] == 0
+
+
+@pytest.mark.parametrize('succeeded, seconds', [(False, 0.1), (True, 5.0)])
+def test_half_open_probe_failure_reopens(clock, succeeded, seconds):
+    breaker = opened_breaker()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record(succeeded, seconds)
+
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.stats()['times_opened'] == 2
+    # The cooldown starts again from the failed probe.
+    clock.now += 30
+    assert breaker.allow() and breaker.state == HALF_OPEN
+
+
+def test_probe_that_never_reports_frees_the_slot(clock):
+    breaker = opened_breaker()
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_track_records_exceptions_as_failures(clock):
+    breaker = CircuitBreaker('test')
+    for _ in range(circuit_breaker.BREAKER_MIN_CALLS):
+        with pytest.raises(RuntimeError):
+            with breaker.track():
+                raise RuntimeError('model call failed')
+    assert breaker.state == OPEN
+
+
+def test_disabled_breaker_always_allows(clock, monkeypatch):
+    breaker = opened_breaker()
+    monkeypatch.setattr(circuit_breaker, 'BREAKER_ENABLED', False)
+    assert breaker.allow()
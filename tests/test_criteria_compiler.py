@@ -0,0 +1,133 @@
+import copy
+
+import pytest
+
+from src.data.seed_data import POLICIES
+from src.services.criteria_compiler import compile_policy, get_compiled_policy, policy_version
+
+
+def stored(policy, created_at='2024-01-01 00:00:00'):
+    return {**copy.deepcopy(policy), 'created_at': created_at}
+
+
+def test_policy_version_changes_with_criteria_in_the_same_second():
+    before = stored(POLICIES[0])
+    after = stored(POLICIES[0])
+    after['criteria'][0]['description'] += ' (revised)'
+
+    assert policy_version(before) != policy_version(after)
+    assert get_compiled_policy(after).criteria[0].description.endswith('(revised)')
+
+
+def test_policy_version_changes_with_template_inputs():
+    renamed = stored(POLICIES[0])
+    renamed['drug_name'] = 'Renamed'
+
+    assert policy_version(stored(POLICIES[0])) != policy_version(renamed)
+
+
+def test_policy_version_ignores_created_at():
+    assert policy_version(stored(POLICIES[0])) == policy_version(stored(POLICIES[0], '2025-06-01 12:00:00'))
+
+
+def case(stage='', pd_l1=('not tested', ''), egfr='not tested', alk='not tested', braf=None,
+         prior=(False, []), ecog='', sites=()):
+    return {
+        'disease_stage': {'stage': stage, 'metastatic_sites': list(sites)},
+        'biomarkers': {
+            'pd_l1': {'status': pd_l1[0], 'value': pd_l1[1]},
+            'egfr': {'status': egfr},
+            'alk': {'status': alk},
+            'other_markers': [{'name': 'BRAF V600', 'result': braf}] if braf else []
+        },
+        'prior_therapy': {'has_prior_systemic': prior[0], 'treatments': list(prior[1])},
+        'performance_status': {'ecog': ecog}
+    }
+
+
+STAGE_IV = ('stage', "Patient has histologically or cytologically confirmed metastatic NSCLC (Stage IV)")
+STAGE_III = ('stage', "Unresectable Stage III disease")
+PD_L1_50 = ('biomarker', "Tumor expresses PD-L1 (Tumor Proportion Score >= 50%) as determined by FDA-approved test")
+PD_L1_ANY = ('biomarker', "Tumor expresses PD-L1")
+NO_EGFR = ('biomarker', "No EGFR or ALK genomic tumor aberrations present")
+EGFR_MUTATION = ('biomarker', "EGFR exon 19 deletion or exon 21 L858R substitution")
+NO_ALK = ('biomarker', "No ALK rearrangement")
+BRAF_DETERMINED = ('biomarker', "BRAF mutation status has been determined")
+BRAF_WILD_TYPE = ('biomarker', "BRAF wild type")
+FIRST_LINE = ('prior_therapy', "No prior systemic chemotherapy for metastatic NSCLC (first-line treatment)")
+PRIOR_REQUIRED = ('prior_therapy', "Progression on platinum-based chemotherapy")
+ECOG_0_1 = ('clinical', "ECOG Performance Status 0-1")
+NO_BRAIN_METS = ('clinical', "No active brain metastases (treated and stable brain metastases allowed)")
+BRAIN_METS = ('clinical', "Documented brain metastases")
+UNPARSED = ('clinical', "Adequate organ function")
+
+# (criterion, case data, expected status), as the evaluator behaved before it was compiled.
+EVALUATION_TABLE = [
+    (STAGE_IV, case(stage='Stage IV'), 'met'),
+    (STAGE_IV, case(stage='metastatic disease'), 'met'),
+    (STAGE_IV, case(stage='Stage IIIB'), 'unmet'),
+    (STAGE_IV, case(), 'unknown'),
+    (STAGE_III, case(stage='Stage IIIA'), 'met'),
+    (STAGE_III, case(stage='Stage 4'), 'met'),
+    (STAGE_III, case(stage='Stage II'), 'unmet'),
+    (STAGE_III, case(), 'unknown'),
+    (PD_L1_50, case(pd_l1=('positive', '60%')), 'met'),
+    (PD_L1_50, case(pd_l1=('positive', '50%')), 'met'),
+    (PD_L1_50, case(pd_l1=('positive', '10%')), 'unmet'),
+    (PD_L1_50, case(pd_l1=('pending', '')), 'unknown'),
+    (PD_L1_50, case(pd_l1=('positive', 'high')), 'met'),
+    (PD_L1_50, case(pd_l1=('negative', 'n/a')), 'unmet'),
+    (PD_L1_50, case(), 'unknown'),
+    (PD_L1_ANY, case(pd_l1=('positive', '5%')), 'met'),
+    (PD_L1_ANY, case(pd_l1=('negative', '0%')), 'unmet'),
+    (PD_L1_ANY, case(pd_l1=('pending', '')), 'unknown'),
+    (NO_EGFR, case(egfr='wild type'), 'met'),
+    (NO_EGFR, case(egfr='not detected'), 'met'),
+    (NO_EGFR, case(egfr='mutated'), 'unmet'),
+    (NO_EGFR, case(egfr='pending'), 'unknown'),
+    (NO_EGFR, case(), 'unknown'),
+    (EGFR_MUTATION, case(egfr='mutated'), 'met'),
+    (EGFR_MUTATION, case(egfr='wild type'), 'unmet'),
+    (EGFR_MUTATION, case(egfr='pending'), 'unknown'),
+    (NO_ALK, case(alk='negative'), 'met'),
+    (NO_ALK, case(alk='rearranged'), 'unmet'),
+    (NO_ALK, case(alk='pending'), 'unknown'),
+    (NO_ALK, case(), 'unknown'),
+    (BRAF_DETERMINED, case(braf='V600E mutated'), 'met'),
+    (BRAF_DETERMINED, case(), 'unknown'),
+    (BRAF_WILD_TYPE, case(braf='Wild type'), 'met'),
+    (BRAF_WILD_TYPE, case(braf='V600E mutated'), 'unmet'),
+    (BRAF_WILD_TYPE, case(), 'unknown'),
+    (FIRST_LINE, case(), 'met'),
+    (FIRST_LINE, case(prior=(True, ['No prior systemic therapy'])), 'met'),
+    (FIRST_LINE, case(prior=(True, ['Carboplatin/pemetrexed'])), 'unmet'),
+    (FIRST_LINE, case(prior=(True, [])), 'met'),
+    (PRIOR_REQUIRED, case(prior=(True, ['Carboplatin/pemetrexed'])), 'met'),
+    (PRIOR_REQUIRED, case(), 'unmet'),
+    (ECOG_0_1, case(ecog='0'), 'met'),
+    (ECOG_0_1, case(ecog='1'), 'met'),
+    (ECOG_0_1, case(ecog='2'), 'unmet'),
+    (ECOG_0_1, case(ecog=''), 'unknown'),
+    (ECOG_0_1, case(ecog='unknown'), 'unknown'),
+    (NO_BRAIN_METS, case(sites=['Liver']), 'met'),
+    (NO_BRAIN_METS, case(sites=['Multiple brain lesions']), 'unknown'),
+    (BRAIN_METS, case(sites=['Brain']), 'met'),
+    (BRAIN_METS, case(sites=['Liver']), 'unmet'),
+    (UNPARSED, case(stage='Stage IV', ecog='0'), 'unknown'),
+]
+
+
+@pytest.mark.parametrize('criterion, case_data, expected', EVALUATION_TABLE)
+def test_compiled_criterion_status(criterion, case_data, expected):
+    criterion_type, description = criterion
+    policy = {'id': 'POL-TEST', 'criteria': [{'id': 'C1', 'type': criterion_type, 'description': description}]}
+
+    evaluation = compile_policy(policy).evaluate(case_data)[0]
+
+    assert evaluation['status'] == expected
+    assert (evaluation['id'], evaluation['type'], evaluation['required']) == ('C1', criterion_type, True)
+
+
+def test_seed_policies_compile_every_criterion():
+    for policy in POLICIES:
+        assert compile_policy(policy).unparsed == []
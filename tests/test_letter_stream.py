@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from src.data.seed_data import seed_database
+from src.models import database
+from src.services import circuit_breaker, letter_stream, openai_client
+from src.services.case_extractor import extract_case_data_sections
+from src.services.policy_engine import evaluate_criteria
+
+
+@pytest.fixture
+def case(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_PATH', str(tmp_path / 'letters.db'))
+    seed_database()
+    case = database.get_case('PA-2024-001')
+    policy = database.get_policy(case['policy_id'])
+    extracted = extract_case_data_sections(case['raw_text'])
+    evaluation = evaluate_criteria(extracted, policy)
+    case.update({
+        'extracted_data': extracted,
+        'ai_recommendation': openai_client.generate_recommendation_demo(extracted, policy, evaluation)
+    })
+    yield case
+    database.close_db_connections()
+
+
+def collect(case):
+    async def run():
+        return [event async for event in letter_stream.stream_case_letters(case, database.get_policy(case['policy_id']))]
+    return asyncio.run(run())
+
+
+def open_letters_breaker(monkeypatch):
+    breaker = circuit_breaker.CircuitBreaker('letters')
+    for _ in range(circuit_breaker.BREAKER_MIN_CALLS):
+        breaker.record(False, 0.01)
+    monkeypatch.setitem(circuit_breaker.BREAKERS, 'letters', breaker)
+    # A configured client, so the template letters stand in for a real model call.
+    monkeypatch.setattr(openai_client, 'DEMO_MODE', False)
+    monkeypatch.setattr(openai_client, 'get_async_openai_client', lambda: object())
+
+
+def test_open_breaker_flags_the_case_and_skips_ttft(case, monkeypatch):
+    open_letters_breaker(monkeypatch)
+    streams_before = letter_stream.get_letter_stream_stats()['streams']
+
+    completed = collect(case)[-1]
+
+    assert completed['stage'] == 'letters_completed'
+    assert completed['fallback'] is True and completed['ttft_ms'] is None
+    stored = database.get_case(case['id'])
+    assert stored['fallback_stages'] == 'letters'
+    assert stored['provider_letter'] and stored['member_letter']
+    actions = [log['action'] for log in database.get_case_audit_logs(case['id'])]
+    assert 'stage_fallback' in actions and 'letters_streamed' in actions
+    stats = letter_stream.get_letter_stream_stats()
+    assert stats['streams'] == streams_before and stats['fallbacks'] >= 1
+
+
+def test_fallback_keeps_earlier_fallback_stages(case, monkeypatch):
+    open_letters_breaker(monkeypatch)
+    database.update_case(case['id'], {'fallback_stages': 'extraction,letters'})
+    case['fallback_stages'] = 'extraction,letters'
+
+    collect(case)
+
+    assert database.get_case(case['id'])['fallback_stages'] == 'extraction,letters'
+
+
+def test_demo_stream_is_not_a_fallback(case, monkeypatch):
+    monkeypatch.setattr(openai_client, 'DEMO_MODE', True)
+
+    completed = collect(case)[-1]
+
+    assert completed['fallback'] is False and completed['ttft_ms'] is not None
+    assert database.get_case(case['id'])['fallback_stages'] is None
+
+
+PROVIDER, MEMBER = openai_client.LETTER_MARKERS['provider'], openai_client.LETTER_MARKERS['member']
+STREAMED_LETTERS = (
+    f"Here are the letters.\n{PROVIDER}\nDear Provider,\n### Not a heading, and #\n"
+    f"{MEMBER}\nDear Member,\nEnds with a partial heading ### PROV"
+)
+
+
+def parse(chunks):
+    parser = letter_stream.LetterStreamParser()
+    tokens = []
+    for chunk in chunks:
+        tokens += parser.feed(chunk)
+    tokens += parser.finish()
+    return parser, tokens
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 19, len(PROVIDER), len(STREAMED_LETTERS)])
+def test_parser_handles_markers_split_across_deltas(size):
+    parser, tokens = parse([STREAMED_LETTERS[i:i + size] for i in range(0, len(STREAMED_LETTERS), size)])
+
+    assert parser.letters == {
+        'provider': "\nDear Provider,\n### Not a heading, and #\n",
+        'member': "\nDear Member,\nEnds with a partial heading ### PROV",
+    }
+    for letter, text in parser.letters.items():
+        assert ''.join(token for name, token in tokens if name == letter) == text
+    # Tokens come out in stream order: all of the provider letter, then the member letter.
+    assert [name for name, _ in tokens] == sorted((name for name, _ in tokens), key=['provider', 'member'].index)
+
+
+def test_parser_holds_back_only_a_possible_heading():
+    parser = letter_stream.LetterStreamParser()
+    parser.feed(PROVIDER)
+
+    assert parser.feed("Dear Provider ###") == [('provider', "Dear Provider ")]
+    assert parser.feed(" MEMBER") == []
+    assert parser.feed(" NOTE") == [('provider', "### MEMBER NOTE")]
+    assert parser.feed(f"\n{MEMBER[:5]}") == [('provider', "\n")]
+    assert parser.feed(MEMBER[5:] + "Hi") == [('member', "Hi")]
+
+
+def test_parser_drops_text_before_the_first_heading():
+    parser, tokens = parse(["Sure! ", "Here you go:\n"])
+
+    assert tokens == []
+    assert parser.letters == {'provider': '', 'member': ''}
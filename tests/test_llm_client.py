@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from benchmarks.openai_stub import StubOpenAIServer
+from src.services import llm_client
+
+
+def error_with_headers(headers: dict) -> Exception:
+    error = Exception('failed')
+    error.response = SimpleNamespace(headers=headers)
+    return error
+
+
+@pytest.mark.parametrize('headers, expected', [
+    ({}, None),
+    ({'retry-after': '2'}, 2.0),
+    ({'retry-after': '0.5'}, 0.5),
+    ({'retry-after-ms': '250', 'retry-after': '9'}, 0.25),
+    ({'retry-after': 'soon'}, None),
+])
+def test_retry_after_seconds(headers, expected):
+    assert llm_client._retry_after_seconds(error_with_headers(headers)) == expected
+
+
+def test_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    seconds = llm_client._retry_after_seconds(error_with_headers({'retry-after': format_datetime(retry_at, usegmt=True)}))
+    assert 25 <= seconds <= 30
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with StubOpenAIServer(latency=0, error_rate=1.0, retry_after=0.01) as server:
+        monkeypatch.setenv('OPENAI_API_KEY', 'test')
+        monkeypatch.setenv('OPENAI_BASE_URL', server.base_url)
+        monkeypatch.setattr(llm_client, 'OPENAI_MAX_RETRIES', 3)
+        monkeypatch.setattr(llm_client, 'OPENAI_BACKOFF_BASE_SECONDS', 0.01)
+        yield server
+
+
+@pytest.fixture
+def retries(monkeypatch):
+    """(attempt, delay) for each retry; set `retries.on_retry` to act between attempts."""
+    recorded = RetryLog()
+
+    def record(stage, attempt, error, delay):
+        recorded.append((attempt, delay))
+        if recorded.on_retry:
+            recorded.on_retry(attempt)
+
+    monkeypatch.setattr(llm_client, '_log_retry', record)
+    return recorded
+
+
+class RetryLog(list):
+    on_retry = None
+
+
+def complete():
+    async def run():
+        client = llm_client.get_async_openai_client()
+        try:
+            await llm_client.call_with_retries_async('test', lambda: client.chat.completions.create(
+                model='stub', messages=[{'role': 'user', 'content': 'hello'}]
+            ))
+        finally:
+            await llm_client.close_openai_clients()
+
+    asyncio.run(run())
+
+
+def test_retries_until_the_server_recovers(stub, retries):
+    def recover(attempt):
+        if attempt == 2:
+            stub.error_rate = 0.0
+
+    retries.on_retry = recover
+    complete()
+    assert [attempt for attempt, _ in retries] == [1, 2]
+    assert all(0.01 <= delay <= 0.02 for _, delay in retries)
+    assert (stub.calls['failed'], stub.calls['unknown']) == (2, 1)
+
+
+def test_gives_up_after_max_retries(stub, retries):
+    with pytest.raises(openai.RateLimitError):
+        complete()
+    assert len(retries) == llm_client.OPENAI_MAX_RETRIES
+    assert stub.calls['failed'] == llm_client.OPENAI_MAX_RETRIES + 1
+
+
+def test_long_retry_after_fails_without_retrying(stub, retries, monkeypatch):
+    monkeypatch.setattr(llm_client, 'OPENAI_RETRY_AFTER_MAX_SECONDS', 1)
+    stub.retry_after = 120
+    with pytest.raises(openai.RateLimitError):
+        complete()
+    assert (len(retries), stub.calls['failed']) == (0, 1)
+
+
+def test_non_retryable_status_is_not_retried(stub, retries):
+    stub.error_status = 400
+    with pytest.raises(openai.BadRequestError):
+        complete()
+    assert (len(retries), stub.calls['failed']) == (0, 1)
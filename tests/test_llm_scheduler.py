@@ -0,0 +1,79 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from src.services.llm_scheduler import LLMScheduler, case_priority, llm_priority
+
+
+def grant_order(scheduler: LLMScheduler, priorities: list) -> list:
+    """Queue one request per priority on a drained scheduler and return the order they are granted in."""
+    granted = []
+
+    async def request(name, priority):
+        with llm_priority(priority):
+            await scheduler.acquire_async('test', 1)
+        granted.append(name)
+
+    async def run():
+        scheduler.requests.level = 0
+        await asyncio.gather(*(request(name, priority) for name, priority in priorities))
+
+    asyncio.run(run())
+    return granted
+
+
+def test_waiters_are_granted_lowest_priority_first():
+    # 6000 requests per minute refills one request every 10ms.
+    scheduler = LLMScheduler(rpm_limit=6000, tpm_limit=0)
+
+    granted = grant_order(scheduler, [('e', 5.0), ('a', 1.0), ('d', 4.0), ('b', 2.0), ('c', 3.0)])
+
+    assert granted == ['a', 'b', 'c', 'd', 'e']
+    assert scheduler.stats()['granted'] == 5 and scheduler.stats()['queued'] == 0
+
+
+def test_equal_priorities_are_granted_in_arrival_order():
+    scheduler = LLMScheduler(rpm_limit=6000, tpm_limit=0)
+
+    granted = grant_order(scheduler, [('second', 2.0), ('first-1', 1.0), ('first-2', 1.0), ('first-3', 1.0)])
+
+    assert granted == ['first-1', 'first-2', 'first-3', 'second']
+
+
+def test_cancelled_waiter_does_not_block_the_queue():
+    scheduler = LLMScheduler(rpm_limit=6000, tpm_limit=0)
+    granted = []
+
+    async def request(name, priority):
+        with llm_priority(priority):
+            await scheduler.acquire_async('test', 1)
+        granted.append(name)
+
+    async def run():
+        scheduler.requests.level = 0
+        head = asyncio.create_task(request('cancelled', 0.0))
+        rest = [asyncio.create_task(request(name, priority)) for name, priority in (('b', 2.0), ('a', 1.0))]
+        await asyncio.sleep(0)
+        head.cancel()
+        await asyncio.gather(*rest)
+
+    started = time.monotonic()
+    asyncio.run(run())
+
+    assert granted == ['a', 'b']
+    # The next waiter is woken on cancellation rather than after a full wait slice.
+    assert time.monotonic() - started < 0.5
+    assert scheduler.stats()['queued'] == 0
+
+
+def test_case_priority_reads_naive_timestamps_as_utc():
+    expected = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc).timestamp()
+    assert case_priority('2024-01-02 03:04:05') == expected
+    assert case_priority('2024-01-02T03:04:05+00:00') == expected
+    assert case_priority('2024-01-02 03:04:05') < case_priority('2024-01-02 03:04:06')
+
+
+def test_case_priority_without_a_timestamp_queues_as_now():
+    before = time.time()
+    assert before <= case_priority(None) <= time.time()
+    assert before <= case_priority('not a date') <= time.time()
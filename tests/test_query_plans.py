@@ -0,0 +1,42 @@
+import pytest
+
+from src.models import database
+from src.models.query_plans import HotQuery, check_query_plans, explain_query_plan, hot_queries, plan_problems
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_PATH', str(tmp_path / 'plans.db'))
+    database.init_db()
+    with database.get_db() as connection:
+        yield connection
+    database.close_db_connections()
+
+
+def test_hot_queries_seek_their_indexes(conn):
+    assert check_query_plans(conn) == {}
+
+
+def test_case_list_next_page_seeks_the_cursor(conn):
+    query = hot_queries()['case_list_next_page']
+    plan = explain_query_plan(conn, query.sql, query.params)
+    assert plan[0].startswith('SEARCH c USING INDEX idx_cases_created')
+
+
+def test_or_expanded_cursor_is_flagged(conn):
+    sql = (
+        "SELECT c.id, c.created_at FROM cases c "
+        "WHERE c.created_at < ? OR (c.created_at = ? AND c.id < ?) "
+        "ORDER BY c.created_at DESC, c.id DESC LIMIT ?"
+    )
+    query = HotQuery(sql, ('2024-01-01', '2024-01-01', 'PA-2024-001', 51), 'idx_cases_created')
+    problems = plan_problems(explain_query_plan(conn, query.sql, query.params), query)
+    assert any('scans where a seek is expected' in problem for problem in problems)
+
+
+def test_unindexed_sort_is_flagged(conn):
+    query = HotQuery(
+        "SELECT id FROM cases WHERE policy_id = ? ORDER BY id", ('POL-ONC-001',), 'idx_cases_policy_created'
+    )
+    problems = plan_problems(explain_query_plan(conn, query.sql, query.params), query)
+    assert any('temporary b-tree' in problem for problem in problems)